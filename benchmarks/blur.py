@@ -0,0 +1,49 @@
+"""
+Compare the fast and the Gaussian blur of sensitive thumbnails
+
+    python benchmarks/blur.py [runs]
+"""
+import sys
+import timeit
+from pathlib import Path
+
+from PIL import Image, ImageChops, ImageStat
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mautrfx_embed.resources.thumbnails import blur_image  # noqa: E402
+
+SIZES = [(120, 90), (120, 68), (300, 225), (300, 169), (225, 300)]
+
+
+def sample(width: int, height: int) -> Image.Image:
+    """
+    Make a photo-like test image: a gradient with some noise and sharp edges
+    :param width: image width
+    :param height: image height
+    :return: RGB image
+    """
+    gradient = Image.linear_gradient("L")
+    vertical = gradient.resize((width, height))
+    horizontal = gradient.transpose(Image.Transpose.ROTATE_90).resize((width, height))
+    noise = Image.effect_noise((width, height), 40)
+    img = Image.merge("RGB", (vertical, noise, horizontal))
+    img.paste((255, 255, 255), (width // 4, height // 4, width // 2, height // 2))
+    return img
+
+
+def main(runs: int) -> None:
+    for width, height in SIZES:
+        img = sample(width, height)
+        results = []
+        for name, fast in (("gaussian", False), ("fast", True)):
+            seconds = min(timeit.repeat(lambda: blur_image(img, fast), number=runs, repeat=5))
+            results.append(f"{name} {seconds / runs * 1000:.2f} ms")
+        diff = ImageChops.difference(blur_image(img, False), blur_image(img, True))
+        mean = max(ImageStat.Stat(diff).mean)
+        peak = max(high for _, high in diff.getextrema())
+        print(f"{width}x{height}: {', '.join(results)}, difference mean {mean:.1f} max {peak}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,101 @@
+"""
+Compare decoding of API responses the stock way, with response.json() (json module), and with
+msgspec straight into the structs of resources/schemas.py, alone and followed by the parser
+
+    python benchmarks/decode_json.py [runs]
+"""
+import json
+import sys
+import threading
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mautrfx_embed.parsers.bsky import Bsky  # noqa: E402
+from mautrfx_embed.parsers.lemmy import Lemmy  # noqa: E402
+from mautrfx_embed.parsers.mastodon import Mastodon  # noqa: E402
+from mautrfx_embed.parsers.piefed import Piefed  # noqa: E402
+from mautrfx_embed.parsers.reddit import Reddit  # noqa: E402
+from mautrfx_embed.parsers.twitter import Twitter  # noqa: E402
+from mautrfx_embed.resources.schemas import DECODERS  # noqa: E402
+from mautrfx_embed.resources.utils import Utilities  # noqa: E402
+
+# Fixtures are named <service>_<description>.json
+FIXTURES = Path(__file__).parent / "fixtures"
+CONFIG = {
+    "player": "https://example.org/player?url=",
+    "thumbnail_large": 300,
+    "thumbnail_small": 120,
+    "forum_max_length": 1000,
+    "forum_hard_max_length": 20000,
+    "reddit_excluded_flairs": [],
+    "fedi_excluded_flairs": [],
+    "fedi_excluded_comment_flairs": [],
+}
+
+
+def get_parser(service: str, utils: Utilities) -> Callable[[Any], Any]:
+    """
+    Get the synchronous part of the parser of a service
+    :param service: service name
+    :param utils: Utilities object
+    :return: function parsing decoded API response
+    """
+    if service == "mastodon":
+        mastodon = Mastodon(None, utils)
+        return lambda data: mastodon._parse_mastodon_preview(data, "mastodon.social", {})
+    parser = {
+        "twitter": Twitter,
+        "bsky": Bsky,
+        "reddit": Reddit,
+        "lemmy": Lemmy,
+        "piefed": Piefed,
+    }[service](None, utils)
+    return getattr(parser, f"_parse_{service}_preview")
+
+
+def retained_size(decode: Callable[[], Any]) -> int:
+    """
+    Measure memory held by a decoded response
+    :param decode: function decoding the response
+    :return: size in bytes
+    """
+    tracemalloc.start()
+    data = decode()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return size
+
+
+def main(runs: int) -> None:
+    utils = Utilities.__new__(Utilities)
+    utils.config = CONFIG
+    utils._converters = threading.local()
+    for path in sorted(FIXTURES.glob("*.json")):
+        service = path.stem.split("_")[0]
+        body = path.read_bytes()
+        parse = get_parser(service, utils)
+        decoder = DECODERS[service]
+        # aiohttp's response.json() decodes the body and passes it to json.loads()
+        decoders = {
+            "response.json()": lambda: json.loads(body.decode("utf-8")),
+            "msgspec struct": lambda: decoder.decode(body),
+        }
+        assert parse(decoders["msgspec struct"]()) == parse(decoders["response.json()"]())
+        print(f"{path.stem} ({len(body)} B)")
+        for name, decode in decoders.items():
+            cases = {"decode": decode, "decode + parse": lambda: parse(decode())}
+            results = [
+                f"{case} {min(timeit.repeat(func, number=runs, repeat=5)) / runs * 1e6:.1f} us"
+                for case, func in cases.items()
+            ]
+            results.append(f"retained {retained_size(decode)} B")
+            print(f"  {name}: {', '.join(results)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
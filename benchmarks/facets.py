@@ -0,0 +1,88 @@
+"""
+Time parsing and splicing of Bluesky facets into HTML and Markdown text of a post
+
+To compare with the implementation that spliced facets by UTF-8 byte offsets, once per output
+format, run the script for both trees and compare the output:
+
+    git archive 7382bd7 | tar -x -C /tmp/facets-tree
+    python benchmarks/facets.py
+    python benchmarks/facets.py /tmp/facets-tree
+"""
+import asyncio
+import hashlib
+import inspect
+import random
+import sys
+import time
+from pathlib import Path
+
+FACET_COUNTS = [10, 100, 1000]
+
+
+def make_record(count: int) -> dict:
+    """
+    Build a Bluesky post record with multibyte text and a given number of each kind of facet
+    :param count: number of tags, mentions and links
+    :return: post record as returned by the API
+    """
+    words = []
+    facets = []
+    position = 0
+    for i in range(count):
+        for word, feature in (
+                (f"żółć😀 {i} ", None),
+                (f"#tag{i}", {"$type": "app.bsky.richtext.facet#tag", "tag": f"tag{i}"}),
+                (" ", None),
+                (f"@user{i}.bsky.social",
+                 {"$type": "app.bsky.richtext.facet#mention", "did": f"did:plc:{i}"}),
+                (" ", None),
+                (f"example.com/{i}",
+                 {"$type": "app.bsky.richtext.facet#link", "uri": f"https://example.com/{i}"}),
+                ("\n", None)
+        ):
+            length = len(word.encode())
+            if feature:
+                facets.append({
+                    "index": {"byteStart": position, "byteEnd": position + length},
+                    "features": [feature]
+                })
+            words.append(word)
+            position += length
+    # The API doesn't guarantee any order of facets
+    random.Random(count).shuffle(facets)
+    return {"text": "".join(words), "facets": facets}
+
+
+async def main(tree: Path, runs: int) -> None:
+    sys.path.insert(0, str(tree))
+    from mautrfx_embed.formatters.blog import Blog
+    from mautrfx_embed.formatters.sharedfmt import SharedFmt
+    from mautrfx_embed.parsers.bsky import Bsky
+    from mautrfx_embed.resources.datastructures import BlogPost
+
+    blog = Blog(None, SharedFmt.__new__(SharedFmt))
+    parser = Bsky(None, None)
+    two_pass = "is_html" in inspect.signature(blog.get_text).parameters
+
+    async def render(record: dict) -> tuple[str, str]:
+        fields = {name: None for name in BlogPost.__dataclass_fields__}
+        fields.update(text=record["text"], facets=parser._parse_facets(record), qtype="bsky")
+        post = BlogPost(**fields)
+        if two_pass:
+            return await blog.get_text(post), await blog.get_text(post, False)
+        return await blog.get_text(post)
+
+    for count in FACET_COUNTS:
+        record = make_record(count)
+        digest = hashlib.sha256(repr(await render(record)).encode()).hexdigest()[:16]
+        repeat = max(1, runs // count)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await render(record)
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"{count * 3} facets: {elapsed * 1000:.3f} ms per post, output digest {digest}")
+
+
+if __name__ == "__main__":
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parent.parent
+    asyncio.run(main(root.resolve(), 2000))
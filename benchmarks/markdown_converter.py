@@ -0,0 +1,76 @@
+"""
+Compare a new Markdown converter per post with the converter reused by Utilities
+
+    python benchmarks/markdown_converter.py [runs]
+"""
+import sys
+import threading
+import timeit
+from pathlib import Path
+
+import html2text
+import markdown
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mautrfx_embed.resources.utils import Utilities  # noqa: E402
+
+EXTENSIONS = ["tables", "fenced_code", "md_in_html"]
+DOCUMENT = """
+## Release notes
+
+The new version is **faster** and uses _less_ memory. See [the changelog](https://example.com).
+
+1. Parser rewritten
+2. Fewer allocations
+   - in the tokenizer
+   - in the renderer
+
+| Benchmark | Before | After |
+|-----------|--------|-------|
+| small     | 1.2 ms | 0.8 ms |
+| large     | 15 ms  | 9 ms   |
+
+```python
+def main():
+    print("hello")
+```
+
+> Quoted text with `inline code` and a <span data-mx-spoiler markdown='1'>spoiler</span>.
+""" * 3
+COMMENT = "Short **comment** with a [link](https://example.com)."
+
+
+def main(runs: int) -> None:
+    utils = Utilities.__new__(Utilities)
+    utils._converters = threading.local()
+    fresh = markdown.markdown(DOCUMENT, extensions=EXTENSIONS, output_format="html")
+    assert utils._get_markdown().convert(DOCUMENT) == fresh
+
+    for label, document in (("post", DOCUMENT), ("comment", COMMENT)):
+        cases = {
+            "markdown.markdown()": lambda: markdown.markdown(
+                document,
+                extensions=EXTENSIONS,
+                output_format="html"
+            ),
+            "reused converter + reset": lambda: utils._get_markdown().convert(document),
+        }
+        for name, func in cases.items():
+            seconds = min(timeit.repeat(func, number=runs, repeat=5))
+            print(f"{label} ({len(document)} chars), {name}: {seconds / runs * 1e6:.0f} us")
+
+    cases = {
+        "markdown.Markdown() construction": lambda: markdown.Markdown(
+            extensions=EXTENSIONS,
+            output_format="html"
+        ),
+        "HTML2Text() construction": html2text.HTML2Text,
+        "HTML2Text().handle() of the post": lambda: html2text.HTML2Text().handle(fresh),
+    }
+    for name, func in cases.items():
+        seconds = min(timeit.repeat(func, number=runs, repeat=5))
+        print(f"{name}: {seconds / runs * 1e6:.0f} us")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,60 @@
+"""
+Time extraction of API URLs from links in a message
+
+To compare with the implementation that scanned every domain list (before routing by hostname),
+run the script for both trees and compare the output:
+
+    git archive 3e23917 | tar -x -C /tmp/routing-tree
+    python benchmarks/url_routing.py
+    python benchmarks/url_routing.py /tmp/routing-tree
+"""
+import asyncio
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+from ruamel.yaml import YAML
+
+LINKS = [
+    "https://x.com/user/status/123",
+    "https://fixupx.com/user/status/123?s=20",
+    "https://bsky.app/profile/a.bsky.social/post/abc",
+    "https://www.instagram.com/reel/xyz",
+    "https://vm.tiktok.com/abc",
+    "https://old.reddit.com/r/a/comments/xx/t/yy",
+    "https://www.reddit.com/r/a/comments/xx/t/yy/zz/",
+    "https://mastodon.social/@u/123",
+    "https://lemmy.world/post/1",
+    "https://lemmy.world/comment/2",
+    "https://piefed.social/c/a/p/3",
+    "https://skyview.social/?url=https://bsky.app/profile/a/post/b",
+    "https://x.com/home",
+]
+NOISE = [f"https://example{i}.org/some/path/{i}?q=1" for i in range(50)]
+
+
+async def main(tree: Path, runs: int) -> None:
+    sys.path.insert(0, str(tree))
+    from mautrfx_embed.mautrfx_embed import MautrFxEmbedBot
+
+    bot = MautrFxEmbedBot.__new__(MautrFxEmbedBot)
+    bot.config = YAML(typ="safe").load((tree / "base-config.yaml").read_text())
+    if hasattr(bot, "_build_routes"):
+        bot._build_routes()
+
+    results = await bot._get_api_urls([("", link) for link in LINKS])
+    digest = hashlib.sha256(repr(results).encode()).hexdigest()[:16]
+    print(f"{len(results)} of {len(LINKS)} links resolved, results digest {digest}")
+    for name, links in (("matching", LINKS), ("non-matching", NOISE)):
+        urls = [("", link) for link in links]
+        start = time.perf_counter()
+        for _ in range(runs):
+            await bot._get_api_urls(urls)
+        elapsed = (time.perf_counter() - start) / runs
+        print(f"{len(links)} {name} links: {elapsed * 1e6:.0f} us per message")
+
+
+if __name__ == "__main__":
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parent.parent
+    asyncio.run(main(root.resolve(), 2000))
@@ -1,6 +1,6 @@
 import re
 
-from .sharedfmt import SharedFmt
+from .sharedfmt import MessageParts, SharedFmt
 from ..resources.datastructures import BlogPost, Facet, Link
 from ..resources.utils import Utilities
 
@@ -12,150 +12,147 @@ class Blog:
         self.utils = utils
         self.fmt = fmt
 
-    async def get_author(self, data: BlogPost, is_html: bool = True) -> str:
+    async def get_author(self, data: BlogPost) -> tuple[str, str]:
         """
         Get message part that contains data about the author, including link to their profile
         author_display_name (@author_username)
         :param data: BlogPost data
-        :param is_html: True for HTML, False for Markdown
-        :return: formatted string with data about the author
+        :return: tuple with HTML and Markdown strings with data about the author
         """
         # HTML
-        if is_html:
-            author_name = data.author_name if data.author_name else data.author_screen_name
-            return f"<p>{await self.fmt.get_link(
-                data.author_url,
-                f"<b>{author_name} (@{data.author_screen_name})</b>"
-            )}</p>"
+        author_name = data.author_name if data.author_name else data.author_screen_name
+        html = f"<p>{await self.fmt.get_link(
+            data.author_url,
+            f"<b>{author_name} (@{data.author_screen_name})</b>"
+        )}</p>"
         # Markdown
         author_name = data.author_name_md if data.author_name_md else data.author_screen_name
-        return f"> {await self.fmt.get_link(
+        md = f"> {await self.fmt.get_link(
             data.author_url,
             f"**{author_name}** **(@{data.author_screen_name})**",
             False
         )}   \n>  \n"
+        return html, md
 
-    async def get_text(self, data: BlogPost, is_html: bool = True) -> str:
+    async def get_text(self, data: BlogPost, max_length: int = 0) -> tuple[str, str]:
         """
         Get message part that contains the blog post content. Strips Twitter posts from useless
         t.co links and replaces facets.
         :param data: BlogPost data
-        :param is_html: True for HTML, False for Markdown
-        :return: formatted string with post content
+        :param max_length: if set, the content is cut to this number of characters
+        :return: tuple with HTML and Markdown strings with post content
         """
+        if not data.text:
+            return "", ""
         text = data.text
-        if not text:
-            return ""
-        # HTML
-        if is_html:
-            if data.facets:
-                text = await self._replace_facets(data.text, data.facets, data.qtype)
-            # Remove useless t.co links that are added to raw text by the FxTwitter API
-            # This has to be done AFTER the facets have been substituted
-            if data.qtype == "twitter":
-                text = self.TCO_LINK.sub("", text)
-            if data.spoiler_text:
-                return (
-                    f"<details>"
-                    f"<summary><b>CW:</b> {data.spoiler_text}</summary><br>"
-                    f"<p>{text.replace('\n', '<br>')}</p>"
-                    f"</details>"
-                )
-            return f"<p>{text.replace('\n', '<br>')}</p>"
-
-        if data.facets:
-            text = await self._replace_facets(data.text, data.facets, data.qtype, False)
+        text_md = data.text_md
+        facets = data.facets
+        if max_length:
+            text, truncated = self.utils.truncate_source(text, max_length)
+            if truncated:
+                facets = [facet for facet in facets if facet.end <= len(text)]
+                # Mastodon posts are HTML
+                if data.qtype == "mastodon":
+                    text = self.utils.close_html_tags(text)
+                text += "…"
+                if text_md:
+                    text_md = f"{self.utils.truncate_markdown(text_md, max_length)[0]}…"
+        if facets:
+            text, text_md = self._replace_facets(text, facets)
+        if not text_md:
+            text_md = text
+        # Remove useless t.co links that are added to raw text by the FxTwitter API
+        # This has to be done AFTER the facets have been substituted
         if data.qtype == "twitter":
             text = self.TCO_LINK.sub("", text)
+            text_md = self.TCO_LINK.sub("", text_md)
+        # HTML
+        if data.spoiler_text:
+            html = (
+                f"<details>"
+                f"<summary><b>CW:</b> {data.spoiler_text}</summary><br>"
+                f"<p>{text.replace('\n', '<br>')}</p>"
+                f"</details>"
+            )
+        else:
+            html = f"<p>{text.replace('\n', '<br>')}</p>"
         # Markdown
-        if data.text_md:
-            text = data.text_md
-        return f"> {text.replace('\n', '  \n> ')}  \n>  \n"
+        return html, f"> {text_md.replace('\n', '  \n> ')}  \n>  \n"
 
-    async def get_translation(self, data: BlogPost, is_html: bool = True) -> str:
+    async def get_translation(self, data: BlogPost) -> tuple[str, str]:
         """
         Get message part that contains the translation of the post.
         :param data: BlogPost data
-        :param is_html: True for HTML, False for Markdown
-        :return: formatted string with translation of the post
+        :return: tuple with HTML and Markdown strings with translation of the post
         """
         if not data.translation:
-            return ""
+            return "", ""
 
         src_lang = f"from {data.translation_lang}" if data.translation_lang is not None else "text"
         # HTML
-        if is_html:
-            return (
-                f"<blockquote>📝 <b>Translated {src_lang}</b><br>"
-                f"{data.translation.replace('\n', '<br>')}"
-                f"</blockquote>"
-            )
+        html = (
+            f"<blockquote>📝 <b>Translated {src_lang}</b><br>"
+            f"{data.translation.replace('\n', '<br>')}"
+            f"</blockquote>"
+        )
         # Markdown
-        return (
+        md = (
             f"> > 📝 **Translated {src_lang}**  \n"
-            f"> > {data.translation.replace('\n', '  \n> > ')}  \n>  \n")
+            f"> > {data.translation.replace('\n', '  \n> > ')}  \n>  \n"
+        )
+        return html, md
 
-    async def get_quote(self, data: BlogPost, is_html: bool = True) -> str:
+    async def get_quote(self, data: BlogPost) -> tuple[str, str]:
         """
         Get message part with quote post
         :param data: Quoted post data
-        :param is_html: True for HTML, False for Markdown
-        :return: formatted string with quoted post
+        :return: tuple with HTML and Markdown strings with quoted post
         """
         if not data:
-            return ""
-        text = ""
-        text += await self.get_quote_author(data, is_html)
-        res = await self.get_text(data, is_html)
-        text += res if is_html else res.replace("> ", "> > ")
-        res = await self.fmt.get_poll(data.poll, is_html)
-        text += res if is_html else res.replace("> > ", "> > > ")
-        if is_html:
-            text += await self.fmt.get_media_previews(data.photos, data.videos, data.sensitive)
-        res = await self.fmt.get_media_list(data.videos, data.sensitive, is_html)
-        text += res if is_html else res.replace("> ", "> > ")
-        res = await self.fmt.get_media_list(data.photos, data.sensitive, is_html)
-        text += res if is_html else res.replace("> ", "> > ")
-        res = await self.get_quote(data.quote, is_html)
-        text += res if is_html else res.replace("> > ", "> > > ")
-        res = await self.get_external_link(data.link, is_html)
-        text += res if is_html else res.replace("> > ", "> > > ")
-        # HTML
-        if is_html:
-            return f"<blockquote>{text}</blockquote>"
-        # Markdown
-        return text
+            return "", ""
+        parts = MessageParts()
+        parts.add(await self.get_quote_author(data))
+        parts.add(await self.get_text(data), ("> ", "> > "))
+        parts.add(await self.fmt.get_poll(data.poll), ("> > ", "> > > "))
+        parts.add_html(
+            await self.fmt.get_media_previews(data.photos, data.videos, data.sensitive)
+        )
+        parts.add(await self.fmt.get_media_list(data.videos, data.sensitive), ("> ", "> > "))
+        parts.add(await self.fmt.get_media_list(data.photos, data.sensitive), ("> ", "> > "))
+        parts.add(await self.get_quote(data.quote), ("> > ", "> > > "))
+        parts.add(await self.get_external_link(data.link), ("> > ", "> > > "))
+        html, md = parts.build()
+        return f"<blockquote>{html}</blockquote>", md
 
-    async def get_quote_author(self, data: BlogPost, is_html: bool = True) -> str:
+    async def get_quote_author(self, data: BlogPost) -> tuple[str, str]:
         """
         Get message part with a link to quoted post and information about its author
         :param data: Quoted post data
-        :param is_html: True for HTML, False for Markdown
-        :return: formatted string with quoted post link and author name
+        :return: tuple with HTML and Markdown strings with quoted post link and author name
         """
         if not data.author_screen_name:
-            return ""
+            return "", ""
 
-        link = await self.fmt.get_link(data.author_url, f"@{data.author_screen_name}", is_html)
         # HTML
-        if is_html:
-            return (
-                f"<p><b>"
-                f"{await self.fmt.get_link(data.url, "Quoting")} {data.author_name} ({link})"
-                f"</b></p>"
-            )
+        link = await self.fmt.get_link(data.author_url, f"@{data.author_screen_name}")
+        html = (
+            f"<p><b>"
+            f"{await self.fmt.get_link(data.url, "Quoting")} {data.author_name} ({link})"
+            f"</b></p>"
+        )
         # Markdown
-        return (
+        link = await self.fmt.get_link(data.author_url, f"@{data.author_screen_name}", False)
+        md = (
             f"> > {await self.fmt.get_link(data.url, "**Quoting**", False)} "
             f"{data.author_name_md} **({link})**  \n> >  \n"
         )
+        return html, md
 
-    async def get_interactions(self, data: BlogPost, is_html: bool = True) -> str:
+    async def get_interactions(self, data: BlogPost) -> tuple[str, str]:
         """
         Get message part with number of interactions with the post
         :param data: BlogPost data
-        :param is_html: True for HTML, False for Markdown
-        :return: formatted string with number of interactions with the post
+        :return: tuple with HTML and Markdown strings with number of interactions with the post
         """
         text = []
         if data.replies:
@@ -169,61 +166,53 @@ class Blog:
         if data.views:
             text.append(f"👁️ {data.views}")
         if text:
-            # HTML
-            if is_html:
-                return f"<p><b>{' '.join(text)}</b></p>"
-            # Markdown
-            return f"> **{' '.join(text)}**  \n>  \n"
-        return ""
+            text = " ".join(text)
+            # HTML, Markdown
+            return f"<p><b>{text}</b></p>", f"> **{text}**  \n>  \n"
+        return "", ""
 
-    async def get_external_link(self, data: Link, is_html: bool = True) -> str:
+    async def get_external_link(self, data: Link) -> tuple[str, str]:
         """
         Get message part with data from external link
         :param data: Link data
-        :param is_html: True for HTML, False for Markdown
-        :return: formatted string with external link and its description
+        :return: tuple with HTML and Markdown strings with external link and its description
         """
         if not data:
-            return ""
+            return "", ""
 
-        text = ""
-        link = await self.fmt.get_link(data.url, data.title, is_html)
-        if is_html:
-            # HTML
-            text += f"<blockquote><p>🔗 <b>{link}</b></p>"
-            if data.description:
-                text += f"<p>{data.description}</p>"
-            text += "</blockquote>"
-        else:
-            # Markdown
-            text += f"> > 🔗 **{link}**"
-            if data.description:
-                text += f"  \n> > {data.description}"
-            text += "  \n>  \n"
-        return text
+        # HTML
+        html = f"<blockquote><p>🔗 <b>{await self.fmt.get_link(data.url, data.title)}</b></p>"
+        if data.description:
+            html += f"<p>{data.description}</p>"
+        html += "</blockquote>"
+        # Markdown
+        md = f"> > 🔗 **{await self.fmt.get_link(data.url, data.title, False)}**"
+        if data.description:
+            md += f"  \n> > {data.description}"
+        md += "  \n>  \n"
+        return html, md
 
-    async def get_community_note(self, note: str, is_html: bool = True) -> str:
+    async def get_community_note(self, note: str) -> tuple[str, str]:
         """
         Get message part with community note
         :param note: content of a community note
-        :param is_html: True for HTML, False for Markdown
-        :return: formatted string with community note
+        :return: tuple with HTML and Markdown strings with community note
         """
         if not note:
-            return ""
+            return "", ""
         # HTML
-        if is_html:
-            return (
-                "<blockquote>"
-                "<p><b>Community Note:</b></p>"
-                f"<p>{note.replace('\n', '<br>')}</p>"
-                "</blockquote>"
-            )
+        html = (
+            "<blockquote>"
+            "<p><b>Community Note:</b></p>"
+            f"<p>{note.replace('\n', '<br>')}</p>"
+            "</blockquote>"
+        )
         # Markdown
-        return (
+        md = (
             f"> > **Community Note:**  \n"
             f"> > {note.replace('\n', '  \n> > ')}  \n>  \n"
         )
+        return html, md
 
     async def tw_replace_urls(self, data: BlogPost) -> None:
         """
@@ -249,31 +238,30 @@ class Blog:
         if data.quote:
             await self.tw_replace_urls(data.quote)
 
-    async def _replace_facets(
-            self,
-            text: str,
-            facets: list[Facet],
-            qtype: str,
-            is_html: bool = True
-    ) -> str:
+    def _replace_facets(self, text: str, facets: list[Facet]) -> tuple[str, str]:
         """
         Replace mentions, tags, URLs in text with appropriate links
         :param text: raw text of the message
-        :param facets: list of elements sorted by byte_start with data about replacements
-        :param is_html: True for HTML, False for Markdown
-        :return: text with replacements
+        :param facets: list of elements sorted by start with data about replacements
+        :return: tuple with HTML and Markdown text with replacements
         """
-        text = text.encode("utf-8") if qtype == "bsky" else text
-        text_array = []
+        html = []
+        md = []
         start = 0
         for facet in facets:
+            # Skip facets overlapping already replaced text
+            if facet.start < start:
+                continue
             # Append normal text
-            text_array.append(text[start:facet.byte_start])
+            chunk = text[start:facet.start]
+            html.append(chunk)
+            md.append(chunk)
             # Append text replacement from facet
-            link = await self.fmt.get_link(facet.url, facet.text, is_html)
-            link = link.encode("utf-8") if qtype == "bsky" else link
-            text_array.append(link)
-            start = facet.byte_end
+            html.append(f"<a href=\"{facet.url}\">{facet.text}</a>")
+            md.append(f"[{facet.text}]({facet.url})")
+            start = facet.end
         # Append the remaining text
-        text_array.append(text[start:])
-        return b"".join(text_array).decode("utf-8") if qtype == "bsky" else "".join(text_array)
+        chunk = text[start:]
+        html.append(chunk)
+        md.append(chunk)
+        return "".join(html), "".join(md)
@@ -8,69 +8,81 @@ class Forum:
         self.utils = utils
         self.fmt = fmt
 
-    async def get_title(self, post: ForumPost, is_html: bool = True) -> str:
+    async def get_title(self, post: ForumPost) -> tuple[str, str]:
         """
         Get title of the post along with flair, information about user who posted it, and subreddit
         :param post: ForumPost object
-        :param is_html: True for HTML, False for Markdown
-        :return: Title of the post
+        :return: tuple with HTML and Markdown title of the post
         """
-        title = await self.fmt.get_link(post.url, post.title, is_html)
-        user = ""
-        sub = ""
-        if post.author:
-            user = await self.fmt.get_link(
-                post.author_url,
-                f"u/{post.author}",
-                is_html
-            )
-        if post.sub:
-            sub = await self.fmt.get_link(
-                post.sub_url,
-                post.sub,
-                is_html
-            )
-        subtext = f"{user} on {sub} " if user and sub else ""
-        if subtext and post.is_comment:
-            subtext = f"comment by {subtext} "
+        title = await self.fmt.get_link(post.url, post.title)
+        title_md = await self.fmt.get_link(post.url, post.title, False)
+        subtext = ""
+        subtext_md = ""
+        if post.author and post.sub:
+            user = await self.fmt.get_link(post.author_url, f"u/{post.author}")
+            sub = await self.fmt.get_link(post.sub_url, post.sub)
+            subtext = f"{user} on {sub} "
+            user = await self.fmt.get_link(post.author_url, f"u/{post.author}", False)
+            sub = await self.fmt.get_link(post.sub_url, post.sub, False)
+            subtext_md = f"{user} on {sub} "
+            if post.is_comment:
+                subtext = f"comment by {subtext} "
+                subtext_md = f"comment by {subtext_md} "
         # HTML
-        if is_html:
-            flair = "<code>SPOILER</code> " if post.spoiler else ""
-            flair += " ".join(f"<code>{fl.title()}</code>" for fl in post.flairs)
-            subtext = f"<br>{subtext}" if subtext else ""
-            return f"<p>{flair} <b>{title}</b>{subtext}</p>"
+        flair = "<code>SPOILER</code> " if post.spoiler else ""
+        flair += " ".join(f"<code>{fl.title()}</code>" for fl in post.flairs)
+        subtext = f"<br>{subtext}" if subtext else ""
+        html = f"<p>{flair} <b>{title}</b>{subtext}</p>"
         # Markdown
         flair = "`SPOILER` " if post.spoiler else ""
         flair += " ".join(f"`{fl.title()}`" for fl in post.flairs)
-        subtext = f"  \n> {subtext}" if subtext else ""
-        return f"> {flair} **{title}**{subtext}  \n>  \n"
+        subtext_md = f"  \n> {subtext_md}" if subtext_md else ""
+        return html, f"> {flair} **{title_md}**{subtext_md}  \n>  \n"
 
-    async def get_text(self, data: ForumPost, is_html: bool = True) -> str:
+    async def get_text(self, data: ForumPost, max_length: int = 0) -> tuple[str, str]:
         """
         Get text content of the post. Content is wrapped in 'details' HTML element if the content
         is longer that 'forum_max_length'
         :param data: ForumPost data
-        :param is_html: True for HTML, False for Markdown
-        :return: Post text content
+        :param max_length: if set, the content is cut to this number of characters
+        :return: tuple with HTML and Markdown post text content
         """
         if not data.text or data.spoiler or data.skip_content:
-            return ""
-        if is_html:
-            if len(data.text) > self.utils.config["forum_max_length"]:
-                link_type = "Comment" if data.is_comment else "Post"
-                return (
-                    f"<details><summary><b>{link_type} content:</b> </summary>"
-                    f"<br>{data.text}</details>"
-                )
-            return data.text
-        return f"> {data.text_md.replace("\n", "\n> ")}  \n>  \n"
+            return "", ""
+        text = data.text
+        text_md = data.text_md
+        read_more_url = data.read_more_url
+        if max_length:
+            text, truncated = self.utils.truncate_source(text, max_length)
+            if truncated:
+                text = self.utils.close_html_tags(text)
+                text_md = self.utils.truncate_markdown(text_md, max_length)[0]
+                read_more_url = read_more_url or data.url
+        # Long posts are cut, link to the full content
+        read_more = ""
+        read_more_md = ""
+        if read_more_url:
+            read_more = f"<p>{await self.fmt.get_link(read_more_url, "Read more…")}</p>"
+            read_more_md = (
+                f"  \n>  \n> {await self.fmt.get_link(read_more_url, "Read more…", False)}"
+            )
+        # HTML
+        if len(text) > self.utils.config["forum_max_length"]:
+            link_type = "Comment" if data.is_comment else "Post"
+            html = (
+                f"<details><summary><b>{link_type} content:</b> </summary>"
+                f"<br>{text}{read_more}</details>"
+            )
+        else:
+            html = f"{text}{read_more}"
+        # Markdown
+        return html, f"> {text_md.replace("\n", "\n> ")}{read_more_md}  \n>  \n"
 
-    async def get_interactions(self, data: ForumPost, is_html: bool = True) -> str:
+    async def get_interactions(self, data: ForumPost) -> tuple[str, str]:
         """
         Get number of user interactions with the post/comment
         :param data: ForumPost object
-        :param is_html: True for HTML, False for Markdown
-        :return: Number of user interactions with the post/comment
+        :return: tuple with HTML and Markdown number of user interactions with the post/comment
         """
         text = []
         if data.qtype == "reddit":
@@ -89,9 +101,7 @@ class Forum:
                 text.append(f"💬 {data.comments}")
 
         if text:
-            # HTML
-            if is_html:
-                return f"<p><b>{" ".join(text)}</b></p>"
-            # Markdown
-            return f"> **{" ".join(text)}**  \n>  \n"
-        return ""
+            text = " ".join(text)
+            # HTML, Markdown
+            return f"<p><b>{text}</b></p>", f"> **{text}**  \n>  \n"
+        return "", ""
@@ -5,6 +5,80 @@ from ..resources.datastructures import Media, Poll
 from ..resources.utils import Utilities
 
 
+class MessageParts:
+    """
+    Builder that collects HTML and Markdown versions of a message at the same time.
+    Parts can be assigned to named sections, so that they can be replaced or dropped later.
+    """
+
+    def __init__(self) -> None:
+        # [section, HTML, Markdown]
+        self.parts: list[list[str]] = []
+
+    def add(
+            self,
+            parts: tuple[str, str],
+            nesting: tuple[str, str] | None = None,
+            section: str = ""
+    ) -> None:
+        """
+        Append a part of the message in both formats
+        :param parts: tuple with HTML and Markdown strings
+        :param nesting: optional tuple with Markdown quote prefix and its replacement, used to
+        nest the Markdown part deeper in the quote
+        :param section: name of the section the part belongs to
+        :return:
+        """
+        html, md = parts
+        self.parts.append([section, html, md.replace(*nesting) if nesting else md])
+
+    def add_html(self, html: str, section: str = "") -> None:
+        """
+        Append a part of the message that has only HTML version
+        :param html: HTML string
+        :param section: name of the section the part belongs to
+        :return:
+        """
+        self.parts.append([section, html, ""])
+
+    def replace(self, section: str, parts: tuple[str, str]) -> None:
+        """
+        Replace content of all parts of a section, the first one gets the new content
+        :param section: name of the section
+        :param parts: tuple with new HTML and Markdown strings
+        :return:
+        """
+        for part in self.parts:
+            if part[0] == section:
+                part[1:] = parts
+                parts = ("", "")
+
+    def remove(self, section: str) -> None:
+        """
+        Remove all parts of a section
+        :param section: name of the section
+        :return:
+        """
+        self.parts = [part for part in self.parts if part[0] != section]
+
+    def strip_markdown(self, keep: tuple[str, ...]) -> None:
+        """
+        Remove Markdown version of all parts except the listed sections
+        :param keep: names of the sections that keep their Markdown version
+        :return:
+        """
+        for part in self.parts:
+            if part[0] not in keep:
+                part[2] = ""
+
+    def build(self) -> tuple[str, str]:
+        """
+        Join collected parts
+        :return: tuple with HTML and Markdown message
+        """
+        return "".join(part[1] for part in self.parts), "".join(part[2] for part in self.parts)
+
+
 class SharedFmt:
     def __init__(self, utils: Utilities):
         self.utils = utils
@@ -36,19 +110,28 @@ class SharedFmt:
         for i, pic in enumerate(photos):
             thumbs_data.append((pic, f"Pic#{i + 1}"))
 
-        thumbs = []
-        for thumb in thumbs_data:
-            image_mxc, width, height = await self.utils.get_matrix_image_url(
-                thumb[0],
-                (
-                    self.utils.config["thumbnail_large"]
-                    if (len(videos) + len(photos) == 1) and not is_link
-                    else self.utils.config["thumbnail_small"]
-                ),
-                sensitive,
+        # Compose all thumbnails into a single image, links to media are listed below it
+        if self.utils.config["media_mosaic"] and len(thumbs_data) > 1:
+            image_mxc, width, height = await self.utils.get_matrix_mosaic_url(
+                thumbs_data,
+                self.utils.config["thumbnail_small"],
+                sensitive
             )
-            # To prevent running into ratelimit
-            await asyncio.sleep(0.2)
+            if image_mxc:
+                alt = ", ".join(thumb[1] for thumb in thumbs_data)
+                return f"<p>{await self.get_image(image_mxc, alt, (width, height), True)}</p>"
+
+        size = (
+            self.utils.config["thumbnail_large"]
+            if (len(videos) + len(photos) == 1) and not is_link
+            else self.utils.config["thumbnail_small"]
+        )
+        # Download, thumbnail generation and upload of all media run concurrently
+        results = await asyncio.gather(
+            *(self.utils.get_matrix_image_url(thumb[0], size, sensitive) for thumb in thumbs_data)
+        )
+        thumbs = []
+        for thumb, (image_mxc, width, height) in zip(thumbs_data, results):
             if image_mxc:
                 thumbs.append(f"{await self.get_link(
                     thumb[0].url,
@@ -60,17 +143,17 @@ class SharedFmt:
             return ""
         return f"<p>{" ".join(thumbs)}</p>"
 
-    async def get_media_list(self, media: list, nsfw: bool = False, is_html: bool = True) -> str:
+    async def get_media_list(self, media: list, nsfw: bool = False) -> tuple[str, str]:
         """
         Get message part with a list of media attachments. Also serves as a fallback mechanism
         for client that are not able to display thumbnails
         :param media: list of media attachments
         :param nsfw: True if media contains NSFW content, False otherwise
-        :param is_html: True for HTML, False for Markdown
-        :return: formatted string with list of media attachments
+        :return: tuple with HTML and Markdown strings with list of media attachments
         """
         if len(media) > 0:
             media_formatted = []
+            media_formatted_md = []
             has_audio = False
             has_video = False
             for i, med in enumerate(media):
@@ -82,7 +165,10 @@ class SharedFmt:
                     has_audio = True
                 else:
                     short = "Pic"
-                media_formatted.append(await self.get_link(med.url, f"{short}#{i + 1}", is_html))
+                media_formatted.append(await self.get_link(med.url, f"{short}#{i + 1}"))
+                media_formatted_md.append(
+                    await self.get_link(med.url, f"{short}#{i + 1}", False)
+                )
 
             if has_audio and has_video:
                 title = "Audio/Videos"
@@ -94,50 +180,43 @@ class SharedFmt:
                 title = "Photos"
             if nsfw:
                 title += " (NSFW)"
-            # HTML
-            if is_html:
-                return f"<p><b>{title}: </b>{', '.join(media_formatted)}</p>"
-            # Markdown
-            return f"> **{title}:** {', '.join(media_formatted)}  \n>  \n"
-        return ""
+            # HTML, Markdown
+            return (
+                f"<p><b>{title}: </b>{', '.join(media_formatted)}</p>",
+                f"> **{title}:** {', '.join(media_formatted_md)}  \n>  \n"
+            )
+        return "", ""
 
-    async def get_poll(self, poll_obj: Poll, is_html: bool = True) -> str:
+    async def get_poll(self, poll_obj: Poll) -> tuple[str, str]:
         """
         Get message part that contains poll
         :param poll_obj: BlogPost data
-        :param is_html: True for HTML, False for Markdown
-        :return: formatted string with poll
+        :return: tuple with HTML and Markdown strings with poll
         """
         if not poll_obj:
-            return ""
+            return "", ""
 
         poll = []
+        poll_md = []
         for choice in poll_obj.choices:
-            if is_html:
-                poll.append(
-                    f"{await self._get_chart_bar(choice.percentage)}"
-                    f"<br>{choice.percentage}% {choice.label}"
-                )
-            else:
-                poll.append(
-                    f"> > {await self._get_chart_bar(choice.percentage)}  \n"
-                    f"> > {choice.percentage}% {choice.label}  \n"
-                )
+            bar = await self._get_chart_bar(choice.percentage)
+            poll.append(f"{bar}<br>{choice.percentage}% {choice.label}")
+            poll_md.append(f"> > {bar}  \n> > {choice.percentage}% {choice.label}  \n")
         # HTML
-        if is_html:
-            return (
-                f"<blockquote>"
-                f"<p>{'<br>'.join(poll)}</p>"
-                f"<p>{poll_obj.total_voters:,} voters • {poll_obj.status}</p>"
-                f"</blockquote>"
-                .replace(",", " ")
-            )
+        html = (
+            f"<blockquote>"
+            f"<p>{'<br>'.join(poll)}</p>"
+            f"<p>{poll_obj.total_voters:,} voters • {poll_obj.status}</p>"
+            f"</blockquote>"
+            .replace(",", " ")
+        )
         # Markdown
-        return (
-            f"{''.join(poll)}> >  \n"
+        md = (
+            f"{''.join(poll_md)}> >  \n"
             f"> > {poll_obj.total_voters:,} voters • {poll_obj.status}  \n>  \n"
             .replace(",", " ")
         )
+        return html, md
 
     async def _get_chart_bar(self, percentage: float) -> str:
         """
@@ -150,13 +229,12 @@ class SharedFmt:
         dark_num = round(percentage * 16 / 100)
         return f"{dark_num * dark_block + (16 - dark_num) * light_block}"
 
-    async def get_footer(self, name: str, post_date: int, is_html: bool = True) -> str:
+    async def get_footer(self, name: str, post_date: int) -> tuple[str, str]:
         """
         Get message part with footer
         :param name: service's name (e.g. Bluesky)
         :param post_date: post date
-        :param is_html: True for HTML, False for Markdown
-        :return: formatted string with footer
+        :return: tuple with HTML and Markdown strings with footer
         """
         date_html = ""
         date_md = ""
@@ -170,11 +248,8 @@ class SharedFmt:
             date = strftime('%Y-%m-%d %H:%M', time_s)
             date_html = f"<b> • {date}{time_zone}</b>"
             date_md = f" **• {date}{time_zone}**"
-        # HTML
-        if is_html:
-            return f"<p><b>{name}</b>{date_html}</p>"
-        # Markdown
-        return f"> **{name}**{date_md}"
+        # HTML, Markdown
+        return f"<p><b>{name}</b>{date_html}</p>", f"> **{name}**{date_md}"
 
     async def get_image(
         self,
@@ -1,15 +1,19 @@
+import asyncio
+import hashlib
+import json
 import re
-from typing import Any, Type
+from typing import Any, Awaitable, Callable, Type
 
 from mautrix.errors import MTooLarge
 from mautrix.types import TextMessageEventContent, MessageType, Format
+from mautrix.util.async_db import UpgradeTable
 from mautrix.util.config import BaseProxyConfig, ConfigUpdateHelper
 from maubot import Plugin, MessageEvent
 from maubot.handlers import command
 
 from .formatters.blog import Blog
 from .formatters.forum import Forum
-from .formatters.sharedfmt import SharedFmt
+from .formatters.sharedfmt import MessageParts, SharedFmt
 from .parsers.bsky import Bsky
 from .parsers.mastodon import Mastodon
 from .parsers.twitter import Twitter
@@ -18,7 +22,9 @@ from .parsers.instagram import Instagram
 from .parsers.tiktok import Tiktok
 from .parsers.lemmy import Lemmy
 from .parsers.piefed import Piefed
+from .resources.cache import TTLCache
 from .resources.datastructures import BlogPost, ForumPost
+from .resources.db import upgrade_table
 from .resources.utils import Utilities
 
 
@@ -30,7 +36,41 @@ class Config(BaseProxyConfig):
         helper.copy("show_nsfw")
         helper.copy("thumbnail_large")
         helper.copy("thumbnail_small")
+        helper.copy("media_mosaic")
+        helper.copy("thumbnail_format")
+        helper.copy("thumbnail_budget_large")
+        helper.copy("thumbnail_budget_small")
+        helper.copy("max_image_bytes")
+        helper.copy("max_image_pixels")
+        helper.copy("source_cache_ttl")
+        helper.copy("source_cache_max_entries")
+        helper.copy("source_cache_max_bytes")
         helper.copy("forum_max_length")
+        helper.copy("forum_hard_max_length")
+        helper.copy("max_event_size")
+        helper.copy("max_concurrent_links")
+        helper.copy("api_cache_ttl")
+        helper.copy("api_cache_max_entries")
+        helper.copy("api_cache_max_bytes")
+        helper.copy("message_cache_ttl")
+        helper.copy("message_cache_max_entries")
+        helper.copy("message_cache_max_bytes")
+        helper.copy("negative_cache_ttl_not_found")
+        helper.copy("negative_cache_ttl_forbidden")
+        helper.copy("negative_cache_ttl_rate_limited")
+        helper.copy("negative_cache_ttl_parse_error")
+        helper.copy("negative_cache_max_entries")
+        helper.copy("negative_cache_max_bytes")
+        helper.copy("reddit_session_ttl")
+        helper.copy("upload_rate")
+        helper.copy("upload_burst")
+        helper.copy("upload_max_retries")
+        helper.copy("upload_concurrency")
+        helper.copy("media_cache_ttl")
+        helper.copy("media_cache_max_entries")
+        helper.copy("thumbnail_workers")
+        helper.copy("thumbnail_blur")
+        helper.copy("stats_log_interval")
         helper.copy("localtime")
         helper.copy("reddit_excluded_flairs")
         helper.copy("fedi_excluded_flairs")
@@ -43,6 +83,30 @@ class Config(BaseProxyConfig):
 
 
 class MautrFxEmbedBot(Plugin):
+    URL_HOST = re.compile(r"https://([^/?#:]+)")
+    # Config values that change the content of rendered messages. All of them are read while
+    # rendering (thumbnail settings are reapplied on config update), so a new render key never
+    # serves a message rendered with the old values.
+    RENDER_CONFIG = (
+        "nitter_redirect",
+        "nitter_url",
+        "player",
+        "show_nsfw",
+        "thumbnail_large",
+        "thumbnail_small",
+        "media_mosaic",
+        "thumbnail_format",
+        "thumbnail_budget_large",
+        "thumbnail_budget_small",
+        "thumbnail_blur",
+        "forum_max_length",
+        "forum_hard_max_length",
+        "max_event_size",
+        "localtime",
+        "reddit_excluded_flairs",
+        "fedi_excluded_flairs",
+        "fedi_excluded_comment_flairs"
+    )
     TWITTER_URL = re.compile(r"https://[^/]+/[A-Za-z0-9_]+/status/\d+")
     BLUESKY_URL = re.compile(
         r"https://[^/]+(?:/profile)?/@?(?P<username>[A-Za-z0-9:.-]+)/"
@@ -70,6 +134,10 @@ class MautrFxEmbedBot(Plugin):
     forum = None
     sharedfmt = None
     parsers = None
+    routes = None
+    message_cache = None
+    render_key = None
+    stats_task = None
 
     async def start(self) -> None:
         await super().start()
@@ -97,13 +165,110 @@ class MautrFxEmbedBot(Plugin):
         self.parsers = {
             "mastodon": Mastodon(loop=self.loop, utils=self.utils),
             "bsky": Bsky(loop=self.loop, utils=self.utils),
-            "twitter": Twitter(utils=self.utils),
-            "reddit": Reddit(utils=self.utils),
+            "twitter": Twitter(loop=self.loop, utils=self.utils),
+            "reddit": Reddit(loop=self.loop, utils=self.utils),
             "instagram": Instagram(loop=self.loop, utils=self.utils),
             "tiktok": Tiktok(loop=self.loop),
             "lemmy": Lemmy(loop=self.loop, utils=self.utils),
             "piefed": Piefed(loop=self.loop, utils=self.utils)
         }
+        self.message_cache = TTLCache(
+            ttl=self.config["message_cache_ttl"],
+            max_entries=self.config["message_cache_max_entries"],
+            max_bytes=self.config["message_cache_max_bytes"]
+        )
+        self._build_routes()
+        self._build_render_key()
+        self.stats_task = asyncio.create_task(self._log_stats_periodically())
+
+    def on_external_config_update(self) -> None:
+        super().on_external_config_update()
+        self.utils.on_config_update()
+        self.message_cache.resize(
+            ttl=self.config["message_cache_ttl"],
+            max_entries=self.config["message_cache_max_entries"],
+            max_bytes=self.config["message_cache_max_bytes"]
+        )
+        self._build_routes()
+        self._build_render_key()
+
+    def _build_render_key(self) -> None:
+        """
+        Compute a digest of config values that affect rendering, so that messages rendered with
+        a different config are never reused from the cache
+        :return:
+        """
+        values = repr([self.config[key] for key in self.RENDER_CONFIG])
+        self.render_key = hashlib.sha256(values.encode("utf-8")).hexdigest()[:16]
+
+    def _build_routes(self) -> None:
+        """
+        Index configured domains of services by hostname, so that every URL is checked only
+        against the handlers of services that use its hostname
+        :return:
+        """
+        services = [
+            ("twitter_domains", self._handle_twitter),
+            ("bluesky_domains", self._handle_bluesky),
+            ("instagram_domains", self._handle_instagram),
+            ("tiktok_domains", self._handle_tiktok),
+            ("reddit_domains", self._handle_reddit)
+        ]
+        routes = {}
+        for key, handler in services:
+            for domain in self.config[key] or []:
+                m = self.URL_HOST.match(f"https://{domain}")
+                if m is not None:
+                    routes.setdefault(m.group(1).lower(), []).append((domain, handler))
+        self.routes = routes
+
+    async def stop(self) -> None:
+        if self.stats_task:
+            self.stats_task.cancel()
+        if self.utils:
+            self.log_stats()
+            self.utils.thumbnails.shutdown()
+        await super().stop()
+
+    async def _log_stats_periodically(self) -> None:
+        """
+        Log statistics every 'stats_log_interval' seconds. The interval is read again after each
+        wait, so changing it in the config takes effect without restarting the plugin.
+        :return:
+        """
+        while True:
+            interval = self.config["stats_log_interval"]
+            # Check again later if logging was disabled, it may be enabled in the meantime
+            await asyncio.sleep(interval if interval > 0 else 60)
+            if self.config["stats_log_interval"] > 0:
+                self.log_stats()
+
+    def log_stats(self) -> None:
+        """
+        Log hit and miss counters and size of the in-memory caches, and the number of queued
+        thumbnail jobs
+        :return:
+        """
+        caches = {
+            "API": self.utils.api_cache,
+            "Source image": self.utils.source_cache,
+            "Message": self.message_cache,
+            "Negative": self.utils.negative_cache,
+        }
+        for name, cache in caches.items():
+            if cache is None:
+                continue
+            stats = cache.stats
+            self.log.info(
+                f"{name} cache: {stats["hits"]} hits, {stats["misses"]} misses, "
+                f"{stats["coalesced"]} coalesced, {stats["entries"]} entries, "
+                f"{stats["bytes"]} bytes"
+            )
+        thumbnails = self.utils.thumbnails
+        self.log.info(
+            f"Thumbnail jobs: {thumbnails.queue_depth} in queue, "
+            f"{thumbnails.max_queue_depth} at most"
+        )
 
     @command.passive(r"(https://\S+)", multiple=True)
     async def embed(self, evt: MessageEvent, matches: list[tuple[str, str]]) -> None:
@@ -114,22 +279,73 @@ class MautrFxEmbedBot(Plugin):
             return
         await evt.mark_read()
 
-        previews = []
-        for url in api_urls:
+        # Links are processed concurrently, but replies are sent in the original order,
+        # each one as soon as it and all the links before it are ready
+        semaphore = asyncio.Semaphore(max(1, self.config["max_concurrent_links"]))
+        tasks = [asyncio.create_task(self._get_message(url, semaphore)) for url in api_urls]
+        try:
+            for task in tasks:
+                content = await task
+                if not content:
+                    continue
+                try:
+                    await evt.respond(content)
+                except MTooLarge:
+                    self.log.error("Message content too large.")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _get_message(
+            self,
+            url: tuple[str, str],
+            semaphore: asyncio.Semaphore
+    ) -> TextMessageEventContent | None:
+        """
+        Get a preview of a single link. Rendered messages are cached, so the same link posted
+        again, also in other rooms, is answered without fetching and rendering it again
+        :param url: tuple with service name and API URL
+        :param semaphore: semaphore limiting the number of links processed at the same time
+        :return: text message content or None if preview couldn't be generated
+        """
+        content = await self.message_cache.get_or_fetch(
+            f"{self.render_key}:{url[1]}",
+            lambda: self._render_message(url, semaphore)
+        )
+        # Sending a message modifies its content (e.g. thread relation), so every room
+        # gets its own copy of the cached one
+        return TextMessageEventContent.deserialize(content) if content else None
+
+    async def _render_message(
+            self,
+            url: tuple[str, str],
+            semaphore: asyncio.Semaphore
+    ) -> tuple[dict[str, Any] | None, int]:
+        """
+        Fetch, parse and render a preview of a single link
+        :param url: tuple with service name and API URL
+        :param semaphore: semaphore limiting the number of links processed at the same time
+        :return: tuple with serialized text message content or None if preview couldn't be
+        generated, and its approximate size in bytes
+        """
+        # Links that recently failed are not requested again until the failure expires
+        if self.utils.is_failed(url[1]):
+            return None, 0
+        async with semaphore:
             if url[0] in ("instagram", "tiktok"):
                 preview_raw = await self.utils.get_html_preview(url[1])
             else:
-                preview_raw = await self.utils.get_preview(url[1])
-            if preview_raw:
-                preview = await self._parse_preview(preview_raw, url[0])
-                if preview:
-                    previews.append(preview)
-        for preview in previews:
+                preview_raw = await self.utils.get_preview(url[1], url[0])
+            if not preview_raw:
+                return None, 0
+            preview = await self._parse_preview(preview_raw, url[0])
+            if not preview:
+                self.utils.remember_failure(url[1], "parse_error")
+                return None, 0
             content = await self._prepare_message(preview)
-            try:
-                await evt.respond(content)
-            except MTooLarge:
-                self.log.error("Message content too large.")
+            if not content:
+                return None, 0
+            return content.serialize(), len(content.body) + len(content.formatted_body)
 
     async def _get_api_urls(self, urls: list[tuple[str, str]]) -> list[tuple[str, str]]:
         """
@@ -138,64 +354,62 @@ class MautrFxEmbedBot(Plugin):
         :return: list of API URLs
         """
         api_urls = []
-        handlers = [
-            self._handle_twitter,
-            self._handle_bluesky,
-            self._handle_instagram,
-            self._handle_tiktok,
-            self._handle_reddit,
+        # Instances of federated services can't be listed in the config,
+        # so URLs from unknown hosts are matched against their URL patterns
+        fedi_handlers = [
             self._handle_mastodon,
             self._handle_lemmy,
             self._handle_piefed
         ]
         for _, url in urls:
-            for handler in handlers:
-                result = await handler(url)
-                if result:
-                    api_urls.append(result)
-                    break
+            result = None
+            m = self.URL_HOST.match(url)
+            routes = self.routes.get(m.group(1).lower(), []) if m is not None else []
+            for domain, handler in routes:
+                if url.startswith(f"https://{domain}"):
+                    result = await handler(url, domain)
+                    if result:
+                        break
+            if not result:
+                for handler in fedi_handlers:
+                    result = await handler(url)
+                    if result:
+                        break
+            if result:
+                api_urls.append(result)
         return api_urls
 
-    async def _handle_twitter(self, url: str) -> tuple[str, str] | None:
-        for domain in self.config["twitter_domains"]:
-            if url.startswith(f"https://{domain}") and self.TWITTER_URL.match(url):
-                return "twitter", url.replace(domain, "api.fxtwitter.com")
+    async def _handle_twitter(self, url: str, domain: str) -> tuple[str, str] | None:
+        if self.TWITTER_URL.match(url):
+            return "twitter", url.replace(domain, "api.fxtwitter.com")
         return None
 
-    async def _handle_bluesky(self, url: str) -> tuple[str, str] | None:
-        for domain in self.config["bluesky_domains"]:
-            if url.startswith(f"https://{domain}"):
-                m = self.BLUESKY_URL.match(url)
-                if m is not None:
-                    new_url = (
-                        f"https://api.bsky.app/xrpc/app.bsky.feed.getPostThread?uri=at://"
-                        f"{m.group("username")}/app.bsky.feed.post/{m.group("post_id")}&depth=0"
-                    )
-                    return "bsky", new_url
+    async def _handle_bluesky(self, url: str, domain: str) -> tuple[str, str] | None:
+        m = self.BLUESKY_URL.match(url)
+        if m is not None:
+            new_url = (
+                f"https://api.bsky.app/xrpc/app.bsky.feed.getPostThread?uri=at://"
+                f"{m.group("username")}/app.bsky.feed.post/{m.group("post_id")}&depth=0"
+            )
+            return "bsky", new_url
         return None
 
-    async def _handle_instagram(self, url: str) -> tuple[str, str] | None:
-        for domain in self.config["instagram_domains"]:
-            if url.startswith(f"https://{domain}/reel"):
-                return "instagram", url.replace(domain, "www.instagram.com")
+    async def _handle_instagram(self, url: str, domain: str) -> tuple[str, str] | None:
+        if url.startswith(f"https://{domain}/reel"):
+            return "instagram", url.replace(domain, "www.instagram.com")
         return None
 
-    async def _handle_tiktok(self, url: str) -> tuple[str, str] | None:
-        for domain in self.config["tiktok_domains"]:
-            if url.startswith(f"https://{domain}"):
-                return "tiktok", url.replace(domain, "vm.tiktok.com")
-        return None
+    async def _handle_tiktok(self, url: str, domain: str) -> tuple[str, str] | None:
+        return "tiktok", url.replace(domain, "vm.tiktok.com")
 
-    async def _handle_reddit(self, url: str) -> tuple[str, str] | None:
+    async def _handle_reddit(self, url: str, domain: str) -> tuple[str, str] | None:
         comment_url = "https://api.reddit.com/api/info/?id=t1_"
         post_url = "https://api.reddit.com/api/info/?id=t3_"
-        for domain in self.config["reddit_domains"]:
-            if url.startswith(f"https://{domain}"):
-                m = self.REDDIT_URL.match(url)
-                if m is not None:
-                    if m.group("comment_id") is not None:
-                        return "reddit", f"{comment_url}{m.group("comment_id")}"
-                    return "reddit", f"{post_url}{m.group("post_id")}"
+        m = self.REDDIT_URL.match(url)
+        if m is not None:
+            if m.group("comment_id") is not None:
+                return "reddit", f"{comment_url}{m.group("comment_id")}"
+            return "reddit", f"{post_url}{m.group("post_id")}"
         return None
 
     async def _handle_mastodon(self, url: str) -> tuple[str, str] | None:
@@ -232,135 +446,168 @@ class MautrFxEmbedBot(Plugin):
                     self.log.error(f"Error parsing {key} API response {e}")
         return None
 
-    async def _prepare_message(self, data: Any) -> TextMessageEventContent:
+    async def _prepare_message(self, data: Any) -> TextMessageEventContent | None:
         if data.qtype in ["twitter", "bsky", "mastodon"]:
             return await self._blog_message(data)
         return await self._forum_message(data)
 
-    async def _blog_message(self, post: BlogPost) -> TextMessageEventContent:
+    async def _blog_message(self, post: BlogPost) -> TextMessageEventContent | None:
         """
         Prepare preview message text for blog type of post
         :param post: BlogPost object with data from API
-        :return: text message content
+        :return: text message content or None if the message is too large
         """
         await self.blog.tw_replace_urls(post)
-
-        html = ""
-        body = ""
-
+        parts = MessageParts()
         # Author
-        html += await self.blog.get_author(post)
-        body += await self.blog.get_author(post, False)
-
+        parts.add(await self.blog.get_author(post), section="header")
         # Text
-        html += await self.blog.get_text(post)
-        body += await self.blog.get_text(post, False)
-
+        parts.add(await self.blog.get_text(post), section="text")
         # Translation
-        html += await self.blog.get_translation(post)
-        body += await self.blog.get_translation(post, False)
-
+        parts.add(await self.blog.get_translation(post))
         # Poll
-        html += await self.sharedfmt.get_poll(post.poll)
-        body += await self.sharedfmt.get_poll(post.poll, False)
-
+        parts.add(await self.sharedfmt.get_poll(post.poll))
         # Multimedia previews only for HTML version
-        html += await self.sharedfmt.get_media_previews(post.photos, post.videos, post.sensitive)
-
+        parts.add_html(
+            await self.sharedfmt.get_media_previews(post.photos, post.videos, post.sensitive),
+            section="previews"
+        )
         # Multimedia list for clients that have problems displaying images/links
         # Videos
-        html += await self.sharedfmt.get_media_list(post.videos, post.sensitive)
-        body += await self.sharedfmt.get_media_list(post.videos, post.sensitive, False)
+        parts.add(
+            await self.sharedfmt.get_media_list(post.videos, post.sensitive),
+            section="media"
+        )
         # Photos
-        html += await self.sharedfmt.get_media_list(post.photos, post.sensitive)
-        body += await self.sharedfmt.get_media_list(post.photos, post.sensitive, False)
-
+        parts.add(
+            await self.sharedfmt.get_media_list(post.photos, post.sensitive),
+            section="media"
+        )
         # Quote
-        html += await self.blog.get_quote(post.quote)
-        body += await self.blog.get_quote(post.quote, False)
-
+        parts.add(await self.blog.get_quote(post.quote), section="quote")
         # External link
-        html += await self.blog.get_external_link(post.link)
-        body += await self.blog.get_external_link(post.link, False)
-
+        parts.add(await self.blog.get_external_link(post.link))
         # Replies, retweets, likes, views
-        html += await self.blog.get_interactions(post)
-        body += await self.blog.get_interactions(post, False)
-
+        parts.add(await self.blog.get_interactions(post))
         # Community Note
-        html += await self.blog.get_community_note(post.community_note)
-        body += await self.blog.get_community_note(post.community_note, False)
-
+        parts.add(await self.blog.get_community_note(post.community_note))
         # Footer, date
-        html += await self.sharedfmt.get_footer(post.name, post.post_date)
-        body += await self.sharedfmt.get_footer(post.name, post.post_date, False)
+        parts.add(await self.sharedfmt.get_footer(post.name, post.post_date), section="footer")
 
-        html = f"<blockquote>{html}</blockquote>"
-
-        return TextMessageEventContent(
-            msgtype=MessageType.NOTICE,
-            format=Format.HTML,
-            body=body,
-            formatted_body=html
+        return await self._fit_message(
+            parts,
+            lambda: self.blog.get_text(post, self.config["forum_max_length"])
         )
 
-    async def _forum_message(self, post: ForumPost) -> TextMessageEventContent:
+    async def _forum_message(self, post: ForumPost) -> TextMessageEventContent | None:
         """
         Prepare preview message text for forum type of post
         :param post: ForumPost object with data from API
-        :return: text message content
+        :return: text message content or None if the message is too large
         """
-        html = ""
-        body = ""
-
+        parts = MessageParts()
         # Author
-        html += await self.forum.get_title(post)
-        body += await self.forum.get_title(post, False)
-
+        parts.add(await self.forum.get_title(post), section="header")
         # Text
-        html += await self.forum.get_text(post)
-        body += await self.forum.get_text(post, False)
-
+        parts.add(await self.forum.get_text(post), section="text")
         # Poll
-        html += await self.sharedfmt.get_poll(post.poll)
-        body += await self.sharedfmt.get_poll(post.poll, False)
-
+        parts.add(await self.sharedfmt.get_poll(post.poll))
         # Multimedia previews only for HTML version
         if not post.spoiler and not post.skip_content:
-            html += await self.sharedfmt.get_media_previews(
+            parts.add_html(await self.sharedfmt.get_media_previews(
                 post.photos,
                 post.videos,
                 post.nsfw,
                 post.is_link
-            )
+            ), section="previews")
 
         if not post.is_link:
             # Multimedia list for clients that have problems displaying images/links
             # Should not be displayed for simple website thumbnails
             # Videos
-            html += await self.sharedfmt.get_media_list(post.videos, post.nsfw)
-            body += await self.sharedfmt.get_media_list(post.videos, post.nsfw, False)
+            parts.add(
+                await self.sharedfmt.get_media_list(post.videos, post.nsfw),
+                section="media"
+            )
             # Photos
-            html += await self.sharedfmt.get_media_list(post.photos, post.nsfw)
-            body += await self.sharedfmt.get_media_list(post.photos, post.nsfw, False)
+            parts.add(
+                await self.sharedfmt.get_media_list(post.photos, post.nsfw),
+                section="media"
+            )
 
         # Replies, retweets, likes, views
-        html += await self.forum.get_interactions(post)
-        body += await self.forum.get_interactions(post, False)
-
+        parts.add(await self.forum.get_interactions(post))
         # Footer, date
-        html += await self.sharedfmt.get_footer(post.name, post.post_date)
-        body += await self.sharedfmt.get_footer(post.name, post.post_date, False)
+        parts.add(await self.sharedfmt.get_footer(post.name, post.post_date), section="footer")
 
-        html = f"<blockquote>{html}</blockquote>"
+        return await self._fit_message(
+            parts,
+            lambda: self.forum.get_text(post, self.config["forum_max_length"])
+        )
 
-        return TextMessageEventContent(
+    async def _fit_message(
+            self,
+            parts: MessageParts,
+            collapse_text: Callable[[], Awaitable[tuple[str, str]]]
+    ) -> TextMessageEventContent | None:
+        """
+        Build message content that fits in 'max_event_size'. Oversized messages are degraded
+        step by step: long text is collapsed, Markdown body is reduced to the header and footer,
+        quote is dropped, then lists of media, and finally media thumbnails.
+        :param parts: rendered parts of the message
+        :param collapse_text: coroutine function that renders shortened text of the post
+        :return: text message content or None if the message can't fit
+        """
+        limit = self.config["max_event_size"]
+        content, size = self._build_content(parts, limit)
+        if not limit or size <= limit:
+            return content
+
+        parts.replace("text", await collapse_text())
+        content, size = self._build_content(parts, limit)
+        steps = [
+            # Drop Markdown duplicate of the message, except the header and footer
+            lambda: parts.strip_markdown(("header", "footer")),
+            lambda: parts.remove("quote"),
+            lambda: parts.remove("media"),
+            lambda: parts.remove("previews")
+        ]
+        for step in steps:
+            if size <= limit:
+                break
+            step()
+            content, size = self._build_content(parts, limit)
+        if size > limit:
+            self.log.error(f"Message content too large ({size} bytes).")
+            return None
+        return content
+
+    @staticmethod
+    def _build_content(parts: MessageParts, limit: int) -> tuple[TextMessageEventContent, int]:
+        """
+        Build message content from rendered parts
+        :param parts: rendered parts of the message
+        :param limit: maximum size of the message in bytes
+        :return: tuple with text message content and size of serialized content in bytes,
+        or its upper bound if it's below the limit
+        """
+        html, body = parts.build()
+        content = TextMessageEventContent(
             msgtype=MessageType.NOTICE,
             format=Format.HTML,
             body=body,
-            formatted_body=html
+            formatted_body=f"<blockquote>{html}</blockquote>"
         )
+        # A character takes at most 6 bytes in JSON, serializing small messages can be skipped
+        size = 6 * (len(body) + len(html)) + 256
+        if 0 < limit < size:
+            size = len(json.dumps(content.serialize(), ensure_ascii=False).encode("utf-8"))
+        return content, size
 
     @classmethod
     def get_config_class(cls) -> Type[BaseProxyConfig]:
         return Config
+
+    @classmethod
+    def get_db_upgrade_table(cls) -> UpgradeTable:
+        return upgrade_table
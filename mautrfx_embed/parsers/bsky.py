@@ -11,6 +11,14 @@ class Bsky:
         self.utils = utils
 
     async def parse_preview(self, data: Any) -> BlogPost:
+        """
+        Parse JSON data from Bsky API
+        :param data: JSON data
+        :return: BlogPost object
+        """
+        return await self.loop.run_in_executor(None, self._parse_bsky_preview, data)
+
+    def _parse_bsky_preview(self, data: Any) -> BlogPost:
         """
         Parse JSON data from Bsky API
         :param data: JSON data
@@ -29,18 +37,18 @@ class Bsky:
         link: Link = None
         quote: BlogPost = None
         if media is not None:
-            videos = await self._parse_videos(media)
-            photos = await self._parse_photos(media)
-            link = await self._parse_external(media)
-            quote = await self.parse_quote(media)
+            videos = self._parse_videos(media)
+            photos = self._parse_photos(media)
+            link = self._parse_external(media)
+            quote = self.parse_quote(media)
 
         return BlogPost(
             text=data["record"]["text"],
             url=None,
             text_md=None,
-            replies=await self.utils.parse_interaction(data["replyCount"]),
-            reposts=await self.utils.parse_interaction(data["repostCount"]),
-            likes=await self.utils.parse_interaction(data["likeCount"]),
+            replies=self.utils.parse_interaction(data["replyCount"]),
+            reposts=self.utils.parse_interaction(data["repostCount"]),
+            likes=self.utils.parse_interaction(data["likeCount"]),
             views=None,
             quotes=None,
             community_note=None,
@@ -48,10 +56,10 @@ class Bsky:
             author_name_md=data["author"]["displayName"],
             author_screen_name=data["author"]["handle"],
             author_url="https://bsky.app/profile/" + data["author"]["handle"],
-            post_date=await self.utils.parse_date(data["record"]["createdAt"]),
+            post_date=self.utils.parse_date(data["record"]["createdAt"]),
             photos=photos,
             videos=videos,
-            facets=await self._parse_facets(data["record"]),
+            facets=self._parse_facets(data["record"]),
             poll=None,
             link=link,
             quote=quote,
@@ -63,7 +71,7 @@ class Bsky:
             spoiler_text=None
         )
 
-    async def _parse_photos(self, media: Any) -> list[Media]:
+    def _parse_photos(self, media: Any) -> list[Media]:
         """
         Extract data about image attachments into Media objects
         :param media: JSON with data about image attachments
@@ -83,10 +91,10 @@ class Bsky:
                 photos.append(photo)
         # Posts with quotes have different structure
         if "app.bsky.embed.recordWithMedia" in media["$type"]:
-            photos += await self._parse_photos(media["media"])
+            photos += self._parse_photos(media["media"])
         return photos
 
-    async def _parse_videos(self, media: Any) -> list[Media]:
+    def _parse_videos(self, media: Any) -> list[Media]:
         """
         Extract data about video attachments into Media objects
         :param media: JSON with data about video attachments
@@ -105,10 +113,10 @@ class Bsky:
             videos.append(video)
         # Posts with quotes have different structure
         if "app.bsky.embed.recordWithMedia" in media["$type"]:
-            videos += await self._parse_videos(media["media"])
+            videos += self._parse_videos(media["media"])
         return videos
 
-    async def parse_quote(self, media: Any) -> BlogPost | None:
+    def parse_quote(self, media: Any) -> BlogPost | None:
         """
         Parse JSON data about quote post from Bsky API
         :param media: JSON data
@@ -123,9 +131,9 @@ class Bsky:
             media_rec = media["record"].get("embeds")
             if media_rec is not None:
                 for elem in media_rec:
-                    photos = await self._parse_photos(elem)
-                    videos = await self._parse_videos(elem)
-                    link = await self._parse_external(elem)
+                    photos = self._parse_photos(elem)
+                    videos = self._parse_videos(elem)
+                    link = self._parse_external(elem)
 
             return BlogPost(
                 text=media["record"]["value"]["text"],
@@ -147,7 +155,7 @@ class Bsky:
                 post_date=None,
                 photos=photos,
                 videos=videos,
-                facets=await self._parse_facets(media["record"]["value"]),
+                facets=self._parse_facets(media["record"]["value"]),
                 poll=None,
                 link=link,
                 quote=None,
@@ -160,7 +168,7 @@ class Bsky:
             )
         return None
 
-    async def _parse_external(self, media: Any) -> Link | None:
+    def _parse_external(self, media: Any) -> Link | None:
         """
         Extract data about external links into Link object
         :param media: external link JSON data
@@ -174,45 +182,52 @@ class Bsky:
             )
         return None
 
-    async def _parse_facets(self, data: Any) -> list[Facet]:
+    def _parse_facets(self, data: Any) -> list[Facet]:
         """
-        Extract data about facets into a list of Facet objects
+        Extract data about facets into a list of Facet objects. Bluesky marks facets with UTF-8
+        byte offsets, they're converted to string offsets in a single pass over the text
         :param data: JSON facet data
-        :return: list of Facets
+        :return: list of Facets sorted by their position in the text
         """
         facets: list[Facet] = []
         facets_raw = data.get("facets")
-        if facets_raw is not None:
-            for fac in facets_raw:
-                facet = None
-                b_start = fac["index"]["byteStart"]
-                b_end = fac["index"]["byteEnd"]
-                text = data["text"].encode('utf-8')
-                if fac["features"][0]["$type"] == "app.bsky.richtext.facet#mention":
-                    text = text[b_start:b_end].decode('utf-8')
-                    facet = Facet(
-                        text=text,
-                        url=f"https://bsky.app/profile/{fac["features"][0]["did"]}",
-                        byte_start=b_start,
-                        byte_end=b_end
-                    )
-                elif fac["features"][0]["$type"] == "app.bsky.richtext.facet#tag":
-                    tag = fac["features"][0]["tag"]
-                    facet = Facet(
-                        text="#" + tag,
-                        url=f"https://bsky.app/hashtag/{tag}",
-                        byte_start=b_start,
-                        byte_end=b_end
-                    )
-                elif fac["features"][0]["$type"] == "app.bsky.richtext.facet#link":
-                    link_text = text[b_start:b_end].decode('utf-8')
-                    facet = Facet(
-                        text=link_text,
-                        url=fac["features"][0]["uri"],
-                        byte_start=b_start,
-                        byte_end=b_end
-                    )
-                if facet:
-                    facets.append(facet)
-                facets.sort(key=lambda f: f.byte_start)
+        if not facets_raw:
+            return facets
+        text = data["text"]
+        encoded = text.encode("utf-8")
+        # Byte and string offsets of the end of the previous facet
+        b_pos = 0
+        pos = 0
+        for fac in sorted(facets_raw, key=lambda f: f["index"]["byteStart"]):
+            b_start = fac["index"]["byteStart"]
+            b_end = fac["index"]["byteEnd"]
+            # Skip overlapping and malformed facets
+            if b_start < b_pos or b_end < b_start:
+                continue
+            start = pos + len(encoded[b_pos:b_start].decode("utf-8", "ignore"))
+            end = start + len(encoded[b_start:b_end].decode("utf-8", "ignore"))
+            b_pos = b_end
+            pos = end
+            feature = fac["features"][0]
+            if feature["$type"] == "app.bsky.richtext.facet#mention":
+                facets.append(Facet(
+                    text=text[start:end],
+                    url=f"https://bsky.app/profile/{feature["did"]}",
+                    start=start,
+                    end=end
+                ))
+            elif feature["$type"] == "app.bsky.richtext.facet#tag":
+                facets.append(Facet(
+                    text="#" + feature["tag"],
+                    url=f"https://bsky.app/hashtag/{feature["tag"]}",
+                    start=start,
+                    end=end
+                ))
+            elif feature["$type"] == "app.bsky.richtext.facet#link":
+                facets.append(Facet(
+                    text=text[start:end],
+                    url=feature["uri"],
+                    start=start,
+                    end=end
+                ))
         return facets
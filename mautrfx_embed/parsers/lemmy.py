@@ -11,6 +11,14 @@ class Lemmy:
         self.utils = utils
 
     async def parse_preview(self, data: Any) -> ForumPost:
+        """
+        Parse JSON data from Lemmy API
+        :param data: JSON data
+        :return: ForumPost object
+        """
+        return await self.loop.run_in_executor(None, self._parse_lemmy_preview, data)
+
+    def _parse_lemmy_preview(self, data: Any) -> ForumPost:
         """
         Parse JSON data from Lemmy API
         :param data: JSON data
@@ -22,34 +30,27 @@ class Lemmy:
         # Comment
         if data.get("comment_view"):
             data = data["comment_view"]
-            title, flairs = await self.utils.fedi_forum_parse_title(data["post"]["name"])
+            title, flairs = self.utils.fedi_forum_parse_title(data["post"]["name"])
+            body, truncated = self.utils.truncate_markdown(data["comment"].get("content"))
             return ForumPost(
-                text=await self.loop.run_in_executor(
-                    None,
-                    self.utils.fedi_forum_parse_text,
-                    data["comment"].get("content")
-                ),
-                text_md=await self.loop.run_in_executor(
-                    None,
-                    self.utils.fedi_forum_parse_markdown,
-                    data["comment"].get("content")
-                ),
+                text=self.utils.fedi_forum_parse_text(body),
+                text_md=self.utils.fedi_forum_parse_markdown(body),
                 flairs=[fl for fl in flairs if fl.lower() != "spoiler"],
                 sub=f"c/{data["community"]["name"]}",
                 sub_url=data["community"]["actor_id"],
                 title=title,
                 score=None,
                 upvote_ratio=0,
-                upvotes=await self.utils.parse_interaction(data["counts"]["upvotes"]),
-                downvotes=await self.utils.parse_interaction(data["counts"]["downvotes"]),
-                post_date=await self.utils.parse_date(data["comment"]["published"]),
+                upvotes=self.utils.parse_interaction(data["counts"]["upvotes"]),
+                downvotes=self.utils.parse_interaction(data["counts"]["downvotes"]),
+                post_date=self.utils.parse_date(data["comment"]["published"]),
                 nsfw=data["post"]["nsfw"],
                 spoiler="spoiler" in (fl.lower() for fl in flairs),
-                skip_content=await self.utils.config_item_contains(
+                skip_content=self.utils.config_item_contains(
                     flairs,
                     "fedi_excluded_comment_flairs"
                 ),
-                author=await self._parse_author(data["creator"], data["community"]),
+                author=self._parse_author(data["creator"], data["community"]),
                 author_url=data["creator"]["actor_id"],
                 url=f"{data["comment"]["ap_id"]}?scrollToComments=true",
                 comments=data["counts"]["child_count"],
@@ -62,44 +63,38 @@ class Lemmy:
                     data["community"]["actor_id"]
                 )}",
                 is_link="text/html" in data["post"].get("url_content_type", ""),
-                is_comment=True
+                is_comment=True,
+                read_more_url=data["comment"]["ap_id"] if truncated else None
             )
 
         # Post
         data = data["post_view"]
-        title, flairs = await self.utils.fedi_forum_parse_title(data["post"]["name"])
+        title, flairs = self.utils.fedi_forum_parse_title(data["post"]["name"])
+        body, truncated = self.utils.truncate_markdown(data["post"].get("body"))
         return ForumPost(
-            text=await self.loop.run_in_executor(
-                None,
-                self.utils.fedi_forum_parse_text,
-                data["post"].get("body")
-            ),
-            text_md=await self.loop.run_in_executor(
-                None,
-                self.utils.fedi_forum_parse_markdown,
-                data["post"].get("body")
-            ),
+            text=self.utils.fedi_forum_parse_text(body),
+            text_md=self.utils.fedi_forum_parse_markdown(body),
             flairs=[fl for fl in flairs if fl.lower() != "spoiler"],
             sub=f"c/{data["community"]["name"]}",
             sub_url=data["community"]["actor_id"],
             title=title,
             score=None,
             upvote_ratio=0,
-            upvotes=await self.utils.parse_interaction(data["counts"]["upvotes"]),
-            downvotes=await self.utils.parse_interaction(data["counts"]["downvotes"]),
-            post_date=await self.utils.parse_date(data["post"]["published"]),
+            upvotes=self.utils.parse_interaction(data["counts"]["upvotes"]),
+            downvotes=self.utils.parse_interaction(data["counts"]["downvotes"]),
+            post_date=self.utils.parse_date(data["post"]["published"]),
             nsfw=data["post"]["nsfw"],
             spoiler="spoiler" in (fl.lower() for fl in flairs),
-            skip_content=await self.utils.config_item_contains(flairs, "fedi_excluded_flairs"),
-            author=await self._parse_author(data["creator"], data["community"]),
+            skip_content=self.utils.config_item_contains(flairs, "fedi_excluded_flairs"),
+            author=self._parse_author(data["creator"], data["community"]),
             author_url=data["creator"]["actor_id"],
             url=(
                 data["post"]["url"] if data["post"].get("url") is not None
                 else data["post"]["ap_id"]
             ),
             comments=data["counts"]["comments"],
-            photos=await self._parse_photos(data),
-            videos=await self._parse_videos(data),
+            photos=self._parse_photos(data),
+            videos=self._parse_videos(data),
             poll=None,
             qtype="lemmy",
             name=f"🐹 {self.utils.INSTANCE_NAME.sub(
@@ -107,10 +102,11 @@ class Lemmy:
                 data["community"]["actor_id"]
             )}",
             is_link="text/html" in data["post"].get("url_content_type", ""),
-            is_comment=False
+            is_comment=False,
+            read_more_url=data["post"]["ap_id"] if truncated else None
         )
 
-    async def _parse_author(self, creator: Any, community: Any) -> str:
+    def _parse_author(self, creator: Any, community: Any) -> str:
         """
         Get post author's name
         :param creator: author section JSON data
@@ -123,7 +119,7 @@ class Lemmy:
         return f"{creator["name"]}{base_url}"
 
 
-    async def _parse_photos(self, data: Any) -> list[Media]:
+    def _parse_photos(self, data: Any) -> list[Media]:
         """
         Extract images from JSON post data
         :param data: JSON post data
@@ -141,12 +137,12 @@ class Lemmy:
             )
             photos.append(photo)
         else:
-            thumbnail = await self._parse_thumbnail(data)
+            thumbnail = self._parse_thumbnail(data)
             if thumbnail:
                 photos.append(thumbnail)
         return photos
 
-    async def _parse_thumbnail(self, data: Any) -> Media | None:
+    def _parse_thumbnail(self, data: Any) -> Media | None:
         """
         Extract thumbnail from JSON post data
         :param data: JSON post data
@@ -166,7 +162,7 @@ class Lemmy:
             )
         return photo
 
-    async def _parse_videos(self, data: Any) -> list[Media]:
+    def _parse_videos(self, data: Any) -> list[Media]:
         """
         Extract video from JSON post data
         :param data: JSON post data
@@ -8,6 +8,7 @@ from typing import Any
 import html2text
 
 from ..resources.datastructures import BlogPost, Media, Link, Poll, Choice
+from ..resources.media_variants import pick_variant
 from ..resources.utils import Utilities
 
 
@@ -31,61 +32,92 @@ class Mastodon:
         if error is not None:
             raise ValueError("Bad response")
 
-        content = await self.loop.run_in_executor(None, self._parse_text, data["content"])
-        md_text = await self.loop.run_in_executor(None, self._parse_markdown, content)
-        content = await self._replace_emoji_codes(data["emojis"], content)
+        # Upload every custom emoji used in the post, its quote, and by their authors only once
+        instance = self.INSTANCE_NAME.sub(r"\g<base_url>", data["url"])
+        emojis = data["emojis"] + data["account"]["emojis"]
+        quote = data.get("quote")
+        if quote:
+            emojis += quote["quoted_status"]["emojis"] + quote["quoted_status"]["account"]["emojis"]
+        emoji_mxc = await self._upload_emojis(instance, emojis)
+        return await self.loop.run_in_executor(
+            None,
+            self._parse_mastodon_preview,
+            data,
+            instance,
+            emoji_mxc
+        )
+
+    def _parse_mastodon_preview(
+            self,
+            data: Any,
+            instance: str,
+            emoji_mxc: dict[tuple[str, str], str]
+    ) -> BlogPost:
+        """
+        Parse JSON data from Mastodon API after custom emojis are uploaded
+        :param data: JSON data
+        :param instance: instance the post comes from
+        :param emoji_mxc: dictionary with (shortcode, url) keys and uploaded emoji mxc URLs
+        :return: BlogPost object
+        """
+        content = self._parse_text(data["content"])
+        md_text = self._parse_markdown(content)
+        content = self._replace_emoji_codes(data["emojis"], content, emoji_mxc)
 
         return BlogPost(
             text=content,
             url=None,
             text_md=md_text,
-            replies=await self.utils.parse_interaction(data["replies_count"]),
-            reposts=await self.utils.parse_interaction(data["reblogs_count"]),
-            likes=await self.utils.parse_interaction(data["favourites_count"]),
+            replies=self.utils.parse_interaction(data["replies_count"]),
+            reposts=self.utils.parse_interaction(data["reblogs_count"]),
+            likes=self.utils.parse_interaction(data["favourites_count"]),
             views=None,
-            quotes=await self.utils.parse_interaction(data.get("quotes_count")),
+            quotes=self.utils.parse_interaction(data.get("quotes_count")),
             community_note=None,
-            author_name=await self._replace_emoji_codes(
+            author_name=self._replace_emoji_codes(
                 data["account"]["emojis"],
-                data["account"]["display_name"]
+                data["account"]["display_name"],
+                emoji_mxc
             ),
             author_name_md=data["account"]["display_name"],
             author_screen_name=data["account"]["username"],
             author_url=data["account"]["url"],
-            post_date=await self.utils.parse_date(data["created_at"]),
-            photos=await self._parse_photos(data),
-            videos=await self._parse_videos(data),
+            post_date=self.utils.parse_date(data["created_at"]),
+            photos=self._parse_photos(data),
+            videos=self._parse_videos(data),
             facets=[],
-            poll=await self._parse_poll(data),
-            link=await self._parse_link(data),
-            quote=await self.parse_quote(data),
+            poll=self._parse_poll(data),
+            link=self._parse_link(data),
+            quote=self.parse_quote(data, emoji_mxc),
             translation=None,
             translation_lang=None,
             qtype="mastodon",
-            name=f"🐘 {self.INSTANCE_NAME.sub(r"\g<base_url>", data["url"])}",
+            name=f"🐘 {instance}",
             sensitive=data["sensitive"],
             spoiler_text=data["spoiler_text"]
         )
 
-    async def parse_quote(self, data: Any) -> BlogPost | None:
+    def parse_quote(
+            self,
+            data: Any,
+            emoji_mxc: dict[tuple[str, str], str]
+    ) -> BlogPost | None:
         """
         Parse JSON data of a quote post from Mastodon API
         :param data: JSON data of a quote post
+        :param emoji_mxc: dictionary with (shortcode, url) keys and uploaded emoji mxc URLs
         :return: BlogPost object
         """
         quote = data.get("quote")
         if not quote:
             return None
-        quote_text = await self.loop.run_in_executor(
-            None,
-            self._parse_text,
-            quote["quoted_status"]["content"]
-        )
-        md_quote_text = await self.loop.run_in_executor(None, self._parse_markdown, quote_text)
+        quote_text = self._parse_text(quote["quoted_status"]["content"])
+        md_quote_text = self._parse_markdown(quote_text)
 
-        quote_text = await self._replace_emoji_codes(
+        quote_text = self._replace_emoji_codes(
             quote["quoted_status"]["emojis"],
-            quote_text
+            quote_text,
+            emoji_mxc
         )
 
         return BlogPost(
@@ -98,20 +130,21 @@ class Mastodon:
                 views=None,
                 quotes=None,
                 community_note=None,
-                author_name=await self._replace_emoji_codes(
+                author_name=self._replace_emoji_codes(
                     quote["quoted_status"]["account"]["emojis"],
-                    quote["quoted_status"]["account"]["display_name"]
+                    quote["quoted_status"]["account"]["display_name"],
+                    emoji_mxc
                 ),
                 author_name_md=quote["quoted_status"]["account"]["display_name"],
                 author_url=quote["quoted_status"]["account"]["url"],
                 author_screen_name=quote["quoted_status"]["account"]["username"],
                 post_date=None,
-                photos=await self._parse_photos(quote["quoted_status"]),
-                videos=await self._parse_videos(quote["quoted_status"]),
+                photos=self._parse_photos(quote["quoted_status"]),
+                videos=self._parse_videos(quote["quoted_status"]),
                 facets=[],
-                poll=await self._parse_poll(quote["quoted_status"]),
-                link=await self._parse_link(quote["quoted_status"]),
-                quote=await self._get_child_quote_info(quote["quoted_status"]["quote"]),
+                poll=self._parse_poll(quote["quoted_status"]),
+                link=self._parse_link(quote["quoted_status"]),
+                quote=self._get_child_quote_info(quote["quoted_status"]["quote"]),
                 translation=None,
                 translation_lang=None,
                 qtype="mastodon",
@@ -153,7 +186,7 @@ class Mastodon:
         md_text = text_maker.handle(text).strip()
         return md_text
 
-    async def _parse_videos(self, data: Any) -> list[Media]:
+    def _parse_videos(self, data: Any) -> list[Media]:
         """
         Extract video attachments from JSON
         :param data: post's JSON from Mastodon API
@@ -180,7 +213,7 @@ class Mastodon:
             videos.append(video)
         return videos
 
-    async def _parse_photos(self, data: Any) -> list[Media]:
+    def _parse_photos(self, data: Any) -> list[Media]:
         """
         Extract photo attachments from JSON
         :param data: post's JSON from Mastodon API
@@ -191,25 +224,20 @@ class Mastodon:
         if not media:
             return photos
 
+        size = (
+            self.utils.config["thumbnail_large"]
+            if len(media) == 1
+            else self.utils.config["thumbnail_small"]
+        )
         for elem in media:
             if elem["type"] != "image":
                 continue
-            metadata = elem["meta"].get("small")
-            thumb = elem["preview_url"]
-            if (
-                not metadata or (
-                    len(media) == 1 and
-                    max(metadata.get("width", 0),
-                        metadata.get("height", 0)) < self.utils.config["thumbnail_large"]
-                )
-                or (
-                    len(media) > 1 and
-                    max(metadata.get("width", 0),
-                        metadata.get("height", 0)) < self.utils.config["thumbnail_small"]
-                )
-            ):
-                metadata = elem["meta"].get("original")
-                thumb = elem["url"]
+            # Use the preview if it's big enough for the thumbnail, otherwise the original image
+            variants = []
+            for name, url in (("small", elem["preview_url"]), ("original", elem["url"])):
+                meta = elem["meta"].get(name) or {}
+                variants.append((meta.get("width", 0), meta.get("height", 0), (meta, url)))
+            metadata, thumb = pick_variant(variants, size)
             photo = Media(
                 width=metadata.get("width", 0),
                 height=metadata.get("height", 0),
@@ -220,7 +248,7 @@ class Mastodon:
             photos.append(photo)
         return photos
 
-    async def _parse_link(self, data: Any) -> Link | None:
+    def _parse_link(self, data: Any) -> Link | None:
         """
         Extract link data from JSON
         :param data: post's JSON from Mastodon API
@@ -235,7 +263,7 @@ class Mastodon:
             )
         return None
 
-    async def _parse_poll(self, data: Any) -> Poll | None:
+    def _parse_poll(self, data: Any) -> Poll | None:
         """
         Extract poll data from JSON
         :param data: post's JSON from Mastodon API
@@ -255,9 +283,9 @@ class Mastodon:
                 ),
             )
             choices.append(choice)
-        expires_at = await self.utils.parse_date(poll_raw["expires_at"])
+        expires_at = self.utils.parse_date(poll_raw["expires_at"])
         if not poll_raw["expired"]:
-            status = await self.utils.get_poll_status(expires_at)
+            status = self.utils.get_poll_status(expires_at)
         else:
             status = "Final results"
         poll = Poll(
@@ -268,35 +296,70 @@ class Mastodon:
         )
         return poll
 
-    async def _replace_emoji_codes(self, emojis: list[Any], text: str) -> str:
+    async def _upload_emojis(
+            self,
+            instance: str,
+            emojis: list[Any]
+    ) -> dict[tuple[str, str], str]:
+        """
+        Upload custom emojis to Matrix server concurrently, each unique emoji only once
+        :param instance: instance the post comes from
+        :param emojis: list of objects with emoji data
+        :return: dictionary with (shortcode, url) keys and uploaded emoji mxc URLs
+        """
+        keys = list({(emoji["shortcode"], emoji["url"]) for emoji in emojis})
+        results = await asyncio.gather(
+            *(self._upload_emoji(instance, shortcode, url) for shortcode, url in keys)
+        )
+        return {key: mxc for key, mxc in zip(keys, results) if mxc}
+
+    async def _upload_emoji(self, instance: str, shortcode: str, url: str) -> str:
+        """
+        Upload custom emoji to Matrix server unless it has been uploaded before
+        :param instance: instance the emoji comes from
+        :param shortcode: emoji shortcode
+        :param url: URL of the emoji image
+        :return: MXC URL address to the emoji or empty string
+        """
+        image_mxc = await self.utils.media_cache.get_emoji(instance, shortcode, url)
+        if image_mxc:
+            return image_mxc
+        image = await self.utils.download_image(url)
+        if not image:
+            return ""
+        mime = mimetypes.guess_type(url)[0]
+        if not mime:
+            return ""
+        extension = mimetypes.guess_extension(mime)
+        image_mxc = await self.utils.upload_media(image, mime, f"emoji{extension}")
+        if image_mxc:
+            await self.utils.media_cache.put_emoji(instance, shortcode, url, image_mxc)
+        return image_mxc
+
+    def _replace_emoji_codes(
+            self,
+            emojis: list[Any],
+            text: str,
+            emoji_mxc: dict[tuple[str, str], str]
+    ) -> str:
         """
         Replace emoji shortcodes with emoji images
         :param emojis: list of objects with emoji data
         :param text: text that contains emoji shortcodes
+        :param emoji_mxc: dictionary with (shortcode, url) keys and uploaded emoji mxc URLs
         :return: text with emoji shortcodes replaced with emoji images
         """
         for emoji in emojis:
-            image = await self.utils.download_image(emoji["url"])
-            if not image:
-                continue
-            mime = mimetypes.guess_type(emoji["url"])
-            if not mime:
-                continue
-            mime = mime[0]
-            extension = mimetypes.guess_extension(mime)
-            image_mxc = await self.utils.upload_media(image, mime, f"emoji{extension}")
+            image_mxc = emoji_mxc.get((emoji["shortcode"], emoji["url"]))
             if not image_mxc:
                 continue
             text = text.replace(
                 f":{emoji["shortcode"]}:",
                 f"<img src=\"{image_mxc}\" alt=\":{emoji["shortcode"]}:\" height=\"24\" />"
             )
-            # To prevent running into ratelimit
-            await asyncio.sleep(0.2)
-
         return text
 
-    async def _get_child_quote_info(self, quote: Any) -> BlogPost | None:
+    def _get_child_quote_info(self, quote: Any) -> BlogPost | None:
         """
         Return an information about quote inside quote
         :param quote:  JSON data of a quote
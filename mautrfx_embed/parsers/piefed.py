@@ -12,6 +12,14 @@ class Piefed:
         self.utils = utils
 
     async def parse_preview(self, data: Any) -> ForumPost:
+        """
+        Parse JSON data from Piefed API
+        :param data: JSON data
+        :return: ForumPost object
+        """
+        return await self.loop.run_in_executor(None, self._parse_piefed_preview, data)
+
+    def _parse_piefed_preview(self, data: Any) -> ForumPost:
         """
         Parse JSON data from Piefed API
         :param data: JSON data
@@ -23,37 +31,30 @@ class Piefed:
         # Comment
         if data.get("comment_view"):
             data = data["comment_view"]
-            title, lemmy_flairs = await self.utils.fedi_forum_parse_title(data["post"]["title"])
+            title, lemmy_flairs = self.utils.fedi_forum_parse_title(data["post"]["title"])
             # Flair logic explained below, in the Post branch
-            flairs = await self._get_flairs(data)
+            flairs = self._get_flairs(data)
             flairs = flairs if flairs else lemmy_flairs
+            body, truncated = self.utils.truncate_markdown(data["comment"].get("body"))
             return ForumPost(
-                text=await self.loop.run_in_executor(
-                    None,
-                    self.utils.fedi_forum_parse_text,
-                    data["comment"].get("body")
-                ),
-                text_md=await self.loop.run_in_executor(
-                    None,
-                    self.utils.fedi_forum_parse_markdown,
-                    data["comment"].get("body")
-                ),
+                text=self.utils.fedi_forum_parse_text(body),
+                text_md=self.utils.fedi_forum_parse_markdown(body),
                 flairs=[fl for fl in flairs if fl.lower() != "spoiler"],
                 sub=f"c/{data["community"]["name"]}",
                 sub_url=data["community"]["actor_id"],
                 title=title,
                 score=None,
                 upvote_ratio=0,
-                upvotes=await self.utils.parse_interaction(data["counts"]["upvotes"]),
-                downvotes=await self.utils.parse_interaction(data["counts"]["downvotes"]),
-                post_date=await self.utils.parse_date(data["comment"]["published"]),
+                upvotes=self.utils.parse_interaction(data["counts"]["upvotes"]),
+                downvotes=self.utils.parse_interaction(data["counts"]["downvotes"]),
+                post_date=self.utils.parse_date(data["comment"]["published"]),
                 nsfw=data["post"]["nsfw"],
                 spoiler="spoiler" in (fl.lower() for fl in flairs),
-                skip_content=await self.utils.config_item_contains(
+                skip_content=self.utils.config_item_contains(
                     flairs,
                     "fedi_excluded_comment_flairs"
                 ),
-                author=await self._parse_author(data["creator"], data["community"]),
+                author=self._parse_author(data["creator"], data["community"]),
                 author_url=data["creator"]["actor_id"],
                 # scrollToComments - Piefed doesn't need it, but useful if it's a Lemmy link in here
                 url=f"{data["comment"]["ap_id"]}?scrollToComments=true",
@@ -67,60 +68,55 @@ class Piefed:
                     data["community"]["actor_id"]
                 )}",
                 is_link=data["post"].get("post_type") == "Link",
-                is_comment=True
+                is_comment=True,
+                read_more_url=data["comment"]["ap_id"] if truncated else None
             )
 
         # Post
         data = data["post_view"]
-        title, lemmy_flairs = await self.utils.fedi_forum_parse_title(data["post"]["title"])
+        title, lemmy_flairs = self.utils.fedi_forum_parse_title(data["post"]["title"])
         # Piefed has its own implementation of flairs but can display Lemmy posts too
         # and those can have flairs as a part of the title. If Piefed-style flairs
         # exist, we use these. Otherwise, we check for flairs within the title
-        flairs = await self._get_flairs(data)
+        flairs = self._get_flairs(data)
         flairs = flairs if flairs else lemmy_flairs
+        body, truncated = self.utils.truncate_markdown(data["post"].get("body"))
         return ForumPost(
-            text=await self.loop.run_in_executor(
-                None,
-                self.utils.fedi_forum_parse_text,
-                data["post"].get("body")
-            ),
-            text_md=await self.loop.run_in_executor(
-                None,
-                self.utils.fedi_forum_parse_markdown,
-                data["post"].get("body")
-            ),
+            text=self.utils.fedi_forum_parse_text(body),
+            text_md=self.utils.fedi_forum_parse_markdown(body),
             flairs=[fl for fl in flairs if fl.lower() != "spoiler"],
             sub=f"c/{data["community"]["name"]}",
             sub_url=data["community"]["actor_id"],
             title=title,
             score=None,
             upvote_ratio=0,
-            upvotes=await self.utils.parse_interaction(data["counts"]["upvotes"]),
-            downvotes=await self.utils.parse_interaction(data["counts"]["downvotes"]),
-            post_date=await self.utils.parse_date(data["post"]["published"]),
+            upvotes=self.utils.parse_interaction(data["counts"]["upvotes"]),
+            downvotes=self.utils.parse_interaction(data["counts"]["downvotes"]),
+            post_date=self.utils.parse_date(data["post"]["published"]),
             nsfw=data["post"]["nsfw"],
             spoiler="spoiler" in (fl.lower() for fl in flairs),
-            skip_content=await self.utils.config_item_contains(flairs, "fedi_excluded_flairs"),
-            author=await self._parse_author(data["creator"], data["community"]),
+            skip_content=self.utils.config_item_contains(flairs, "fedi_excluded_flairs"),
+            author=self._parse_author(data["creator"], data["community"]),
             author_url=data["creator"]["actor_id"],
             url=(
                 data["post"]["url"] if data["post"].get("url") is not None
                 else data["post"]["ap_id"]
             ),
             comments=data["counts"]["comments"],
-            photos=await self._parse_photos(data),
-            videos=await self._parse_videos(data),
-            poll=await self._parse_poll(data),
+            photos=self._parse_photos(data),
+            videos=self._parse_videos(data),
+            poll=self._parse_poll(data),
             qtype="piefed",
             name=f"🥧 {self.utils.INSTANCE_NAME.sub(
                 r"\g<base_url>",
                 data["community"]["actor_id"]
             )}",
             is_link=data["post"].get("post_type") == "Link",
-            is_comment=False
+            is_comment=False,
+            read_more_url=data["post"]["ap_id"] if truncated else None
         )
 
-    async def _parse_poll(self, data: Any) -> Poll | None:
+    def _parse_poll(self, data: Any) -> Poll | None:
         """
         Extract poll data from JSON
         :param data: post's JSON from Piefed API
@@ -141,10 +137,10 @@ class Piefed:
             )
             choices.append(choice)
 
-        expires_at = await self.utils.parse_date(poll_raw["end_poll"])
+        expires_at = self.utils.parse_date(poll_raw["end_poll"])
         now = int(time.time())
         if expires_at > now:
-            status = await self.utils.get_poll_status(expires_at)
+            status = self.utils.get_poll_status(expires_at)
         else:
             status = "Final results"
         poll = Poll(
@@ -155,7 +151,7 @@ class Piefed:
         )
         return poll
 
-    async def _get_flairs(self, data: Any) -> list[str]:
+    def _get_flairs(self, data: Any) -> list[str]:
         """
         Get a list of flairs (Piefed-style)
         :param data: JSON data from API
@@ -168,7 +164,7 @@ class Piefed:
         flairs = [flair["flair_title"] for flair in flair_list]
         return flairs
 
-    async def _parse_author(self, creator: Any, community: Any) -> str:
+    def _parse_author(self, creator: Any, community: Any) -> str:
         """
         Get post author's name
         :param creator: author section JSON data
@@ -180,7 +176,7 @@ class Piefed:
         base_url = "" if community_url == creator_url else f"@{creator_url}"
         return f"{creator["title"]}{base_url}"
 
-    async def _parse_photos(self, data: Any) -> list[Media]:
+    def _parse_photos(self, data: Any) -> list[Media]:
         """
         Extract images from JSON post data
         :param data: JSON post data
@@ -198,12 +194,12 @@ class Piefed:
             )
             photos.append(photo)
         else:
-            thumbnail = await self._parse_thumbnail(data)
+            thumbnail = self._parse_thumbnail(data)
             if thumbnail:
                 photos.append(thumbnail)
         return photos
 
-    async def _parse_thumbnail(self, data: Any) -> Media | None:
+    def _parse_thumbnail(self, data: Any) -> Media | None:
         """
         Extract thumbnail from JSON post data
         :param data: JSON post data
@@ -224,7 +220,7 @@ class Piefed:
             )
         return photo
 
-    async def _parse_videos(self, data: Any) -> list[Media]:
+    def _parse_videos(self, data: Any) -> list[Media]:
         """
         Extract video from JSON post data
         :param data: JSON post data
@@ -1,17 +1,28 @@
 import html
 import mimetypes
 import time
+from asyncio import AbstractEventLoop
 from typing import Any
 
 from ..resources.datastructures import ForumPost, Media, Poll, Choice
+from ..resources.media_variants import pick_variant
 from ..resources.utils import Utilities
 
 
 class Reddit:
-    def __init__(self, utils: Utilities):
+    def __init__(self, loop: AbstractEventLoop, utils: Utilities):
+        self.loop = loop
         self.utils = utils
 
     async def parse_preview(self, data: Any) -> ForumPost:
+        """
+        Parse JSON data from Reddit API
+        :param data: JSON data
+        :return: ForumPost object
+        """
+        return await self.loop.run_in_executor(None, self._parse_reddit_preview, data)
+
+    def _parse_reddit_preview(self, data: Any) -> ForumPost:
         """
         Parse JSON data from Reddit API
         :param data: JSON data
@@ -23,18 +34,19 @@ class Reddit:
         # Comment permalink
         if data["data"]["children"][0]["kind"] == "t1":
             data = data["data"]["children"][0]["data"]
-
+            text, text_truncated = self.utils.truncate_source(data.get("body_html", ""))
+            text_md, md_truncated = self.utils.truncate_markdown(data["body"])
             return ForumPost(
-                text=await self._parse_text(data.get("body_html", "")),
-                text_md=await self._parse_markdown(data["body"]),
+                text=self._parse_text(text, text_truncated),
+                text_md=self._parse_markdown(text_md),
                 flairs=[],
                 sub=data["subreddit_name_prefixed"],
                 sub_url=f"https://www.reddit.com/{data["subreddit_name_prefixed"]}",
                 title="Comment permalink",
-                score=await self.utils.parse_interaction(data["score"]),
+                score=self.utils.parse_interaction(data["score"]),
                 upvote_ratio=0,
-                upvotes=await self.utils.parse_interaction(data["ups"]),
-                downvotes=await self.utils.parse_interaction(data["downs"]),
+                upvotes=self.utils.parse_interaction(data["ups"]),
+                downvotes=self.utils.parse_interaction(data["downs"]),
                 post_date=int(data["created"]),
                 nsfw=False,
                 spoiler=False,
@@ -49,26 +61,32 @@ class Reddit:
                 qtype="reddit",
                 name="👽 Reddit",
                 is_link=False,
-                is_comment=True
+                is_comment=True,
+                read_more_url=(
+                    f"https://www.reddit.com{data["permalink"]}"
+                    if text_truncated or md_truncated else None
+                )
             )
 
         # Post
         data = data["data"]["children"][0]["data"]
+        text, text_truncated = self.utils.truncate_source(data.get("selftext_html", ""))
+        text_md, md_truncated = self.utils.truncate_markdown(data["selftext"])
         return ForumPost(
-            text=await self._parse_text(data.get("selftext_html", "")),
-            text_md=await self._parse_markdown(data["selftext"]),
+            text=self._parse_text(text, text_truncated),
+            text_md=self._parse_markdown(text_md),
             flairs=[data["link_flair_text"]] if data["link_flair_text"] else [],
             sub=data["subreddit_name_prefixed"],
             sub_url=f"https://www.reddit.com/{data["subreddit_name_prefixed"]}",
             title=data["title"],
-            score=await self.utils.parse_interaction(data["score"]),
+            score=self.utils.parse_interaction(data["score"]),
             upvote_ratio=int(data["upvote_ratio"] * 100),
-            upvotes=await self.utils.parse_interaction(data["ups"]),
-            downvotes=await self.utils.parse_interaction(data["downs"]),
+            upvotes=self.utils.parse_interaction(data["ups"]),
+            downvotes=self.utils.parse_interaction(data["downs"]),
             post_date=int(data["created"]),
             nsfw=data["over_18"],
             spoiler=data["spoiler"],
-            skip_content=await self.utils.config_item_contains(
+            skip_content=self.utils.config_item_contains(
                 [data["link_flair_text"]],
                 "reddit_excluded_flairs"
             ),
@@ -76,19 +94,24 @@ class Reddit:
             author_url=f"https://www.reddit.com/u/{data["author"]}",
             url=data["url"],
             comments=data["num_comments"],
-            photos=await self._parse_photos(data),
-            videos=await self._parse_videos(data),
-            poll=await self._parse_poll(data),
+            photos=self._parse_photos(data),
+            videos=self._parse_videos(data),
+            poll=self._parse_poll(data),
             qtype="reddit",
             name="👽 Reddit",
             is_link=data.get("post_hint") in ("link", "rich:video"),
-            is_comment=False
+            is_comment=False,
+            read_more_url=(
+                f"https://www.reddit.com{data["permalink"]}"
+                if text_truncated or md_truncated else None
+            )
         )
 
-    async def _parse_text(self, text: str) -> str:
+    def _parse_text(self, text: str, truncated: bool = False) -> str:
         """
         Remove needless HTML comments from the content of Reddit post, fix spoiler tag
         :param text: HTML content of a post
+        :param truncated: True if the content was cut and has to have its tags closed
         :return: HTML text
         """
         if not text:
@@ -100,9 +123,12 @@ class Reddit:
             "&lt;span class=\"md-spoiler-text\"&gt;",
             "&lt;span data-mx-spoiler&gt;"
         )
-        return html.unescape(text)
+        text = html.unescape(text)
+        if truncated:
+            text = self.utils.close_html_tags(text)
+        return text
 
-    async def _parse_markdown(self, text: str) -> str:
+    def _parse_markdown(self, text: str) -> str:
         """
         Fix spoiler tag in Markdown version of the post
         :param text: Markdown content of a post
@@ -112,7 +138,7 @@ class Reddit:
             return ""
         return text.replace("&gt;!", "||").replace("!&lt;", "||")
 
-    async def _parse_poll(self, data: Any) -> Poll | None:
+    def _parse_poll(self, data: Any) -> Poll | None:
         """
         Extract poll data from JSON
         :param data: post's JSON from Reddit API
@@ -138,7 +164,7 @@ class Reddit:
             choices.append(choice)
 
         if is_open:
-            status = await self.utils.get_poll_status(expires_at)
+            status = self.utils.get_poll_status(expires_at)
         else:
             status = "Final results"
         poll = Poll(
@@ -149,7 +175,7 @@ class Reddit:
         )
         return poll
 
-    async def _parse_photos(self, data: Any) -> list[Media]:
+    def _parse_photos(self, data: Any) -> list[Media]:
         """
         Extract images from Reddit post JSON data
         :param data: post JSON data
@@ -158,11 +184,11 @@ class Reddit:
         photos: list[Media] = []
         hint = data.get("post_hint")
         if hint == "image":
-            photo = await self._parse_preview(data, "thumbnail_large")
+            photo = self._parse_preview(data, "thumbnail_large")
             if photo:
                 photos.append(photo)
         elif hint in ("link", "rich:video"):
-            photo = await self._parse_preview(data, "thumbnail_small")
+            photo = self._parse_preview(data, "thumbnail_small")
             # Check if thumbnail_url exists because for this object
             # thumbnail cannot be generated based on the main URL
             if photo and photo.thumbnail_url:
@@ -176,70 +202,51 @@ class Reddit:
                 # Reddit returns incorrect mimetype for JPG images
                 mime = "image/jpeg" if mime == "image/jpg" else mime
                 ext = mimetypes.guess_extension(mime)
-                photo = None
                 # Choose the first thumbnail that fits user requirements
                 # (thumbnails in the list are sorted by size from the smallest to the largest)
-                for preview in image["p"]:
-                    if (
-                            preview["x"] > self.utils.config["thumbnail_small"]
-                            or preview["y"] > self.utils.config["thumbnail_small"]
-                    ):
-                        photo = Media(
-                            width=preview["x"],
-                            height=preview["y"],
-                            url=f"https://i.redd.it/{item["media_id"]}{ext}",
-                            thumbnail_url=preview["u"].replace("&amp;", "&"),
-                            filetype="p"
-                        )
-                        break
-                # If all thumbnails are smaller than requested, choose the biggest one
-                if not photo:
-                    photo = Media(
-                        width=image["p"][-1]["x"],
-                        height=image["p"][-1]["y"],
-                        url=f"https://i.redd.it/{item["media_id"]}{ext}",
-                        thumbnail_url=image["p"][-1]["u"].replace("&amp;", "&"),
-                        filetype="p"
-                    )
+                preview = pick_variant(
+                    [(res["x"], res["y"], res) for res in image["p"]],
+                    self.utils.config["thumbnail_small"]
+                )
+                if not preview:
+                    continue
+                photo = Media(
+                    width=preview["x"],
+                    height=preview["y"],
+                    url=f"https://i.redd.it/{item["media_id"]}{ext}",
+                    thumbnail_url=preview["u"].replace("&amp;", "&"),
+                    filetype="p"
+                )
                 photos.append(photo)
         return photos
 
-    async def _parse_preview(self, data: Any, size_type: str) -> Media | None:
+    def _parse_preview(self, data: Any, size_type: str) -> Media | None:
         """
         Extract single preview image from Reddit post JSON data
         :param data: post JSON data
         :param size_type: 'thumbnail_large' or 'thumbnail_small'
         :return: preview image closest to choosen size
         """
-        photo = None
         if not data.get("preview"):
             return None
         previews = data["preview"]["images"][0]["resolutions"]
-        for preview in previews:
-            if (
-                    preview["width"] > self.utils.config[size_type]
-                    or preview["height"] > self.utils.config[size_type]
-            ):
-                photo = Media(
-                    width=preview["width"],
-                    height=preview["height"],
-                    url=data["url"],
-                    thumbnail_url=preview["url"].replace("&amp;", "&"),
-                    filetype="p"
-                )
-                break
-        # If all thumbnails are smaller than requested, choose the biggest one
-        if not photo:
-            photo = Media(
-                width=previews[-1]["width"],
-                height=previews[-1]["height"],
-                url=data["url"],
-                thumbnail_url=previews[-1]["url"].replace("&amp;", "&"),
-                filetype="p"
-            )
-        return photo
+        # Choose the first thumbnail that fits user requirements
+        # (thumbnails in the list are sorted by size from the smallest to the largest)
+        preview = pick_variant(
+            [(res["width"], res["height"], res) for res in previews],
+            self.utils.config[size_type]
+        )
+        if not preview:
+            return None
+        return Media(
+            width=preview["width"],
+            height=preview["height"],
+            url=data["url"],
+            thumbnail_url=preview["url"].replace("&amp;", "&"),
+            filetype="p"
+        )
 
-    async def _parse_videos(self, data: Any) -> list[Media]:
+    def _parse_videos(self, data: Any) -> list[Media]:
         """
         Extract video from reddit post JSON data
         :param data: post JSON data
@@ -248,7 +255,7 @@ class Reddit:
         videos: list[Media] = []
         if not data["is_video"]:
             return videos
-        video = await self._parse_preview(data, "thumbnail_large")
+        video = self._parse_preview(data, "thumbnail_large")
         if video:
             video.url = self.utils.config["player"] + data["media"]["reddit_video"]["hls_url"]
             video.filetype = "v"
@@ -1,14 +1,25 @@
+from asyncio import AbstractEventLoop
 from typing import Any
 
 from ..resources.datastructures import BlogPost, Media, Facet, Poll, Choice
+from ..resources.media_variants import get_twimg_url
 from ..resources.utils import Utilities
 
 
 class Twitter:
-    def __init__(self, utils: Utilities):
+    def __init__(self, loop: AbstractEventLoop, utils: Utilities):
+        self.loop = loop
         self.utils = utils
 
     async def parse_preview(self, data: Any) -> BlogPost:
+        """
+        Parse JSON data from FxTwitter API
+        :param data: JSON data
+        :return: BlogPost object
+        """
+        return await self.loop.run_in_executor(None, self._parse_twitter_preview, data)
+
+    def _parse_twitter_preview(self, data: Any) -> BlogPost:
         """
         Parse JSON data from FxTwitter API
         :param data: JSON data
@@ -18,18 +29,18 @@ class Twitter:
             raise ValueError("Bad response")
 
         data = data["tweet"]
-        videos, photos = await self._parse_media(data)
+        videos, photos = self._parse_media(data)
         translation = data.get("translation")
         return BlogPost(
             text=data["raw_text"]["text"],
             url=None,
             text_md=None,
-            replies=await self.utils.parse_interaction(data["replies"]),
-            reposts=await self.utils.parse_interaction(data["retweets"]),
-            likes=await self.utils.parse_interaction(data["likes"]),
-            views=await self.utils.parse_interaction(data["views"]),
+            replies=self.utils.parse_interaction(data["replies"]),
+            reposts=self.utils.parse_interaction(data["retweets"]),
+            likes=self.utils.parse_interaction(data["likes"]),
+            views=self.utils.parse_interaction(data["views"]),
             quotes=None,
-            community_note=await self._parse_community_note(data),
+            community_note=self._parse_community_note(data),
             author_name=data["author"]["name"],
             author_name_md=data["author"]["name"],
             author_screen_name=data["author"]["screen_name"],
@@ -37,10 +48,10 @@ class Twitter:
             post_date=data["created_timestamp"],
             photos=photos,
             videos=videos,
-            facets=await self._parse_facets(data),
-            poll=await self._parse_poll(data),
+            facets=self._parse_facets(data),
+            poll=self._parse_poll(data),
             link=None,
-            quote=await self.parse_quote(data),
+            quote=self.parse_quote(data),
             translation=translation["text"] if translation is not None else None,
             translation_lang=translation.get("source_lang_en") if translation is not None else None,
             qtype="twitter",
@@ -49,7 +60,7 @@ class Twitter:
             spoiler_text=None
         )
 
-    async def parse_quote(self, data: Any) -> BlogPost | None:
+    def parse_quote(self, data: Any) -> BlogPost | None:
         """
         Parse JSON quote data from FxTwitter API
         :param data: JSON data of a quote
@@ -58,7 +69,7 @@ class Twitter:
         quote = data.get("quote")
         if not quote:
             return None
-        q_videos, q_photos = await self._parse_media(quote)
+        q_videos, q_photos = self._parse_media(quote)
         return BlogPost(
                 text=quote["raw_text"]["text"],
                 url=quote["url"],
@@ -76,10 +87,10 @@ class Twitter:
                 post_date=None,
                 photos=q_photos,
                 videos=q_videos,
-                facets=await self._parse_facets(quote),
-                poll=await self._parse_poll(quote),
+                facets=self._parse_facets(quote),
+                poll=self._parse_poll(quote),
                 link=None,
-                quote=await self._get_child_quote_info(quote.get("quote")),
+                quote=self._get_child_quote_info(quote.get("quote")),
                 translation=None,
                 translation_lang=None,
                 qtype="twitter",
@@ -88,7 +99,7 @@ class Twitter:
                 spoiler_text=None
             )
 
-    async def _parse_community_note(self, data: Any) -> str:
+    def _parse_community_note(self, data: Any) -> str:
         """
         Extract community note from JSON
         :param data: post's JSON data
@@ -99,7 +110,7 @@ class Twitter:
             return community_note["text"]
         return ""
 
-    async def _parse_media(self, data: Any) -> tuple[list, list]:
+    def _parse_media(self, data: Any) -> tuple[list, list]:
         """
         Extract media attachments from JSON data
         :param data: post's JSON data
@@ -109,13 +120,19 @@ class Twitter:
         photos: list[Media] = []
         videos: list[Media] = []
         if media is not None:
+            # Request the smallest rendition from Twitter's CDN that is still big enough
+            size = (
+                self.utils.config["thumbnail_large"]
+                if len(media["all"]) == 1
+                else self.utils.config["thumbnail_small"]
+            )
             for elem in media["all"]:
                 if elem["type"] in ["video", "gif"]:
                     video = Media(
                         width=elem["width"],
                         height=elem["height"],
                         url=elem["url"],
-                        thumbnail_url=elem["thumbnail_url"],
+                        thumbnail_url=get_twimg_url(elem.get("thumbnail_url"), size),
                         filetype="v"
                     )
                     videos.append(video)
@@ -124,13 +141,13 @@ class Twitter:
                         width=elem["width"],
                         height=elem["height"],
                         url=elem["url"],
-                        thumbnail_url=None,
+                        thumbnail_url=get_twimg_url(elem["url"], size),
                         filetype="p"
                     )
                     photos.append(photo)
         return videos, photos
 
-    async def _parse_poll(self, data: Any) -> Poll | None:
+    def _parse_poll(self, data: Any) -> Poll | None:
         """
         Extract poll data from JSON
         :param data: post's JSON data
@@ -155,7 +172,7 @@ class Twitter:
         )
         return poll
 
-    async def _parse_facets(self, data: Any) -> list[Facet]:
+    def _parse_facets(self, data: Any) -> list[Facet]:
         """
         Extract facets from JSON data
         :param data: post's JSON data
@@ -166,36 +183,36 @@ class Twitter:
         if facets_raw is not None:
             for fac in facets_raw:
                 facet = None
-                b_start = fac["indices"][0]
-                b_end = fac["indices"][1]
+                start = fac["indices"][0]
+                end = fac["indices"][1]
                 if fac["type"] in "url":
                     facet = Facet(
                         text=fac["display"],
                         url=fac["replacement"],
-                        byte_start=b_start,
-                        byte_end=b_end,
+                        start=start,
+                        end=end,
                     )
                 elif fac["type"] == "mention":
                     facet = Facet(
                         text="@" + fac["original"],
                         url="https://x.com/" + fac["original"],
-                        byte_start=b_start,
-                        byte_end=b_end,
+                        start=start,
+                        end=end,
                     )
                 elif fac["type"] == "hashtag":
                     facet = Facet(
                         text="#" + fac["original"],
                         url="https://x.com/hashtag/" + fac["original"],
-                        byte_start=b_start,
-                        byte_end=b_end,
+                        start=start,
+                        end=end,
                     )
                 # Ignore 'media' type because API returns wrong indices in them
                 if facet:
                     facets.append(facet)
-            facets.sort(key=lambda f: f.byte_start)
+            facets.sort(key=lambda f: f.start)
         return facets
 
-    async def _get_child_quote_info(self, quote: Any) -> BlogPost | None:
+    def _get_child_quote_info(self, quote: Any) -> BlogPost | None:
         """
         Return an information about quote inside quote
         :param quote:  JSON data of a quote
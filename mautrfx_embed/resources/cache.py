@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+
+class TTLCache:
+    """
+    Bounded in-memory cache with expiration time and least recently used eviction.
+    Concurrent requests for the same key are coalesced into a single fetch.
+    """
+
+    def __init__(self, ttl: int, max_entries: int, max_bytes: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        # key: (expiration time, size in bytes, value)
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Get cache statistics
+        :return: dictionary with cache counters
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._entries),
+            "bytes": self.size,
+        }
+
+    def get(self, key: str) -> Any:
+        """
+        Get value from the cache
+        :param key: cache key
+        :return: cached value or None if it's missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def put(self, key: str, value: Any, size: int, ttl: int | None = None) -> None:
+        """
+        Put value into the cache, evicting the least recently used entries if necessary
+        :param key: cache key
+        :param value: value to store
+        :param size: size of the value in bytes
+        :param ttl: expiration time of this entry in seconds, default TTL of the cache if not set
+        :return:
+        """
+        if ttl is None:
+            ttl = self.ttl
+        if ttl <= 0 or self.max_entries <= 0 or size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self.size += size
+        self._evict()
+
+    def resize(self, ttl: int, max_entries: int, max_bytes: int) -> None:
+        """
+        Change limits of the cache, evicting the least recently used entries if necessary.
+        Entries that are already cached keep their expiration time.
+        :param ttl: default expiration time of new entries in seconds
+        :param max_entries: max number of entries
+        :param max_bytes: max total size of entries in bytes
+        :return:
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._evict()
+
+    async def get_or_fetch(
+            self,
+            key: str,
+            fetch: Callable[[], Awaitable[tuple[Any, int]]]
+    ) -> Any:
+        """
+        Get value from the cache or fetch it if it's missing. If the same key is already being
+        fetched, wait for the result of that request instead of starting a new one.
+        :param key: cache key
+        :param fetch: coroutine function that returns a tuple with value and its size in bytes
+        :return: cached or fetched value, empty values are not cached
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._fetch(key, fetch))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+        # Shield the shared request so that cancelling one waiter doesn't cancel it for all
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[tuple[Any, int]]]) -> Any:
+        """
+        Fetch value and store it in the cache
+        :param key: cache key
+        :param fetch: coroutine function that returns a tuple with value and its size in bytes
+        :return: fetched value
+        """
+        try:
+            value, size = await fetch()
+            if value:
+                self.put(key, value, size)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def _evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache fits in its limits
+        :return:
+        """
+        while self._entries and (
+                len(self._entries) > self.max_entries or self.size > self.max_bytes
+        ):
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        """
+        Remove entry from the cache
+        :param key: cache key
+        :return:
+        """
+        entry = self._entries.pop(key)
+        self.size -= entry[1]
@@ -15,8 +15,8 @@ class Media:
 class Facet:
     text: str
     url: str
-    byte_start: int
-    byte_end: int
+    start: int
+    end: int
 
 
 @dataclass
@@ -98,3 +98,4 @@ class ForumPost:
     name: str
     is_link: bool
     is_comment: bool
+    read_more_url: str | None = None
@@ -0,0 +1,167 @@
+import time
+
+from mautrix.util.async_db import Connection, Database, UpgradeTable
+
+upgrade_table = UpgradeTable()
+
+
+@upgrade_table.register(description="Add thumbnail cache")
+async def upgrade_v1(conn: Connection) -> None:
+    await conn.execute(
+        """CREATE TABLE thumbnail_cache (
+            url       TEXT    NOT NULL,
+            size      INTEGER NOT NULL,
+            variant   TEXT    NOT NULL,
+            mxc       TEXT    NOT NULL,
+            width     INTEGER NOT NULL,
+            height    INTEGER NOT NULL,
+            created   BIGINT  NOT NULL,
+            last_used BIGINT  NOT NULL,
+            PRIMARY KEY (url, size, variant)
+        )"""
+    )
+    await conn.execute(
+        "CREATE INDEX thumbnail_cache_last_used_idx ON thumbnail_cache (last_used)"
+    )
+
+
+@upgrade_table.register(description="Add custom emoji cache")
+async def upgrade_v2(conn: Connection) -> None:
+    await conn.execute(
+        """CREATE TABLE emoji_cache (
+            instance  TEXT   NOT NULL,
+            shortcode TEXT   NOT NULL,
+            url       TEXT   NOT NULL,
+            mxc       TEXT   NOT NULL,
+            created   BIGINT NOT NULL,
+            last_used BIGINT NOT NULL,
+            PRIMARY KEY (instance, shortcode, url)
+        )"""
+    )
+    await conn.execute(
+        "CREATE INDEX emoji_cache_last_used_idx ON emoji_cache (last_used)"
+    )
+
+
+class MediaCache:
+    """
+    Persistent cache of media uploaded to the Matrix server, stored in the plugin database
+    """
+
+    def __init__(self, db: Database, ttl: int, max_entries: int) -> None:
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    async def get_thumbnail(self, url: str, size: int, variant: str) -> tuple[str, int, int] | None:
+        """
+        Get previously uploaded thumbnail
+        :param url: URL of the source image
+        :param size: max size of the thumbnail
+        :param variant: name of the variant of the thumbnail (blur, overlay)
+        :return: a tuple with matrix mxc URL, width, and height of the thumbnail or None
+        """
+        if self.max_entries <= 0:
+            return None
+        row = await self.db.fetchrow(
+            "SELECT mxc, width, height, created FROM thumbnail_cache "
+            "WHERE url=$1 AND size=$2 AND variant=$3",
+            url, size, variant
+        )
+        now = int(time.time())
+        if not row or row["created"] < now - self.ttl:
+            return None
+        await self.db.execute(
+            "UPDATE thumbnail_cache SET last_used=$4 WHERE url=$1 AND size=$2 AND variant=$3",
+            url, size, variant, now
+        )
+        return row["mxc"], row["width"], row["height"]
+
+    async def put_thumbnail(
+            self,
+            url: str,
+            size: int,
+            variant: str,
+            thumbnail: tuple[str, int, int]
+    ) -> None:
+        """
+        Store uploaded thumbnail and evict expired and least recently used entries
+        :param url: URL of the source image
+        :param size: max size of the thumbnail
+        :param variant: name of the variant of the thumbnail (blur, overlay)
+        :param thumbnail: a tuple with matrix mxc URL, width, and height of the thumbnail
+        :return:
+        """
+        if self.max_entries <= 0:
+            return
+        now = int(time.time())
+        await self.db.execute(
+            "INSERT INTO thumbnail_cache "
+            "(url, size, variant, mxc, width, height, created, last_used) "
+            "VALUES ($1, $2, $3, $4, $5, $6, $7, $7) "
+            "ON CONFLICT (url, size, variant) DO UPDATE SET mxc=excluded.mxc, "
+            "width=excluded.width, height=excluded.height, "
+            "created=excluded.created, last_used=excluded.last_used",
+            url, size, variant, *thumbnail, now
+        )
+        await self._evict("thumbnail_cache", now)
+
+    async def get_emoji(self, instance: str, shortcode: str, url: str) -> str:
+        """
+        Get previously uploaded custom emoji
+        :param instance: instance the emoji comes from
+        :param shortcode: emoji shortcode
+        :param url: URL of the emoji image
+        :return: matrix mxc URL of the emoji or empty string
+        """
+        if self.max_entries <= 0:
+            return ""
+        row = await self.db.fetchrow(
+            "SELECT mxc, created FROM emoji_cache "
+            "WHERE instance=$1 AND shortcode=$2 AND url=$3",
+            instance, shortcode, url
+        )
+        now = int(time.time())
+        if not row or row["created"] < now - self.ttl:
+            return ""
+        await self.db.execute(
+            "UPDATE emoji_cache SET last_used=$4 WHERE instance=$1 AND shortcode=$2 AND url=$3",
+            instance, shortcode, url, now
+        )
+        return row["mxc"]
+
+    async def put_emoji(self, instance: str, shortcode: str, url: str, mxc: str) -> None:
+        """
+        Store uploaded custom emoji and evict expired and least recently used entries
+        :param instance: instance the emoji comes from
+        :param shortcode: emoji shortcode
+        :param url: URL of the emoji image
+        :param mxc: matrix mxc URL of the emoji
+        :return:
+        """
+        if self.max_entries <= 0:
+            return
+        now = int(time.time())
+        await self.db.execute(
+            "INSERT INTO emoji_cache (instance, shortcode, url, mxc, created, last_used) "
+            "VALUES ($1, $2, $3, $4, $5, $5) "
+            "ON CONFLICT (instance, shortcode, url) DO UPDATE SET mxc=excluded.mxc, "
+            "created=excluded.created, last_used=excluded.last_used",
+            instance, shortcode, url, mxc, now
+        )
+        await self._evict("emoji_cache", now)
+
+    async def _evict(self, table: str, now: int) -> None:
+        """
+        Remove expired entries and entries over the size cap from a cache table
+        :param table: name of the cache table
+        :param now: current time in seconds since Epoch
+        :return:
+        """
+        await self.db.execute(f"DELETE FROM {table} WHERE created < $1", now - self.ttl)
+        await self.db.execute(
+            f"DELETE FROM {table} WHERE last_used < ("
+            f"SELECT last_used FROM {table} ORDER BY last_used DESC LIMIT 1 OFFSET $1"
+            f")",
+            self.max_entries - 1
+        )
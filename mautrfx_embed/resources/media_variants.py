@@ -0,0 +1,52 @@
+import re
+from typing import TypeVar
+
+T = TypeVar("T")
+
+TWIMG_URL = re.compile(
+    r"^(?P<path>https://pbs\.twimg\.com/(?:media|ext_tw_video_thumb|amplify_video_thumb)/[^?]+?)"
+    r"(?:\.(?P<ext>jpg|jpeg|png|webp))?(?:\?(?P<query>.*))?$"
+)
+# Named renditions served by Twitter's CDN with their max width and height
+TWIMG_SIZES = [
+    ("small", 680),
+    ("medium", 1200),
+    ("large", 2048),
+]
+
+
+def pick_variant(variants: list[tuple[int, int, T]], size: int) -> T | None:
+    """
+    Choose the smallest rendition of an image that is still big enough for a thumbnail
+    :param variants: list of tuples with width, height, and any data identifying the rendition
+    (e.g. URL), sorted by size from the smallest to the largest
+    :param size: max width and height of the thumbnail
+    :return: data of the chosen rendition, the largest one if all of them are smaller than
+    requested, None if the list is empty
+    """
+    for width, height, variant in variants:
+        if max(width, height) >= size:
+            return variant
+    return variants[-1][2] if variants else None
+
+
+def get_twimg_url(url: str | None, size: int) -> str | None:
+    """
+    Rewrite Twitter's CDN image URL to the smallest named rendition big enough for a thumbnail
+    :param url: URL of an image hosted on pbs.twimg.com
+    :param size: max width and height of the thumbnail
+    :return: URL of the rendition or unchanged URL if it's not a Twitter's CDN image
+    (including a missing URL)
+    """
+    if not url or not isinstance(url, str):
+        return url
+    match = TWIMG_URL.match(url)
+    if not match:
+        return url
+    ext = match.group("ext")
+    if not ext:
+        query = match.group("query") or ""
+        formats = re.findall(r"(?:^|&)format=(\w+)", query)
+        ext = formats[0] if formats else "jpg"
+    name = pick_variant([(limit, limit, name) for name, limit in TWIMG_SIZES], size)
+    return f"{match.group("path")}?format={ext}&name={name}"
@@ -0,0 +1,45 @@
+import threading
+
+
+class Timings:
+    """
+    Thread-safe running totals of durations and data sizes of repeated operations,
+    grouped by name (e.g. image format)
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # name: [count, total seconds, total bytes]
+        self._totals: dict[str, list] = {}
+
+    @property
+    def stats(self) -> dict[str, dict[str, float]]:
+        """
+        Get collected statistics
+        :return: dictionary with number of calls, total and average time in milliseconds,
+        and average size in bytes for each name
+        """
+        with self._lock:
+            return {
+                name: {
+                    "count": count,
+                    "total_ms": seconds * 1000,
+                    "avg_ms": seconds * 1000 / count,
+                    "avg_bytes": size / count,
+                }
+                for name, (count, seconds, size) in self._totals.items()
+            }
+
+    def add(self, name: str, seconds: float, size: int = 0) -> None:
+        """
+        Record a single operation
+        :param name: name of the group
+        :param seconds: duration of the operation
+        :param size: size of the processed data in bytes
+        :return:
+        """
+        with self._lock:
+            totals = self._totals.setdefault(name, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += size
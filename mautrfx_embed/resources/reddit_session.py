@@ -0,0 +1,98 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from http.cookies import Morsel
+
+from aiohttp import ClientTimeout, ClientError
+from maubot import Plugin
+
+
+class RedditSession:
+    """
+    Reddit session cookies shared by all Reddit API requests. Cookies are fetched from
+    old.reddit.com once and reused until they expire or Reddit rejects them.
+    """
+
+    def __init__(self, bot: Plugin, headers: dict[str, str], ttl: int) -> None:
+        self.bot = bot
+        self.headers = headers
+        self.ttl = ttl
+        self._cookie = ""
+        self._expires = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get_cookie(self) -> str:
+        """
+        Get cookie for reddit JSON API request. New cookies are fetched only if there are no valid
+        ones, concurrent callers wait for the same refresh.
+        :return: reddit session cookie
+        """
+        if self._is_valid():
+            return self._cookie
+        async with self._lock:
+            if not self._is_valid():
+                self._cookie, self._expires = await self._fetch_cookie()
+            return self._cookie
+
+    def invalidate(self, cookie: str) -> None:
+        """
+        Mark cookie as rejected by Reddit, so it's refreshed with the next request
+        :param cookie: cookie that was used in the rejected request
+        :return:
+        """
+        # Don't drop cookies that were already refreshed by another request
+        if cookie == self._cookie:
+            self._cookie = ""
+            self._expires = 0.0
+
+    def _is_valid(self) -> bool:
+        """
+        Check if there's a cookie that hasn't expired yet
+        :return: True if cookie can be used, False otherwise
+        """
+        return bool(self._cookie) and self._expires > time.time()
+
+    async def _fetch_cookie(self) -> tuple[str, float]:
+        """
+        Get new session cookie from old.reddit.com
+        :return: tuple with reddit session cookie and its expiration time
+        """
+        timeout = ClientTimeout(total=20)
+        try:
+            response = await self.bot.http.get(
+                "https://old.reddit.com",
+                headers=self.headers,
+                timeout=timeout,
+                raise_for_status=True
+            )
+            loid = response.cookies["loid"]
+            session_tracker = response.cookies["session_tracker"]
+        except ClientError as e:
+            self.bot.log.error(f"Connection failed: {e}")
+            return "", 0.0
+        except KeyError as e:
+            self.bot.log.error(f"Failed to obtain necessary keys: {e}")
+            return "", 0.0
+        now = time.time()
+        expires = min(
+            now + self.ttl,
+            self._get_expiration(loid, now),
+            self._get_expiration(session_tracker, now)
+        )
+        return f"loid={loid.value}; session_tracker={session_tracker.value}", expires
+
+    def _get_expiration(self, morsel: Morsel, now: float) -> float:
+        """
+        Get expiration time of a cookie
+        :param morsel: cookie
+        :param now: current time in seconds since Epoch
+        :return: expiration time in seconds since Epoch, infinity if cookie doesn't expire
+        """
+        try:
+            if morsel["max-age"]:
+                return now + int(morsel["max-age"])
+            if morsel["expires"]:
+                return parsedate_to_datetime(morsel["expires"]).timestamp()
+        except (ValueError, TypeError):
+            pass
+        return float("inf")
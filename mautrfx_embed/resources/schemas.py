@@ -0,0 +1,495 @@
+from typing import Any, ClassVar
+
+import msgspec
+from msgspec import UNSET, field
+
+
+class Schema(msgspec.Struct, gc=False):
+    """
+    Typed view of an API response that keeps only the fields read by the parsers.
+    Fields are read like keys of the dictionary they're decoded from, so the same parser code
+    handles both the structs and plain JSON. Fields missing from the response raise KeyError,
+    as well as keys the schema doesn't declare.
+    """
+    # JSON keys mapped to attribute names, set for every schema below
+    _keys: ClassVar[dict[str, str]]
+
+    def __getitem__(self, key: str) -> Any:
+        value = getattr(self, self._keys[key])
+        if value is UNSET:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, self._keys[key])
+        return default if value is UNSET else value
+
+
+# FxTwitter: api.fxtwitter.com/<user>/status/<id>
+class TwitterFacet(Schema):
+    type: str = UNSET
+    indices: list[int] = UNSET
+    original: str | None = UNSET
+    replacement: str | None = UNSET
+    display: str | None = UNSET
+
+
+class TwitterText(Schema):
+    text: str = UNSET
+    facets: list[TwitterFacet] | None = UNSET
+
+
+class TwitterAuthor(Schema):
+    name: str = UNSET
+    screen_name: str = UNSET
+    url: str = UNSET
+
+
+class TwitterMedia(Schema):
+    type: str = UNSET
+    url: str = UNSET
+    width: int = UNSET
+    height: int = UNSET
+    thumbnail_url: str | None = UNSET
+
+
+class TwitterMediaList(Schema):
+    all: list[TwitterMedia] = UNSET
+
+
+class TwitterChoice(Schema):
+    label: str = UNSET
+    count: int = UNSET
+    percentage: int | float = UNSET
+
+
+class TwitterPoll(Schema):
+    choices: list[TwitterChoice] = UNSET
+    ends_at: str | None = UNSET
+    time_left_en: str | None = UNSET
+    total_votes: int = UNSET
+
+
+class TwitterNote(Schema):
+    text: str = UNSET
+
+
+class TwitterTranslation(Schema):
+    text: str = UNSET
+    source_lang_en: str | None = UNSET
+
+
+class Tweet(Schema):
+    url: str = UNSET
+    raw_text: TwitterText = UNSET
+    author: TwitterAuthor = UNSET
+    replies: int | None = UNSET
+    retweets: int | None = UNSET
+    likes: int | None = UNSET
+    views: int | None = UNSET
+    created_timestamp: int = UNSET
+    possibly_sensitive: bool | None = UNSET
+    community_note: TwitterNote | None = UNSET
+    media: TwitterMediaList | None = UNSET
+    poll: TwitterPoll | None = UNSET
+    translation: TwitterTranslation | None = UNSET
+    quote: "Tweet | None" = UNSET
+
+
+class TwitterResponse(Schema):
+    code: int = UNSET
+    tweet: Tweet = UNSET
+
+
+# Bluesky: app.bsky.feed.getPostThread
+class BskyFeature(Schema):
+    type: str = field(name="$type", default=UNSET)
+    did: str = UNSET
+    tag: str = UNSET
+    uri: str = UNSET
+
+
+class BskyIndex(Schema):
+    byteStart: int = UNSET
+    byteEnd: int = UNSET
+
+
+class BskyFacet(Schema):
+    index: BskyIndex = UNSET
+    features: list[BskyFeature] = UNSET
+
+
+class BskyRecord(Schema):
+    text: str = UNSET
+    createdAt: str = UNSET
+    facets: list[BskyFacet] | None = UNSET
+
+
+class BskyAuthor(Schema):
+    handle: str = UNSET
+    displayName: str | None = UNSET
+
+
+class BskyLabel(Schema):
+    val: str = UNSET
+
+
+class BskyAspectRatio(Schema):
+    width: int = UNSET
+    height: int = UNSET
+
+
+class BskyImage(Schema):
+    thumb: str = UNSET
+    fullsize: str = UNSET
+    aspectRatio: BskyAspectRatio | None = UNSET
+
+
+class BskyExternal(Schema):
+    uri: str = UNSET
+    title: str = UNSET
+    description: str = UNSET
+
+
+class BskyViewRecord(Schema):
+    # app.bsky.embed.record#viewRecord, or app.bsky.embed.record#view wrapping it
+    # when it's the record of app.bsky.embed.recordWithMedia#view
+    record: "BskyViewRecord" = UNSET
+    uri: str = UNSET
+    author: BskyAuthor = UNSET
+    value: BskyRecord = UNSET
+    labels: list[BskyLabel] = UNSET
+    embeds: "list[BskyEmbed] | None" = UNSET
+
+
+class BskyEmbed(Schema):
+    # Fields of all supported app.bsky.embed.*#view types
+    type: str = field(name="$type", default=UNSET)
+    images: list[BskyImage] = UNSET
+    playlist: str = UNSET
+    thumbnail: str | None = UNSET
+    aspectRatio: BskyAspectRatio | None = UNSET
+    external: BskyExternal = UNSET
+    record: BskyViewRecord = UNSET
+    media: "BskyEmbed" = UNSET
+
+
+class BskyPost(Schema):
+    author: BskyAuthor = UNSET
+    record: BskyRecord = UNSET
+    embed: BskyEmbed | None = UNSET
+    replyCount: int | None = UNSET
+    repostCount: int | None = UNSET
+    likeCount: int | None = UNSET
+    labels: list[BskyLabel] = UNSET
+
+
+class BskyThread(Schema):
+    post: BskyPost = UNSET
+
+
+class BskyResponse(Schema):
+    error: str | None = UNSET
+    thread: BskyThread = UNSET
+
+
+# Reddit: api.reddit.com/api/info
+class RedditPreviewImage(Schema):
+    width: int = UNSET
+    height: int = UNSET
+    url: str = UNSET
+
+
+class RedditPreviewImages(Schema):
+    resolutions: list[RedditPreviewImage] = UNSET
+
+
+class RedditPreview(Schema):
+    images: list[RedditPreviewImages] = UNSET
+
+
+class RedditGalleryItem(Schema):
+    media_id: str = UNSET
+
+
+class RedditGallery(Schema):
+    items: list[RedditGalleryItem] = UNSET
+
+
+class RedditMediaImage(Schema):
+    x: int = UNSET
+    y: int = UNSET
+    u: str = UNSET
+
+
+class RedditMediaMetadata(Schema):
+    m: str = UNSET
+    p: list[RedditMediaImage] = UNSET
+
+
+class RedditVideo(Schema):
+    hls_url: str = UNSET
+
+
+class RedditMedia(Schema):
+    reddit_video: RedditVideo = UNSET
+
+
+class RedditPollOption(Schema):
+    text: str = UNSET
+    vote_count: int = UNSET
+
+
+class RedditPoll(Schema):
+    voting_end_timestamp: int = UNSET
+    total_vote_count: int | None = UNSET
+    options: list[RedditPollOption] = UNSET
+
+
+class RedditThing(Schema):
+    # Fields of both posts (t3) and comments (t1)
+    author: str = UNSET
+    subreddit_name_prefixed: str = UNSET
+    permalink: str = UNSET
+    created: int | float = UNSET
+    score: int | None = UNSET
+    ups: int | None = UNSET
+    downs: int | None = UNSET
+    body: str = UNSET
+    body_html: str | None = UNSET
+    title: str = UNSET
+    selftext: str = UNSET
+    selftext_html: str | None = UNSET
+    link_flair_text: str | None = UNSET
+    upvote_ratio: int | float = UNSET
+    over_18: bool = UNSET
+    spoiler: bool = UNSET
+    url: str = UNSET
+    num_comments: int = UNSET
+    post_hint: str | None = UNSET
+    is_video: bool = UNSET
+    media: RedditMedia | None = UNSET
+    preview: RedditPreview | None = UNSET
+    gallery_data: RedditGallery | None = UNSET
+    media_metadata: dict[str, RedditMediaMetadata] | None = UNSET
+    poll_data: RedditPoll | None = UNSET
+
+
+class RedditChild(Schema):
+    kind: str = UNSET
+    data: RedditThing = UNSET
+
+
+class RedditListingData(Schema):
+    children: list[RedditChild] = UNSET
+
+
+class RedditResponse(Schema):
+    data: RedditListingData = UNSET
+
+
+# Mastodon: /api/v1/statuses/<id>
+class MastodonEmoji(Schema):
+    shortcode: str = UNSET
+    url: str = UNSET
+
+
+class MastodonAccount(Schema):
+    username: str = UNSET
+    display_name: str = UNSET
+    url: str = UNSET
+    emojis: list[MastodonEmoji] = UNSET
+
+
+class MastodonMetaSize(Schema):
+    width: int = UNSET
+    height: int = UNSET
+
+
+class MastodonMeta(Schema):
+    small: MastodonMetaSize | None = UNSET
+    original: MastodonMetaSize | None = UNSET
+
+
+class MastodonAttachment(Schema):
+    type: str = UNSET
+    url: str | None = UNSET
+    preview_url: str | None = UNSET
+    meta: MastodonMeta | None = UNSET
+
+
+class MastodonCard(Schema):
+    url: str = UNSET
+    title: str = UNSET
+    description: str = UNSET
+
+
+class MastodonPollOption(Schema):
+    title: str = UNSET
+    votes_count: int | None = UNSET
+
+
+class MastodonPoll(Schema):
+    expires_at: str | None = UNSET
+    expired: bool = UNSET
+    voters_count: int | None = UNSET
+    options: list[MastodonPollOption] = UNSET
+
+
+class MastodonQuote(Schema):
+    quoted_status: "MastodonStatus | None" = UNSET
+
+
+class MastodonStatus(Schema):
+    error: str | None = UNSET
+    url: str | None = UNSET
+    created_at: str = UNSET
+    content: str = UNSET
+    sensitive: bool = UNSET
+    spoiler_text: str = UNSET
+    replies_count: int = UNSET
+    reblogs_count: int = UNSET
+    favourites_count: int = UNSET
+    quotes_count: int | None = UNSET
+    account: MastodonAccount = UNSET
+    emojis: list[MastodonEmoji] = UNSET
+    media_attachments: list[MastodonAttachment] = UNSET
+    card: MastodonCard | None = UNSET
+    poll: MastodonPoll | None = UNSET
+    quote: MastodonQuote | None = UNSET
+
+
+# Lemmy: /api/v3/post and /api/v3/comment
+class LemmyActor(Schema):
+    # Both the creator and the community
+    name: str = UNSET
+    actor_id: str = UNSET
+
+
+class LemmyPost(Schema):
+    name: str = UNSET
+    body: str | None = UNSET
+    url: str | None = UNSET
+    url_content_type: str | None = UNSET
+    thumbnail_url: str | None = UNSET
+    ap_id: str = UNSET
+    published: str = UNSET
+    nsfw: bool = UNSET
+
+
+class LemmyComment(Schema):
+    content: str | None = UNSET
+    ap_id: str = UNSET
+    published: str = UNSET
+
+
+class LemmyCounts(Schema):
+    upvotes: int | None = UNSET
+    downvotes: int | None = UNSET
+    comments: int = UNSET
+    child_count: int = UNSET
+
+
+class LemmyImageDetails(Schema):
+    link: str = UNSET
+    width: int = UNSET
+    height: int = UNSET
+
+
+class LemmyView(Schema):
+    # Both post_view and comment_view
+    post: LemmyPost = UNSET
+    comment: LemmyComment = UNSET
+    community: LemmyActor = UNSET
+    creator: LemmyActor = UNSET
+    counts: LemmyCounts = UNSET
+    image_details: LemmyImageDetails | None = UNSET
+
+
+class LemmyResponse(Schema):
+    error: str | None = UNSET
+    post_view: LemmyView | None = UNSET
+    comment_view: LemmyView | None = UNSET
+
+
+# Piefed: /api/alpha/post and /api/alpha/comment
+class PiefedActor(Schema):
+    # Both the creator and the community
+    name: str = UNSET
+    title: str | None = UNSET
+    actor_id: str = UNSET
+
+
+class PiefedImageDetails(Schema):
+    width: int = UNSET
+    height: int = UNSET
+
+
+class PiefedPollChoice(Schema):
+    choice_text: str = UNSET
+    num_votes: int = UNSET
+
+
+class PiefedPoll(Schema):
+    end_poll: str = UNSET
+    choices: list[PiefedPollChoice] = UNSET
+
+
+class PiefedPost(Schema):
+    title: str = UNSET
+    body: str | None = UNSET
+    url: str | None = UNSET
+    thumbnail_url: str | None = UNSET
+    post_type: str | None = UNSET
+    image_details: PiefedImageDetails | None = UNSET
+    poll: PiefedPoll | None = UNSET
+    ap_id: str = UNSET
+    published: str = UNSET
+    nsfw: bool = UNSET
+
+
+class PiefedComment(Schema):
+    body: str | None = UNSET
+    ap_id: str = UNSET
+    published: str = UNSET
+
+
+class PiefedCounts(Schema):
+    upvotes: int | None = UNSET
+    downvotes: int | None = UNSET
+    comments: int = UNSET
+    child_count: int = UNSET
+
+
+class PiefedFlair(Schema):
+    flair_title: str = UNSET
+
+
+class PiefedView(Schema):
+    # Both post_view and comment_view
+    post: PiefedPost = UNSET
+    comment: PiefedComment = UNSET
+    community: PiefedActor = UNSET
+    creator: PiefedActor = UNSET
+    counts: PiefedCounts = UNSET
+    flair_list: list[PiefedFlair] | None = UNSET
+
+
+class PiefedResponse(Schema):
+    code: int | None = UNSET
+    post_view: PiefedView | None = UNSET
+    comment_view: PiefedView | None = UNSET
+
+
+for _schema in Schema.__subclasses__():
+    _schema._keys = {info.encode_name: info.name for info in msgspec.structs.fields(_schema)}
+
+# Decoders of API responses by service name, see MautrFxEmbedBot._get_api_urls()
+DECODERS = {
+    "twitter": msgspec.json.Decoder(TwitterResponse),
+    "bsky": msgspec.json.Decoder(BskyResponse),
+    "reddit": msgspec.json.Decoder(RedditResponse),
+    "mastodon": msgspec.json.Decoder(MastodonStatus),
+    "lemmy": msgspec.json.Decoder(LemmyResponse),
+    "piefed": msgspec.json.Decoder(PiefedResponse),
+}
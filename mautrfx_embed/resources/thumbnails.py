@@ -0,0 +1,426 @@
+import io
+import math
+import multiprocessing
+import os
+import time
+from asyncio import AbstractEventLoop
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from logging import Logger
+from typing import Any, Callable
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont, ImageOps, UnidentifiedImageError
+from PIL import features
+
+# Output format name: Pillow format, MIME type, file extension
+OUTPUT_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "webp": ("WEBP", "image/webp", "webp"),
+    "avif": ("AVIF", "image/avif", "avif"),
+}
+MAX_QUALITY = 90
+MIN_QUALITY = 30
+BLUR_RADIUS = 40
+# Fast blur is applied to an image scaled down by this factor
+FAST_BLUR_FACTOR = 8
+# Crashed worker pools replaced before falling back to the thread pool
+MAX_POOL_RESTARTS = 3
+
+# Overlays are scaled down in steps of this many pixels, see get_overlay()
+OVERLAY_STEP = 8
+
+# Overlay images decoded once per process, see load_overlays()
+_overlays: dict[str, Image.Image] = {}
+# Overlays scaled down for small thumbnails, keyed by name and size
+_scaled_overlays: dict[tuple[str, int], Image.Image] = {}
+
+
+def load_overlays(files: dict[str, bytes]) -> None:
+    """
+    Decode overlay images and scale them down to every size get_overlay() can return,
+    and keep them in memory of the current process
+    :param files: dictionary with overlay names and PNG data
+    :return:
+    """
+    for name, data in files.items():
+        overlay = Image.open(io.BytesIO(data))
+        overlay.load()
+        _overlays[name] = overlay
+    _scaled_overlays.clear()
+    for name, overlay in _overlays.items():
+        for size in range(OVERLAY_STEP, overlay.width, OVERLAY_STEP):
+            _scaled_overlays[(name, size)] = overlay.resize(
+                (size, size),
+                Image.Resampling.LANCZOS
+            )
+
+
+def get_overlay(name: str, size: int) -> Image.Image:
+    """
+    Get overlay image that is no bigger than a given size
+    :param name: name of the overlay
+    :param size: max width and height of the overlay
+    :return: overlay image
+    """
+    overlay = _overlays[name]
+    if size >= overlay.width:
+        return overlay
+    # Snap down to a multiple of OVERLAY_STEP, so that thumbnails of any aspect ratio use
+    # one of the overlays scaled in load_overlays()
+    return _scaled_overlays[(name, max(OVERLAY_STEP, size - size % OVERLAY_STEP))]
+
+
+def is_format_supported(fmt: str) -> bool:
+    """
+    Check if thumbnails can be encoded in a given format by the installed Pillow
+    :param fmt: output format name (jpeg, webp, avif)
+    :return: True if format is supported, False otherwise
+    """
+    if fmt not in OUTPUT_FORMATS:
+        return False
+    return fmt == "jpeg" or features.check(fmt)
+
+
+def make_thumbnail(
+        data: bytes,
+        size: int,
+        overlay: str,
+        blur: bool,
+        fmt: str = "jpeg",
+        budget: int = 0,
+        fast_blur: bool = False
+) -> tuple[bytes, int, int, str, float, float]:
+    """
+    Convert original thumbnail/image into one with specified size
+    :param data: image as bytes
+    :param size: max width and height of the thumbnail
+    :param overlay: name of the overlay to put in the middle of the thumbnail, empty for none
+    :param blur: True if the image should be blurred
+    :param fmt: output format name (jpeg, webp, avif)
+    :param budget: max size of the thumbnail in bytes, 0 for no limit
+    :param fast_blur: True if the image should be blurred at a reduced scale
+    :return: a tuple with thumbnail as bytes, its width, height, format of the original image,
+    time it took to decode the original image, and time it took to encode the thumbnail
+    """
+    start = time.perf_counter()
+    img = Image.open(io.BytesIO(data))
+    # JPEG decoder can scale the image down by 1/2, 1/4 or 1/8 while decoding
+    # Pick the smallest scale that is still at least as big as the thumbnail
+    img.draft(None, get_fitted_size(img.size, (size, size)))
+    img.load()
+    decode_time = time.perf_counter() - start
+    image_format = img.format
+    img.thumbnail((size, size), Image.Resampling.LANCZOS)
+    if blur:
+        img = blur_image(img, fast_blur)
+    if overlay:
+        add_overlay(img, overlay)
+    start = time.perf_counter()
+    thumbnail = encode(img, fmt, budget)
+    encode_time = time.perf_counter() - start
+    return thumbnail, img.width, img.height, image_format, decode_time, encode_time
+
+
+def make_mosaic(
+        images: list[bytes],
+        labels: list[str],
+        overlays: list[str],
+        tile: int,
+        blur: bool,
+        fmt: str = "jpeg",
+        budget: int = 0,
+        fast_blur: bool = False
+) -> tuple[bytes, int, int, float]:
+    """
+    Compose thumbnails of several images into a single grid image with labels
+    :param images: list of images as bytes
+    :param labels: list of labels drawn in the corner of each tile (e.g. Pic#1)
+    :param overlays: list of overlay names to put in the middle of each tile, empty for none
+    :param tile: width and height of a single tile
+    :param blur: True if the images should be blurred
+    :param fmt: output format name (jpeg, webp, avif)
+    :param budget: max size of the grid image in bytes, 0 for no limit
+    :param fast_blur: True if the images should be blurred at a reduced scale
+    :return: a tuple with the grid image as bytes, its width, height, and time it took to encode it
+    """
+    columns = math.ceil(math.sqrt(len(images)))
+    rows = math.ceil(len(images) / columns)
+    mosaic = Image.new("RGB", (columns * tile, rows * tile))
+    draw = ImageDraw.Draw(mosaic)
+    font = ImageFont.load_default(size=max(10, tile // 8))
+    for i, (data, label, overlay) in enumerate(zip(images, labels, overlays)):
+        x = (i % columns) * tile
+        y = (i // columns) * tile
+        # A broken image leaves an empty tile, the rest of the grid is still useful
+        try:
+            img = Image.open(io.BytesIO(data))
+            img.draft(None, (tile, tile))
+            img = ImageOps.fit(img.convert("RGB"), (tile, tile), Image.Resampling.LANCZOS)
+            if blur:
+                img = blur_image(img, fast_blur)
+            if overlay:
+                add_overlay(img, overlay)
+            mosaic.paste(img, (x, y))
+        except (OSError, ValueError, TypeError, UnidentifiedImageError):
+            pass
+        bbox = draw.textbbox((x + 4, y + 4), label, font=font)
+        draw.rectangle((bbox[0] - 2, bbox[1] - 2, bbox[2] + 2, bbox[3] + 2), fill=(0, 0, 0))
+        draw.text((x + 4, y + 4), label, fill=(255, 255, 255), font=font)
+    start = time.perf_counter()
+    grid = encode(mosaic, fmt, budget)
+    return grid, mosaic.width, mosaic.height, time.perf_counter() - start
+
+
+def encode(img: Image.Image, fmt: str = "jpeg", budget: int = 0) -> bytes:
+    """
+    Encode thumbnail with the highest quality that fits in the size budget. If even the lowest
+    quality doesn't fit, the lowest quality result is returned.
+    :param img: thumbnail
+    :param fmt: output format name (jpeg, webp, avif)
+    :param budget: max size of the result in bytes, 0 for no limit
+    :return: encoded image as bytes
+    """
+    if fmt == "jpeg":
+        # JPEG doesn't support transparency, so we have to remove the transparency layer
+        if img.mode in ("RGBA", "P"):
+            img = img.convert("RGB")
+    elif img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if img.has_transparency_data else "RGB")
+    pil_format = OUTPUT_FORMATS[fmt][0]
+    result = _save(img, pil_format, MAX_QUALITY)
+    if not budget or len(result) <= budget:
+        return result
+
+    # Binary search for the highest quality that fits
+    result = fallback = b""
+    low, high = MIN_QUALITY, MAX_QUALITY - 1
+    while low <= high:
+        quality = (low + high) // 2
+        candidate = _save(img, pil_format, quality)
+        if len(candidate) <= budget:
+            result = candidate
+            low = quality + 1
+        else:
+            if quality == MIN_QUALITY:
+                fallback = candidate
+            high = quality - 1
+    return result or fallback
+
+
+def _save(img: Image.Image, pil_format: str, quality: int) -> bytes:
+    """
+    Save image in memory
+    :param img: image
+    :param pil_format: Pillow format name
+    :param quality: encoder quality
+    :return: encoded image as bytes
+    """
+    img_byte_arr = io.BytesIO()
+    img.save(img_byte_arr, format=pil_format, quality=quality)
+    return img_byte_arr.getvalue()
+
+
+def get_fitted_size(size: tuple[int, int], box: tuple[int, int]) -> tuple[int, int]:
+    """
+    Calculate the size of an image scaled down to fit in a box, keeping the aspect ratio
+    :param size: width and height of the image
+    :param box: max width and height
+    :return: width and height of the scaled image
+    """
+    ratio = min(box[0] / size[0], box[1] / size[1], 1)
+    return max(1, int(size[0] * ratio)), max(1, int(size[1] * ratio))
+
+
+def blur_image(img: Image.Image, fast: bool) -> Image.Image:
+    """
+    Blur thumbnail
+    :param img: thumbnail
+    :param fast: True if blur should be applied to a scaled down image and scaled back up,
+    which looks the same for a strong blur at a fraction of the cost
+    :return: blurred image
+    """
+    # Palette images can't be filtered
+    if img.mode == "P":
+        img = img.convert("RGBA")
+    if not fast:
+        return img.filter(ImageFilter.GaussianBlur(BLUR_RADIUS))
+    small = img.reduce(FAST_BLUR_FACTOR)
+    small = small.filter(ImageFilter.GaussianBlur(BLUR_RADIUS / FAST_BLUR_FACTOR))
+    return small.resize(img.size, Image.Resampling.BILINEAR)
+
+
+def add_overlay(img: Image.Image, name: str) -> None:
+    """
+    Adds an overlay to the middle of a thumbnail
+    :param img: the image to add overlay to
+    :param name: name of the overlay
+    :return:
+    """
+    img_w, img_h = img.size
+    # The default size of overlays is 100x100
+    # If overlay is bigger than thumbnail's half size, use a scaled down overlay
+    overlay = get_overlay(name, min(img_w, img_h) // 2)
+    offset = ((img_w - overlay.width) // 2, (img_h - overlay.width) // 2)
+    img.paste(overlay, offset, overlay)
+
+
+class ThumbnailEngine:
+    """
+    Runs thumbnail generation either in a dedicated process pool or in the default thread pool
+    of the event loop
+    """
+
+    def __init__(
+            self,
+            loop: AbstractEventLoop,
+            log: Logger,
+            files: dict[str, bytes],
+            workers: int,
+            fast_blur: bool = False
+    ) -> None:
+        self.loop = loop
+        self.log = log
+        self.files = files
+        self.workers = workers
+        self.fast_blur = fast_blur
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.restarts = 0
+        self.executor = None
+        load_overlays(files)
+        if workers > 0:
+            self.executor = self._start_pool()
+
+    def set_workers(self, workers: int) -> None:
+        """
+        Change the number of worker processes. Jobs already submitted to the previous pool
+        are finished by it.
+        :param workers: number of worker processes, 0 to use the default thread pool
+        :return:
+        """
+        if workers == self.workers:
+            return
+        if self.executor:
+            self.executor.shutdown(wait=False)
+        self.workers = workers
+        self.restarts = 0
+        self.executor = self._start_pool() if workers > 0 else None
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        """
+        Start a pool of worker processes with all of its workers running
+        :return: process pool executor
+        """
+        # maubot loads plugin modules from a zip file, so a fresh interpreter wouldn't be able
+        # to import them. Worker processes have to be forked.
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=load_overlays,
+            initargs=(self.files,)
+        )
+        # The first submitted job forks all the workers of a fork-based pool at once. Do it now,
+        # while no thumbnails are being generated in other threads, instead of in the middle
+        # of a busy event loop where a lock held by another thread could be copied into a child
+        # and never released there.
+        executor.submit(os.getpid)
+        return executor
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        """
+        Replace a pool that lost a worker process (e.g. killed by the OOM killer). If the pool
+        keeps breaking, thumbnails are generated in the default thread pool from then on.
+        :param broken: the pool that raised BrokenExecutor
+        :return:
+        """
+        # Other jobs that were running in the same pool fail too, replace it only once
+        if broken is not self.executor:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.restarts += 1
+        if self.restarts > MAX_POOL_RESTARTS:
+            self.log.warning(
+                "Thumbnail worker processes keep crashing, generating thumbnails in the thread "
+                "pool instead"
+            )
+            self.executor = None
+            return
+        self.log.warning("Thumbnail worker process crashed, starting a new worker pool")
+        self.executor = self._start_pool()
+
+    async def render(
+            self,
+            data: bytes,
+            size: int,
+            overlay: str,
+            blur: bool,
+            fmt: str = "jpeg",
+            budget: int = 0
+    ) -> tuple[bytes, int, int, str, float, float]:
+        """
+        Generate thumbnail outside the event loop
+        :param data: image as bytes
+        :param size: max width and height of the thumbnail
+        :param overlay: name of the overlay to put in the middle of the thumbnail, empty for none
+        :param blur: True if the image should be blurred
+        :param fmt: output format name (jpeg, webp, avif)
+        :param budget: max size of the thumbnail in bytes, 0 for no limit
+        :return: a tuple with thumbnail as bytes, its width, height, format of the original image,
+        time it took to decode the original image, and time it took to encode the thumbnail
+        """
+        return await self._run(
+            make_thumbnail, data, size, overlay, blur, fmt, budget, self.fast_blur
+        )
+
+    async def render_mosaic(
+            self,
+            images: list[bytes],
+            labels: list[str],
+            overlays: list[str],
+            tile: int,
+            blur: bool,
+            fmt: str = "jpeg",
+            budget: int = 0
+    ) -> tuple[bytes, int, int, float]:
+        """
+        Generate a grid image from several images outside the event loop
+        :param images: list of images as bytes
+        :param labels: list of labels drawn in the corner of each tile (e.g. Pic#1)
+        :param overlays: list of overlay names to put in the middle of each tile, empty for none
+        :param tile: width and height of a single tile
+        :param blur: True if the images should be blurred
+        :param fmt: output format name (jpeg, webp, avif)
+        :param budget: max size of the grid image in bytes, 0 for no limit
+        :return: a tuple with the grid image as bytes, its width, height, and time it took
+        to encode it
+        """
+        return await self._run(
+            make_mosaic, images, labels, overlays, tile, blur, fmt, budget, self.fast_blur
+        )
+
+    async def _run(self, func: Callable, *args: Any) -> Any:
+        """
+        Run function in the executor and keep track of the number of queued jobs
+        :param func: function to run
+        :param args: function arguments
+        :return: function result
+        """
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        self.log.debug(f"Thumbnail job submitted, {self.queue_depth} in queue")
+        executor = self.executor
+        try:
+            return await self.loop.run_in_executor(executor, func, *args)
+        except BrokenExecutor:
+            # The job is not retried, it might be the one that crashed the worker
+            self._replace_pool(executor)
+            raise
+        finally:
+            self.queue_depth -= 1
+
+    def shutdown(self) -> None:
+        """
+        Stop worker processes
+        :return:
+        """
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from mautrix.errors import MLimitExceeded
+
+T = TypeVar("T")
+
+
+class UploadScheduler:
+    """
+    Token bucket limiting the rate of media uploads to the Matrix server. The number of uploads
+    in progress is bounded, the rest wait in a queue. When the server responds with
+    M_LIMIT_EXCEEDED, all uploads are paused and the rejected one is retried with
+    exponential backoff.
+    """
+    BACKOFF = 1.0
+
+    def __init__(self, rate: float, burst: int, max_retries: int, concurrency: int) -> None:
+        self._tokens = float(max(1, burst))
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.concurrency = 0
+        self.configure(rate, burst, max_retries, concurrency)
+
+    def configure(self, rate: float, burst: int, max_retries: int, concurrency: int) -> None:
+        """
+        Set limits of the scheduler. Uploads that are already waiting for a free slot keep
+        the previous concurrency limit.
+        :param rate: number of uploads per second, 0 for no limit
+        :param burst: max number of uploads started at once after a quiet period
+        :param max_retries: number of retries of an upload rejected with M_LIMIT_EXCEEDED
+        :param concurrency: max number of uploads in progress
+        :return:
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_retries = max_retries
+        self._tokens = min(self._tokens, self.burst)
+        concurrency = max(1, concurrency)
+        if concurrency != self.concurrency:
+            self.concurrency = concurrency
+            self._slots = asyncio.Semaphore(concurrency)
+
+    async def run(self, upload: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run upload once the rate limit allows it
+        :param upload: coroutine function that uploads the media
+        :return: result of the upload
+        """
+        backoff = self.BACKOFF
+        async with self._slots:
+            for attempt in range(self.max_retries + 1):
+                await self._acquire()
+                try:
+                    return await upload()
+                except MLimitExceeded:
+                    if attempt == self.max_retries:
+                        raise
+                    self._pause(backoff)
+                    backoff *= 2
+
+    async def _acquire(self) -> None:
+        """
+        Wait until there's a token available and take it
+        :return:
+        """
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self._paused_until > now:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                # Rate of 0 means that there's no limit
+                if self.rate <= 0:
+                    return
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def _pause(self, delay: float) -> None:
+        """
+        Stop all uploads for a given time after the server rejected one of them
+        :param delay: pause length in seconds
+        :return:
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        # Don't let the bucket refill during the pause
+        self._tokens = 0.0
+        self._updated = self._paused_until
@@ -1,17 +1,32 @@
-import io
+import asyncio
 import re
+import threading
 import time
 from calendar import timegm
+from concurrent.futures import BrokenExecutor
 from time import strptime
 from typing import Any
 
 import markdown
-from PIL import Image, ImageFile, ImageFilter, UnidentifiedImageError
-from aiohttp import ClientTimeout, ClientError
-from mautrix.errors import MatrixResponseError
+from PIL import Image, ImageFile, UnidentifiedImageError
+from aiohttp import ClientTimeout, ClientError, ClientResponseError
+from mautrix.errors import MatrixRequestError, MatrixResponseError
 from maubot import Plugin
 
+from .cache import TTLCache
 from .datastructures import Media
+from .db import MediaCache
+from .metrics import Timings
+from .reddit_session import RedditSession
+from .thumbnails import OUTPUT_FORMATS, ThumbnailEngine, is_format_supported
+from .upload_scheduler import UploadScheduler
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+else:
+    from .schemas import DECODERS
 
 
 class Utilities:
@@ -21,6 +36,21 @@ class Utilities:
     EMPTY_LINK = re.compile(r"\[]\((.+?)\)")
     FLAIRS_TITLE = re.compile(r"^(?P<flairs>(?:\[[^\[\]]+?]\s?)*)(?P<title>.*)")
     FLAIR_LIST = re.compile(r"\[(.*?)]")
+    HTML_TAG = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)[^<>]*?(/?)>")
+    HTML_VOID_TAGS = {"br", "hr", "img", "input", "wbr"}
+    DOWNLOAD_CHUNK_SIZE = 65536
+    # Give up on data that isn't recognized as an image after this many bytes
+    IMAGE_HEADER_MAX_BYTES = 262144
+    # ISO BMFF brands of AVIF and HEIF images
+    IMAGE_FTYP_BRANDS = {b"avif", b"avis", b"heic", b"heix", b"mif1", b"msf1"}
+    # Response statuses of failed API requests that are remembered in the negative cache
+    FAILED_STATUSES = {
+        401: "forbidden",
+        403: "forbidden",
+        404: "not_found",
+        410: "not_found",
+        429: "rate_limited",
+    }
 
     def __init__(
             self,
@@ -40,8 +70,102 @@ class Utilities:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:140.0) "
                           "Gecko/20100101 Firefox/140.0"
         }
+        self.api_cache = TTLCache(
+            ttl=self.config["api_cache_ttl"],
+            max_entries=self.config["api_cache_max_entries"],
+            max_bytes=self.config["api_cache_max_bytes"]
+        )
+        self.source_cache = TTLCache(
+            ttl=self.config["source_cache_ttl"],
+            max_entries=self.config["source_cache_max_entries"],
+            max_bytes=self.config["source_cache_max_bytes"]
+        )
+        # Failed requests, expiration time depends on the reason of the failure
+        self.negative_cache = TTLCache(
+            ttl=0,
+            max_entries=self.config["negative_cache_max_entries"],
+            max_bytes=self.config["negative_cache_max_bytes"]
+        )
+        self.reddit_session = RedditSession(
+            bot=self.bot,
+            headers=self.headers_reddit,
+            ttl=self.config["reddit_session_ttl"]
+        )
+        self.upload_scheduler = UploadScheduler(
+            rate=self.config["upload_rate"],
+            burst=self.config["upload_burst"],
+            max_retries=self.config["upload_max_retries"],
+            concurrency=self.config["upload_concurrency"]
+        )
+        self.media_cache = MediaCache(
+            db=self.bot.database,
+            ttl=self.config["media_cache_ttl"],
+            max_entries=self.config["media_cache_max_entries"]
+        )
+        # Text converters reused by executor threads, see _get_markdown()
+        self._converters = threading.local()
+        self.decode_timings = Timings()
+        self.encode_timings = Timings()
+        self.thumbnail_format = "jpeg"
+        self.thumbnails = ThumbnailEngine(
+            loop=self.bot.loop,
+            log=self.bot.log,
+            files=self.files,
+            workers=self.config["thumbnail_workers"]
+        )
+        self.load_thumbnail_config()
+
+    def on_config_update(self) -> None:
+        """
+        Apply config values that are only read when the helper objects are created, so that
+        changes take effect without reloading the plugin
+        :return:
+        """
+        self.api_cache.resize(
+            ttl=self.config["api_cache_ttl"],
+            max_entries=self.config["api_cache_max_entries"],
+            max_bytes=self.config["api_cache_max_bytes"]
+        )
+        self.source_cache.resize(
+            ttl=self.config["source_cache_ttl"],
+            max_entries=self.config["source_cache_max_entries"],
+            max_bytes=self.config["source_cache_max_bytes"]
+        )
+        self.negative_cache.resize(
+            ttl=0,
+            max_entries=self.config["negative_cache_max_entries"],
+            max_bytes=self.config["negative_cache_max_bytes"]
+        )
+        self.upload_scheduler.configure(
+            rate=self.config["upload_rate"],
+            burst=self.config["upload_burst"],
+            max_retries=self.config["upload_max_retries"],
+            concurrency=self.config["upload_concurrency"]
+        )
+        # Oversized tables are trimmed with the next stored thumbnail or emoji
+        self.media_cache.ttl = self.config["media_cache_ttl"]
+        self.media_cache.max_entries = self.config["media_cache_max_entries"]
+        # Cookies that are already fetched expire at the old time
+        self.reddit_session.ttl = self.config["reddit_session_ttl"]
+        self.thumbnails.set_workers(self.config["thumbnail_workers"])
+        self.load_thumbnail_config()
 
-    async def parse_interaction(self, value: int) -> str:
+    def load_thumbnail_config(self) -> None:
+        """
+        Apply thumbnail format and blur mode from the config. Called again when the config
+        is updated, so that the changes take effect without restarting the plugin.
+        :return:
+        """
+        thumbnail_format = str(self.config["thumbnail_format"]).lower()
+        if not is_format_supported(thumbnail_format):
+            self.bot.log.warning(
+                f"Thumbnail format {thumbnail_format} is not supported, using JPEG instead"
+            )
+            thumbnail_format = "jpeg"
+        self.thumbnail_format = thumbnail_format
+        self.thumbnails.fast_blur = self.config["thumbnail_blur"] == "fast"
+
+    def parse_interaction(self, value: int) -> str:
         """
         Get shortened representation of a number of interactions
         :param value: number of interactions
@@ -59,7 +183,7 @@ class Utilities:
             formatted_value = f"{thousands[1]}"
         return formatted_value
 
-    async def parse_date(self, created: str) -> int:
+    def parse_date(self, created: str) -> int:
         """
         Convert date string to seconds since Epoch
         :param created: date string
@@ -71,47 +195,183 @@ class Utilities:
 
     async def download_image(self, url: str) -> bytes | None:
         """
-        Download image from external URL
+        Download image from external URL. Downloaded images are kept for a short time, so that
+        different thumbnails of the same image don't download it again.
         :param url: URL to an image
         :return: image data as bytes or None if download fails for any reason
         """
+        return await self.source_cache.get_or_fetch(url, lambda: self._fetch_image(url))
+
+    async def _fetch_image(self, url: str) -> tuple[bytes | None, int]:
+        """
+        Download image from external URL. The body is streamed and the download is aborted as soon
+        as it turns out to be too big or not an image.
+        :param url: URL to an image
+        :return: tuple with image data as bytes or None if download fails for any reason,
+        and size of the image in bytes
+        """
         timeout = ClientTimeout(total=20)
+        max_bytes = self.config["max_image_bytes"]
         try:
-            response = await self.bot.http.get(
+            async with self.bot.http.get(
                 url,
                 headers=self.headers_fake,
                 timeout=timeout,
                 raise_for_status=True
-            )
-            return await response.read()
+            ) as response:
+                if max_bytes and (response.content_length or 0) > max_bytes:
+                    raise ValueError(f"size {response.content_length} B exceeds the limit")
+                data = bytearray()
+                parser = ImageFile.Parser()
+                checked = False
+                async for chunk in response.content.iter_chunked(self.DOWNLOAD_CHUNK_SIZE):
+                    data += chunk
+                    if max_bytes and len(data) > max_bytes:
+                        raise ValueError(f"size exceeds the limit of {max_bytes} B")
+                    if not checked:
+                        checked = self._check_image_header(parser, chunk, data)
+                if not checked:
+                    raise ValueError("not an image")
+                return bytes(data), len(data)
         except ClientError as e:
             self.bot.log.error(f"Downloading image - connection failed: {url}: {e}")
+        except ValueError as e:
+            self.bot.log.warning(f"Downloading image - aborted: {url}: {e}")
+        return None, 0
 
-    async def get_preview(self, url: str) -> Any:
+    def _check_image_header(self, parser: ImageFile.Parser, chunk: bytes, head: bytearray) -> bool:
+        """
+        Feed the next chunk of a download to image parser and check format and dimensions of
+        the image as soon as its header is parsed
+        :param parser: incremental image parser
+        :param chunk: the last downloaded chunk
+        :param head: all data downloaded so far
+        :return: True if the image was checked, False if more data is needed
+        :raise ValueError: if data is not an image or the image has too many pixels
+        """
+        # Pillow needs the whole file to read WebP and AVIF headers
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return True
+        if head[4:8] == b"ftyp" and bytes(head[8:12]) in self.IMAGE_FTYP_BRANDS:
+            return True
+        try:
+            parser.feed(chunk)
+        except (OSError, Image.DecompressionBombError) as e:
+            raise ValueError(f"not a valid image: {e}")
+        if parser.image is None:
+            if len(head) > self.IMAGE_HEADER_MAX_BYTES:
+                raise ValueError("not an image")
+            return False
+        width, height = parser.image.size
+        max_pixels = self.config["max_image_pixels"]
+        if max_pixels and width * height > max_pixels:
+            raise ValueError(f"dimensions {width}x{height} exceed the limit")
+        return True
+
+    def is_failed(self, url: str) -> bool:
         """
-        Get results from the API.
+        Check if the request for the URL failed recently
+        :param url: API URL
+        :return: True if the URL should not be requested again yet, False otherwise
+        """
+        return self.negative_cache.get(url) is not None
+
+    def remember_failure(self, url: str, reason: str, ttl: int | None = None) -> None:
+        """
+        Remember failed request, so that the URL is not requested again for some time
+        :param url: API URL
+        :param reason: reason of the failure: not_found, forbidden, rate_limited or parse_error
+        :param ttl: number of seconds to remember the failure, configured TTL of the reason
+        if not set
+        :return:
+        """
+        if ttl is None:
+            ttl = self.config[f"negative_cache_ttl_{reason}"]
+        self.negative_cache.put(url, reason, len(url) + len(reason), ttl)
+
+    def _remember_response_error(self, url: str, error: ClientResponseError) -> None:
+        """
+        Remember failed request if the status code of the response means that repeating it soon
+        won't succeed
+        :param url: API URL
+        :param error: response error
+        :return:
+        """
+        reason = self.FAILED_STATUSES.get(error.status)
+        if reason is None:
+            return
+        ttl = self.config[f"negative_cache_ttl_{reason}"]
+        retry_after = error.headers.get("Retry-After") if error.headers else None
+        if reason == "rate_limited" and ttl > 0 and retry_after and retry_after.isdigit():
+            ttl = max(int(retry_after), ttl)
+        self.remember_failure(url, reason, ttl)
+
+    async def get_preview(self, url: str, service: str) -> Any:
+        """
+        Get results from the API. Responses are cached and concurrent requests for the same URL
+        share a single upstream request.
         :param url: source URL
+        :param service: name of the service the API belongs to
         :return: JSON API response
         """
-        timeout = ClientTimeout(total=20)
-        try:
-            response = await self.bot.http.get(
-                url,
-                headers=await self._get_headers(url),
-                timeout=timeout,
-                raise_for_status=True
-            )
-            return await response.json()
-        except ClientError as e:
-            self.bot.log.error(f"Connection failed: {e}")
-            return ""
+        return await self.api_cache.get_or_fetch(url, lambda: self._fetch_preview(url, service))
 
     async def get_html_preview(self, url: str) -> str:
         """
-        Get HTML webpage source.
+        Get HTML webpage source. Responses are cached and concurrent requests for the same URL
+        share a single upstream request.
         :param url: source URL
         :return: text content of the response
         """
+        return await self.api_cache.get_or_fetch(url, lambda: self._fetch_html_preview(url))
+
+    async def _fetch_preview(self, url: str, service: str) -> tuple[Any, int]:
+        """
+        Get results from the API.
+        :param url: source URL
+        :param service: name of the service the API belongs to
+        :return: tuple with JSON API response and size of the response in bytes
+        """
+        timeout = ClientTimeout(total=20)
+        retry = url.startswith("https://api.reddit.com")
+        while True:
+            headers = await self._get_headers(url)
+            try:
+                response = await self.bot.http.get(
+                    url,
+                    headers=headers,
+                    timeout=timeout,
+                    raise_for_status=True
+                )
+                body = await response.read()
+                # Decode with msgspec if it's available, straight into structs with only
+                # the fields the parsers read. Otherwise, or if the response doesn't match
+                # the schema, parsers get plain JSON.
+                if msgspec is not None and service in DECODERS:
+                    try:
+                        return DECODERS[service].decode(body), len(body)
+                    except msgspec.DecodeError as e:
+                        self.bot.log.debug(f"Decoding {service} API response failed: {e}")
+                return await response.json(), len(body)
+            except ClientResponseError as e:
+                # Reddit session cookies were rejected, refresh them and try again once
+                if retry and e.status in (403, 429):
+                    self.reddit_session.invalidate(headers["cookie"])
+                    retry = False
+                    continue
+                self.bot.log.error(f"Connection failed: {e}")
+                self._remember_response_error(url, e)
+                return "", 0
+            except ClientError as e:
+                self.bot.log.error(f"Connection failed: {e}")
+                return "", 0
+
+    async def _fetch_html_preview(self, url: str) -> tuple[str, int]:
+        """
+        Get HTML webpage source.
+        :param url: source URL
+        :return: tuple with text content of the response and its size in bytes
+        """
         timeout = ClientTimeout(total=20)
         try:
             response = await self.bot.http.get(
@@ -120,10 +380,15 @@ class Utilities:
                 timeout=timeout,
                 raise_for_status=True
             )
-            return await response.text()
+            body = await response.read()
+            return await response.text(), len(body)
+        except ClientResponseError as e:
+            self.bot.log.error(f"Connection failed: {e}")
+            self._remember_response_error(url, e)
+            return "", 0
         except ClientError as e:
             self.bot.log.error(f"Connection failed: {e}")
-            return ""
+            return "", 0
 
     async def get_location_header(self, url: str) -> str:
         """
@@ -156,92 +421,10 @@ class Utilities:
         """
         if url.startswith("https://api.reddit.com"):
             headers = self.headers_reddit.copy()
-            headers["cookie"] = await self._get_reddit_cookie()
+            headers["cookie"] = await self.reddit_session.get_cookie()
             return headers
         return self.headers
 
-    async def _get_reddit_cookie(self) -> str:
-        """
-        Get cookie for reddit JSON API request.
-        :return: reddit session cookie
-        """
-        timeout = ClientTimeout(total=20)
-        try:
-            response = await self.bot.http.get(
-                "https://old.reddit.com",
-                headers=self.headers_reddit,
-                timeout=timeout,
-                raise_for_status=True
-            )
-            cookies = (
-                f"loid={response.cookies['loid']}; "
-                f"session_tracker={response.cookies['session_tracker']}"
-            )
-            return cookies
-        except ClientError as e:
-            self.bot.log.error(f"Connection failed: {e}")
-            return ""
-        except KeyError as e:
-            self.bot.log.error(f"Failed to obtain necessary keys: {e}")
-            return ""
-
-    def _get_thumbnail(self, image: tuple[bytes, int, int, bool, bool]) -> tuple[bytes, int, int]:
-        """
-        Convert original thumbnail/image into one with specified size
-        :param image: tuple that contains: image as bytes, width, height, bool that indicates
-        whether passed image is a thumbnail to video or just a normal photo,
-        bool that indicates whether image should be blurred
-        :return: a tuple with thumbnail as bytes, its width, and height
-        """
-        try:
-            img = Image.open(io.BytesIO(image[0]))
-            img.thumbnail((image[1], image[2]), Image.Resampling.LANCZOS)
-            # Apply blur if it's a NSFW image or video
-            if image[4] and not self.config["show_nsfw"]:
-                img = img.filter(ImageFilter.GaussianBlur(40))
-                # Add NSFW warning
-                if image[3]:
-                    self._add_overlay(img, self.files["nsfw_vid"])
-                else:
-                    self._add_overlay(img, self.files["nsfw_pic"])
-            # If it's a thumbnail to a video file and not NSFW, add play button overlay
-            elif image[3]:
-                self._add_overlay(img, self.files["play"])
-            # The result is a JPEG so we have to remove the transparency layer if there is one
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            img_byte_arr = io.BytesIO()
-            img.save(img_byte_arr, format="JPEG", quality=90)
-            img_byte_arr.seek(0)
-            image = img_byte_arr.getvalue()
-        except (OSError, ValueError, TypeError, FileNotFoundError, UnidentifiedImageError) as e:
-            self.bot.log.error(f"Error generating thumbnail: {e}")
-            return (b'', 0, 0)
-        return image, img.width, img.height
-
-    def _add_overlay(self, img: ImageFile, overlay: bytes) -> None:
-        """
-        Adds an overlay to thumbnails of video files
-        :param img: the image to add overlay to
-        :param overlay: the overlay image
-        :return: image with an overlay in the middle
-        """
-        if not img:
-            return
-        img_w, img_h = img.size
-        try:
-            play_img = Image.open(io.BytesIO(overlay))
-            # The default size of overlays is 100x100
-            # If overlay is bigger than thumbnail's half size, resize the overlay
-            overlay_s = min(img_w, img_h) // 2
-            if overlay_s < play_img.width:
-                play_img = play_img.resize((overlay_s, overlay_s), Image.Resampling.LANCZOS)
-            offset = ((img_w - play_img.width) // 2, (img_h - play_img.width) // 2)
-            img.paste(play_img, offset, play_img)
-        except (OSError, ValueError, TypeError, FileNotFoundError, UnidentifiedImageError) as e:
-            self.bot.log.error(f"Error adding play button overlay to the thumbnail: {e}")
-            raise
-
     async def get_matrix_image_url(
             self,
             media: Media,
@@ -256,29 +439,177 @@ class Utilities:
         :return: a tuple with matrix mxc URL, width, and height of the thumbnail
         """
         # Download image from external source
-        if media.thumbnail_url:
-            url = media.thumbnail_url
-        elif media.filetype == "p" and media.url:
-            url = media.url
-        else:
+        url = self._get_source_url(media)
+        if not url:
             return "", 0, 0
 
+        # Reuse the thumbnail if the same variant was already uploaded
+        blur = nsfw and not self.config["show_nsfw"]
+        overlay = self._get_overlay(media, blur)
+        budget = self._get_budget(size)
+        variant = self._get_variant(overlay if overlay else "plain", budget, blur)
+        cached = await self.media_cache.get_thumbnail(url, size, variant)
+        if cached:
+            return cached
+
         data = await self.download_image(url)
         if not data:
             return "", 0, 0
 
         # Generate thumbnail
-        image_data, width, height = await self.bot.loop.run_in_executor(
-            None,
-            self._get_thumbnail,
-            (data, size, size, media.filetype != "p", nsfw)
-        )
-        if not image_data:
+        try:
+            (
+                image_data,
+                width,
+                height,
+                image_format,
+                decode_time,
+                encode_time
+            ) = await self.thumbnails.render(
+                data,
+                size,
+                overlay,
+                blur,
+                self.thumbnail_format,
+                budget
+            )
+        except (OSError, ValueError, TypeError, UnidentifiedImageError, BrokenExecutor) as e:
+            self.bot.log.error(f"Error generating thumbnail: {e}")
+            return "", 0, 0
+        self.decode_timings.add(image_format, decode_time, len(data))
+        self.bot.log.debug(f"Decoded {image_format} image in {decode_time * 1000:.1f} ms")
+        self._add_encode_timing(size, encode_time, len(image_data))
+
+        mxc_uri = await self._upload_thumbnail(image_data)
+        if mxc_uri:
+            await self.media_cache.put_thumbnail(url, size, variant, (mxc_uri, width, height))
+        return mxc_uri, width, height
+
+    async def get_matrix_mosaic_url(
+            self,
+            media: list[tuple[Media, str]],
+            size: int,
+            nsfw: bool = False
+    ) -> tuple[str, int, int]:
+        """
+        Download images from external URLs and upload a single grid image composed of all their
+        thumbnails to Matrix server
+        :param media: list of tuples with Media object and its label (e.g. Pic#1)
+        :param size: width and height of a single tile in the grid
+        :param nsfw: True if images need blurring, False otherwise
+        :return: a tuple with matrix mxc URL, width, and height of the grid image
+        """
+        blur = nsfw and not self.config["show_nsfw"]
+        tiles = []
+        for med, label in media:
+            url = self._get_source_url(med)
+            if url:
+                tiles.append((url, label, self._get_overlay(med, blur)))
+        if not tiles:
+            return "", 0, 0
+
+        # Reuse the grid if the same set of media was already uploaded
+        key = "\n".join(f"{label} {url}" for url, label, _ in tiles)
+        budget = self._get_budget(size) * len(tiles)
+        variant = self._get_variant("mosaic_nsfw" if blur else "mosaic", budget, blur)
+        cached = await self.media_cache.get_thumbnail(key, size, variant)
+        if cached:
+            return cached
+
+        images = await asyncio.gather(*(self.download_image(tile[0]) for tile in tiles))
+        tiles = [(data, *tile[1:]) for data, tile in zip(images, tiles) if data]
+        if not tiles:
             return "", 0, 0
 
-        mxc_uri = await self.upload_media(image_data, "image/jpeg", "thumbnail.jpg")
+        try:
+            image_data, width, height, encode_time = await self.thumbnails.render_mosaic(
+                [tile[0] for tile in tiles],
+                [tile[1] for tile in tiles],
+                [tile[2] for tile in tiles],
+                size,
+                blur,
+                self.thumbnail_format,
+                budget
+            )
+        except (OSError, ValueError, TypeError, UnidentifiedImageError, BrokenExecutor) as e:
+            self.bot.log.error(f"Error generating thumbnail grid: {e}")
+            return "", 0, 0
+        self._add_encode_timing(size, encode_time, len(image_data), "mosaic")
+
+        mxc_uri = await self._upload_thumbnail(image_data)
+        if mxc_uri:
+            await self.media_cache.put_thumbnail(key, size, variant, (mxc_uri, width, height))
         return mxc_uri, width, height
 
+    def _get_budget(self, size: int) -> int:
+        """
+        Get max size in bytes of a thumbnail
+        :param size: max width and height of the thumbnail
+        :return: size budget in bytes, 0 for no limit
+        """
+        if size > self.config["thumbnail_small"]:
+            return self.config["thumbnail_budget_large"]
+        return self.config["thumbnail_budget_small"]
+
+    def _get_variant(self, name: str, budget: int, blur: bool) -> str:
+        """
+        Get name of the thumbnail variant used as a key in the media cache
+        :param name: name of the variant (overlay, mosaic)
+        :param budget: size budget of the thumbnail in bytes
+        :param blur: True if thumbnail is blurred
+        :return: name of the variant with blur mode, output format and budget
+        """
+        blur_mode = ("fast" if self.thumbnails.fast_blur else "gaussian") if blur else "sharp"
+        return f"{name}.{blur_mode}.{self.thumbnail_format}.{budget}"
+
+    def _add_encode_timing(self, size: int, seconds: float, length: int, kind: str = "") -> None:
+        """
+        Record time it took to encode a thumbnail and its size
+        :param size: max width and height of the thumbnail
+        :param seconds: encoding time
+        :param length: size of the encoded thumbnail in bytes
+        :param kind: additional name of the group (e.g. mosaic)
+        :return:
+        """
+        name = f"{self.thumbnail_format} {size}px{f" {kind}" if kind else ""}"
+        self.encode_timings.add(name, seconds, length)
+        self.bot.log.debug(f"Encoded {name} thumbnail ({length} B) in {seconds * 1000:.1f} ms")
+
+    async def _upload_thumbnail(self, data: bytes) -> str:
+        """
+        Upload thumbnail to Matrix server
+        :param data: thumbnail as bytes
+        :return: matrix mxc URL or empty string if upload failed
+        """
+        _, mime, extension = OUTPUT_FORMATS[self.thumbnail_format]
+        return await self.upload_media(data, mime, f"thumbnail.{extension}")
+
+    def _get_source_url(self, media: Media) -> str | None:
+        """
+        Get URL of the image that a thumbnail is generated from
+        :param media: Media object with data about an image
+        :return: URL of the image or None if there's no image to generate the thumbnail from
+        """
+        if media.thumbnail_url:
+            return media.thumbnail_url
+        if media.filetype == "p" and media.url:
+            return media.url
+        return None
+
+    def _get_overlay(self, media: Media, blur: bool) -> str:
+        """
+        Get name of the overlay that should be put on the thumbnail
+        :param media: Media object with data about an image
+        :param blur: True if thumbnail is blurred
+        :return: name of the overlay or empty string if there should be no overlay
+        """
+        is_video = media.filetype != "p"
+        # Add NSFW warning
+        if blur:
+            return "nsfw_vid" if is_video else "nsfw_pic"
+        # If it's a thumbnail to a video file and not NSFW, add play button overlay
+        return "play" if is_video else ""
+
     async def upload_media(self, data: bytes, mime: str, name: str) -> str:
         """
         Upload image to Matrix server
@@ -289,16 +620,18 @@ class Utilities:
         """
         try:
             # Upload image to Matrix server
-            return await self.bot.client.upload_media(
-                data=data,
-                mime_type=mime,
-                filename=name,
-                size=len(data))
-        except (ValueError, MatrixResponseError) as e:
+            return await self.upload_scheduler.run(
+                lambda: self.bot.client.upload_media(
+                    data=data,
+                    mime_type=mime,
+                    filename=name,
+                    size=len(data))
+            )
+        except (ValueError, MatrixRequestError, MatrixResponseError) as e:
             self.bot.log.error(f"Uploading image to Matrix server: {e}")
             return ""
 
-    async def config_item_contains(self, elems: list[str], item_key: str) -> bool:
+    def config_item_contains(self, elems: list[str], item_key: str) -> bool:
         """
         Check if any of string from list of elems occurs in a config's 'key' list
         :param elems: a list of string the occurrence we check for
@@ -312,7 +645,7 @@ class Utilities:
                 return True
         return False
 
-    async def fedi_forum_parse_title(self, title: str) -> tuple[str, list]:
+    def fedi_forum_parse_title(self, title: str) -> tuple[str, list]:
         """
         Split title string into title and flair
         :param title: Raw title string from API
@@ -349,13 +682,24 @@ class Utilities:
             r"<span data-mx-spoiler markdown='1'>\1</span>",
             text
         )
-        text = markdown.markdown(
-            text,
-            extensions=["tables", "fenced_code", "md_in_html"],
-            output_format="html"
-        )
+        text = self._get_markdown().convert(text)
         return text
 
+    def _get_markdown(self) -> markdown.Markdown:
+        """
+        Get Markdown converter of the current thread. Creating a converter loads all of its
+        extensions, so every executor thread keeps its own and resets it between documents.
+        :return: Markdown converter ready for a new document
+        """
+        converter = getattr(self._converters, "markdown", None)
+        if converter is None:
+            converter = markdown.Markdown(
+                extensions=["tables", "fenced_code", "md_in_html"],
+                output_format="html"
+            )
+            self._converters.markdown = converter
+        return converter.reset()
+
     def fedi_forum_parse_markdown(self, text: str) -> str:
         """
         Removes unnecessary characters from Markdown body of a post
@@ -372,7 +716,66 @@ class Utilities:
         text = self.EMPTY_LINK.sub(r"[\1](\1)", text)
         return text
 
-    async def get_poll_status(self, expires_at: int) -> str:
+    def truncate_source(self, text: str, limit: int | None = None) -> tuple[str, bool]:
+        """
+        Cut source text of a post at the last block boundary before 'forum_hard_max_length'
+        characters, so that only the beginning of a long post is converted and sent
+        :param text: Markdown or HTML source text of a post
+        :param limit: maximum length of the text, 'forum_hard_max_length' if not set
+        :return: tuple with the text and True if it was cut, False otherwise
+        """
+        if limit is None:
+            limit = self.config["forum_hard_max_length"]
+        if not text or not limit or len(text) <= limit:
+            return text, False
+        # Prefer the end of a paragraph, then the end of a line, then the end of a word,
+        # unless it throws away more than half of the allowed length
+        for separator in ("\n\n", "\n", " "):
+            cut = text.rfind(separator, 0, limit)
+            if cut >= limit // 2:
+                break
+        else:
+            cut = limit
+        return text[:cut].rstrip(), True
+
+    def truncate_markdown(self, text: str, limit: int | None = None) -> tuple[str, bool]:
+        """
+        Cut Markdown source text of a post and close blocks that were cut in half
+        :param text: Markdown source text of a post
+        :param limit: maximum length of the text, 'forum_hard_max_length' if not set
+        :return: tuple with the text and True if it was cut, False otherwise
+        """
+        text, truncated = self.truncate_source(text, limit)
+        if truncated:
+            if text.count("```") % 2:
+                text += "\n```"
+            if text.count(":::") % 2:
+                text += "\n:::"
+        return text, truncated
+
+    def close_html_tags(self, text: str) -> str:
+        """
+        Close HTML tags that are left open after text was cut
+        :param text: HTML text
+        :return: HTML text with all tags closed
+        """
+        # Drop a tag that was cut in half
+        start = text.rfind("<")
+        if start > text.rfind(">"):
+            text = text[:start]
+        open_tags: list[str] = []
+        for m in self.HTML_TAG.finditer(text):
+            closing, name, self_closing = m.groups()
+            name = name.lower()
+            if self_closing or name in self.HTML_VOID_TAGS:
+                continue
+            if not closing:
+                open_tags.append(name)
+            elif name in open_tags:
+                del open_tags[len(open_tags) - open_tags[::-1].index(name) - 1:]
+        return text + "".join(f"</{name}>" for name in reversed(open_tags))
+
+    def get_poll_status(self, expires_at: int) -> str:
         """
         Calculate time difference between current time and poll's expiration time
         :param expires_at: seconds since Epoch marking the end time when poll closes
@@ -0,0 +1,37 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mautrfx_embed.resources.utils import Utilities  # noqa: E402
+
+CONFIG = {
+    "nitter_redirect": False,
+    "nitter_url": "nitter.net",
+    "player": "https://example.org/player?url=",
+    "show_nsfw": False,
+    "thumbnail_large": 300,
+    "thumbnail_small": 120,
+    "media_mosaic": False,
+    "forum_max_length": 1000,
+    "forum_hard_max_length": 20000,
+    "max_event_size": 60000,
+    "localtime": False,
+    "reddit_excluded_flairs": [],
+    "fedi_excluded_flairs": [],
+    "fedi_excluded_comment_flairs": [],
+}
+
+
+@pytest.fixture
+def utils() -> Utilities:
+    """
+    Utilities with the default config, without the bot, caches and thumbnail engine
+    """
+    instance = Utilities.__new__(Utilities)
+    instance.config = dict(CONFIG)
+    instance._converters = threading.local()
+    return instance
@@ -0,0 +1,316 @@
+"""
+Record golden fixtures for test_golden.py
+
+Expected outputs were recorded with the two-pass renderer from before the single-pass
+MessageParts builder (commit b87782d):
+
+    git archive b87782d | tar -x -C /tmp/golden-tree
+    python tests/golden/generate.py /tmp/golden-tree
+"""
+import asyncio
+import importlib
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+from helpers import load_post, make_bot, render
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+CONFIG = {
+    "nitter_redirect": False,
+    "nitter_url": "nitter.net",
+    "player": "https://example.org/player?url=",
+    "media_mosaic": False,
+    "thumbnail_large": 300,
+    "thumbnail_small": 120,
+    "forum_max_length": 200,
+    "forum_hard_max_length": 20000,
+    "max_event_size": 60000,
+    "localtime": False,
+}
+
+
+def media(url: str, filetype: str = "jpg", width: int = 1200, height: int = 800) -> dict:
+    return {
+        "width": width,
+        "height": height,
+        "url": url,
+        "thumbnail_url": url,
+        "filetype": filetype
+    }
+
+
+def poll(status: str = "Final results") -> dict:
+    return {
+        "ends_at": 1700003600,
+        "status": status,
+        "total_voters": 1234,
+        "choices": [
+            {"label": "Yes", "votes_count": 800, "percentage": 64.8},
+            {"label": "No", "votes_count": 434, "percentage": 35.2}
+        ]
+    }
+
+
+def blog(**fields: Any) -> dict:
+    post = {
+        "text": "",
+        "url": "",
+        "text_md": None,
+        "replies": None,
+        "reposts": None,
+        "likes": None,
+        "views": None,
+        "quotes": None,
+        "community_note": None,
+        "author_name": "",
+        "author_name_md": "",
+        "author_screen_name": "",
+        "author_url": "",
+        "post_date": 1700000000,
+        "photos": [],
+        "videos": [],
+        "facets": [],
+        "poll": None,
+        "link": None,
+        "quote": None,
+        "translation": None,
+        "translation_lang": None,
+        "qtype": "twitter",
+        "name": "Twitter",
+        "sensitive": False,
+        "spoiler_text": None
+    }
+    post.update(fields)
+    return post
+
+
+def forum(**fields: Any) -> dict:
+    post = {
+        "text": "",
+        "text_md": None,
+        "flairs": [],
+        "sub": "",
+        "sub_url": "",
+        "title": "",
+        "score": None,
+        "upvote_ratio": None,
+        "upvotes": None,
+        "downvotes": None,
+        "post_date": 1700000000,
+        "nsfw": False,
+        "spoiler": False,
+        "skip_content": False,
+        "author": "",
+        "author_url": "",
+        "url": "",
+        "comments": None,
+        "photos": [],
+        "videos": [],
+        "poll": None,
+        "qtype": "reddit",
+        "name": "Reddit",
+        "is_link": False,
+        "is_comment": False,
+        "read_more_url": None
+    }
+    post.update(fields)
+    return post
+
+
+TWEET = blog(
+    text="Hello @jack and #python\nRead more https://t.co/AbCdEf1234",
+    url="https://x.com/alice/status/1",
+    replies="12",
+    reposts="3.4K",
+    likes="56K",
+    views="1.2M",
+    quotes="7",
+    community_note="Readers added context\nThis is satire",
+    author_name="Alice <3",
+    author_name_md="Alice <3",
+    author_screen_name="alice",
+    author_url="https://x.com/alice",
+    photos=[media("https://pbs.twimg.com/media/A1.jpg"), media("https://pbs.twimg.com/media/A2.png")],
+    videos=[media("https://video.twimg.com/v/1.mp4", "mp4")],
+    facets=[
+        {"text": "@jack", "url": "https://x.com/jack", "start": 6, "end": 11},
+        {"text": "#python", "url": "https://x.com/hashtag/python", "start": 16, "end": 23}
+    ],
+    poll=poll(),
+    translation="Hola @jack y #python",
+    translation_lang="en",
+    sensitive=True
+)
+
+NESTED_QUOTE = blog(
+    text="Look at this",
+    url="https://x.com/bob/status/3",
+    author_name="Bob",
+    author_name_md="Bob",
+    author_screen_name="bob",
+    author_url="https://x.com/bob",
+    likes="1",
+    quote=blog(
+        text="Quoting a quote\nwith two lines",
+        url="https://x.com/carol/status/2",
+        author_name="Carol",
+        author_name_md="Carol",
+        author_screen_name="carol",
+        author_url="https://x.com/carol",
+        photos=[media("https://pbs.twimg.com/media/C1.jpg")],
+        quote=blog(
+            text="The original",
+            url="https://x.com/dave/status/1",
+            author_name="Dave",
+            author_name_md="Dave",
+            author_screen_name="dave",
+            author_url="https://x.com/dave",
+            link={"title": "Example", "description": "An example site", "url": "https://example.com"}
+        )
+    )
+)
+
+BSKY = blog(
+    text="Zażółć gęślą jaźń 🦋 @bob.bsky.social 👩‍👩‍👧 #żółw https://example.com/ś",
+    url="https://bsky.app/profile/ewa.bsky.social/post/3k",
+    replies="1",
+    reposts="2",
+    likes="3",
+    quotes="4",
+    author_name="Ewa 🦋",
+    author_name_md="Ewa 🦋",
+    author_screen_name="ewa.bsky.social",
+    author_url="https://bsky.app/profile/ewa.bsky.social",
+    facets=[
+        {"text": "@bob.bsky.social", "url": "https://bsky.app/profile/bob.bsky.social",
+         "start": 20, "end": 36},
+        {"text": "#żółw", "url": "https://bsky.app/hashtag/żółw", "start": 43, "end": 48},
+        {"text": "https://example.com/ś", "url": "https://example.com/ś", "start": 49, "end": 70}
+    ],
+    qtype="bsky",
+    name="Bluesky",
+    quote=blog(
+        text="Cytat 🐢 z #emoji",
+        url="https://bsky.app/profile/bob.bsky.social/post/2k",
+        author_name="Bob",
+        author_name_md="Bob",
+        author_screen_name="bob.bsky.social",
+        author_url="https://bsky.app/profile/bob.bsky.social",
+        facets=[{"text": "#emoji", "url": "https://bsky.app/hashtag/emoji", "start": 10,
+                 "end": 16}],
+        qtype="bsky",
+        name="Bluesky"
+    )
+)
+
+MASTODON = blog(
+    text="<p>Spoilers for <a href=\"https://example.com\">the book</a></p><p>The butler did it</p>",
+    text_md="Spoilers for [the book](https://example.com)\n\nThe butler did it",
+    url="https://mastodon.social/@eve/1",
+    replies="0",
+    reposts="5",
+    likes="10",
+    author_name="Eve",
+    author_name_md="Eve",
+    author_screen_name="eve@mastodon.social",
+    author_url="https://mastodon.social/@eve",
+    photos=[media("https://files.mastodon.social/a.png"), media("https://files.mastodon.social/b.png")],
+    poll=poll("Ends"),
+    link={"title": "A book", "description": "Reviews", "url": "https://example.com"},
+    qtype="mastodon",
+    name="Mastodon",
+    sensitive=True,
+    spoiler_text="Book spoilers"
+)
+
+REDDIT_SPOILER = forum(
+    text="<p>The <strong>ending</strong> explained</p>",
+    text_md="The **ending** explained",
+    flairs=["Spoiler", "Discussion"],
+    sub="r/movies",
+    sub_url="https://www.reddit.com/r/movies",
+    title="Ending of the movie",
+    score=1234,
+    upvote_ratio=97,
+    post_date=1700000000,
+    spoiler=True,
+    author="frank",
+    author_url="https://www.reddit.com/user/frank",
+    url="https://www.reddit.com/r/movies/comments/abc",
+    comments=321,
+    photos=[media("https://i.redd.it/a.jpg")]
+)
+
+REDDIT_LONG = forum(
+    text="<p>" + "Long paragraph of text. " * 20 + "</p><p>Second paragraph</p>",
+    text_md="Long paragraph of text. " * 20 + "\n\nSecond paragraph",
+    sub="r/python",
+    sub_url="https://www.reddit.com/r/python",
+    title="A very long self post",
+    score=99,
+    upvote_ratio=88,
+    author="grace",
+    author_url="https://www.reddit.com/user/grace",
+    url="https://www.reddit.com/r/python/comments/def",
+    comments=4,
+    photos=[media("https://i.redd.it/b.jpg"), media("https://i.redd.it/c.jpg")],
+    videos=[media("https://v.redd.it/d/DASH_720.mp4", "mp4")],
+    poll=poll(),
+    read_more_url="https://www.reddit.com/r/python/comments/def"
+)
+
+LEMMY_COMMENT = forum(
+    text="<p>Agreed, see <a href=\"https://example.com\">this</a></p>",
+    text_md="Agreed, see [this](https://example.com)",
+    sub="!linux@lemmy.ml",
+    sub_url="https://lemmy.ml/c/linux",
+    title="Re: kernel release",
+    upvotes=12,
+    downvotes=1,
+    author="heidi@lemmy.ml",
+    author_url="https://lemmy.ml/u/heidi",
+    url="https://lemmy.ml/comment/1",
+    qtype="lemmy",
+    name="Lemmy",
+    is_comment=True
+)
+
+CASES = {
+    "twitter_tco": ("blog", {}, TWEET),
+    "twitter_nested_quote": ("blog", {"nitter_redirect": True}, NESTED_QUOTE),
+    "twitter_mosaic": ("blog", {"media_mosaic": True}, TWEET),
+    "bsky_multibyte": ("blog", {}, BSKY),
+    "mastodon_cw": ("blog", {}, MASTODON),
+    "reddit_spoiler": ("forum", {}, REDDIT_SPOILER),
+    "reddit_long": ("forum", {}, REDDIT_LONG),
+    "lemmy_comment": ("forum", {}, LEMMY_COMMENT),
+}
+
+
+async def main(tree: str) -> None:
+    sys.path.insert(0, tree)
+    bot_module = importlib.import_module("mautrfx_embed.mautrfx_embed")
+    ds = importlib.import_module("mautrfx_embed.resources.datastructures")
+    utils_module = importlib.import_module("mautrfx_embed.resources.utils")
+    FIXTURES.mkdir(exist_ok=True)
+    for name, (kind, overrides, data) in CASES.items():
+        bot = make_bot(bot_module, utils_module.Utilities, {**CONFIG, **overrides})
+        html, body = await render(bot, load_post(kind, data, ds))
+        fixture = {
+            "kind": kind,
+            "config": {**CONFIG, **overrides},
+            "post": data,
+            "html": html,
+            "body": body
+        }
+        with open(FIXTURES / f"{name}.json", "w", encoding="utf-8") as file:
+            json.dump(fixture, file, ensure_ascii=False, indent=2)
+            file.write("\n")
+        print(f"{name}: {len(html)} / {len(body)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else str(Path(__file__).parents[2])))
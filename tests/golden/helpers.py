@@ -0,0 +1,69 @@
+import hashlib
+import logging
+from types import ModuleType
+from typing import Any
+
+
+def load_post(kind: str, data: dict[str, Any], ds: ModuleType) -> Any:
+    """
+    Build a BlogPost or ForumPost object from a fixture
+    :param kind: 'blog' or 'forum'
+    :param data: post fields
+    :param ds: datastructures module of the renderer
+    :return: BlogPost or ForumPost object
+    """
+    data = dict(data)
+    data["photos"] = [ds.Media(**media) for media in data["photos"]]
+    data["videos"] = [ds.Media(**media) for media in data["videos"]]
+    if data["poll"]:
+        poll = dict(data["poll"])
+        poll["choices"] = [ds.Choice(**choice) for choice in poll["choices"]]
+        data["poll"] = ds.Poll(**poll)
+    if kind == "forum":
+        return ds.ForumPost(**data)
+    data["facets"] = [ds.Facet(**facet) for facet in data["facets"]]
+    data["link"] = ds.Link(**data["link"]) if data["link"] else None
+    data["quote"] = load_post("blog", data["quote"], ds) if data["quote"] else None
+    return ds.BlogPost(**data)
+
+
+def make_bot(bot_module: ModuleType, utils_class: type, config: dict[str, Any]) -> Any:
+    """
+    Create the plugin with formatters only, thumbnails are replaced with fake mxc URLs
+    :param bot_module: main module of the plugin
+    :param utils_class: Utilities class of the renderer
+    :param config: plugin config
+    :return: plugin object
+    """
+    async def get_matrix_image_url(media: Any, size: int, sensitive: bool) -> tuple:
+        digest = hashlib.sha1(f"{media.url}:{size}:{sensitive}".encode()).hexdigest()[:12]
+        return f"mxc://example.org/{digest}", size, size // 2
+
+    async def get_matrix_mosaic_url(media: list, size: int, sensitive: bool) -> tuple:
+        urls = ",".join(item[0].url for item in media)
+        digest = hashlib.sha1(f"{urls}:{size}:{sensitive}".encode()).hexdigest()[:12]
+        return f"mxc://example.org/{digest}", size, size // 2
+
+    utils = utils_class.__new__(utils_class)
+    utils.config = config
+    utils.get_matrix_image_url = get_matrix_image_url
+    utils.get_matrix_mosaic_url = get_matrix_mosaic_url
+    bot = bot_module.MautrFxEmbedBot.__new__(bot_module.MautrFxEmbedBot)
+    bot.config = config
+    bot.log = logging.getLogger("golden")
+    bot.utils = utils
+    bot.sharedfmt = bot_module.SharedFmt(utils)
+    bot.blog = bot_module.Blog(utils, bot.sharedfmt)
+    bot.forum = bot_module.Forum(utils, bot.sharedfmt)
+    return bot
+
+
+async def render(bot: Any, post: Any) -> tuple[str, str]:
+    """
+    Render a post the same way as the plugin does before sending it
+    :param bot: plugin object from make_bot()
+    :param post: BlogPost or ForumPost object
+    :return: tuple with HTML and plain body of the message
+    """
+    content = await bot._prepare_message(post)
+    return content.formatted_body, content.body
@@ -0,0 +1,41 @@
+from mautrfx_embed.resources.cache import TTLCache
+
+
+def make_cache() -> TTLCache:
+    cache = TTLCache(ttl=60, max_entries=10, max_bytes=1000)
+    for key in "abcd":
+        cache.put(key, key.upper(), 10)
+    return cache
+
+
+def test_resize_evicts_least_recently_used():
+    cache = make_cache()
+    cache.get("a")
+    cache.resize(ttl=60, max_entries=2, max_bytes=1000)
+    assert cache.stats["entries"] == 2
+    assert cache.get("a") == "A"
+    assert cache.get("d") == "D"
+    assert cache.get("b") is None
+
+
+def test_resize_evicts_over_byte_limit():
+    cache = make_cache()
+    cache.resize(ttl=60, max_entries=10, max_bytes=25)
+    assert cache.stats == {"hits": 0, "misses": 0, "coalesced": 0, "entries": 2, "bytes": 20}
+
+
+def test_resize_to_zero_disables_cache():
+    cache = make_cache()
+    cache.resize(ttl=60, max_entries=0, max_bytes=1000)
+    assert cache.stats["entries"] == 0
+    cache.put("e", "E", 10)
+    assert cache.get("e") is None
+
+
+def test_resize_changes_ttl_of_new_entries():
+    cache = make_cache()
+    cache.resize(ttl=0, max_entries=10, max_bytes=1000)
+    # Existing entries keep their expiration time
+    assert cache.get("a") == "A"
+    cache.put("e", "E", 10)
+    assert cache.get("e") is None
@@ -0,0 +1,23 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import mautrfx_embed.mautrfx_embed as bot_module
+from mautrfx_embed.resources import datastructures
+from mautrfx_embed.resources.utils import Utilities
+from tests.golden.helpers import load_post, make_bot, render
+
+FIXTURES = sorted((Path(__file__).parent / "golden" / "fixtures").glob("*.json"))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", FIXTURES, ids=[path.stem for path in FIXTURES])
+async def test_render_matches_golden(path: Path) -> None:
+    with open(path, encoding="utf-8") as file:
+        fixture = json.load(file)
+    bot = make_bot(bot_module, Utilities, fixture["config"])
+    post = load_post(fixture["kind"], fixture["post"], datastructures)
+    html, body = await render(bot, post)
+    assert html == fixture["html"]
+    assert body == fixture["body"]
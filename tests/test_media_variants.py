@@ -0,0 +1,226 @@
+import pytest
+
+from mautrfx_embed.parsers.mastodon import Mastodon
+from mautrfx_embed.parsers.reddit import Reddit
+from mautrfx_embed.parsers.twitter import Twitter
+from mautrfx_embed.resources.media_variants import get_twimg_url, pick_variant
+
+
+# pick_variant
+def test_pick_variant_smallest_big_enough():
+    variants = [(108, 60, "a"), (216, 121, "b"), (320, 180, "c"), (640, 360, "d")]
+    assert pick_variant(variants, 120) == "b"
+    assert pick_variant(variants, 320) == "c"
+
+
+def test_pick_variant_uses_longer_side():
+    assert pick_variant([(60, 130, "a"), (120, 260, "b")], 120) == "a"
+
+
+def test_pick_variant_empty_list():
+    assert pick_variant([], 120) is None
+
+
+def test_pick_variant_all_smaller_returns_largest():
+    assert pick_variant([(50, 50, "a"), (80, 60, "b")], 300) == "b"
+
+
+# Twitter
+@pytest.mark.parametrize(("url", "size", "expected"), [
+    (
+        "https://pbs.twimg.com/media/ABC123.jpg",
+        120,
+        "https://pbs.twimg.com/media/ABC123?format=jpg&name=small"
+    ),
+    (
+        "https://pbs.twimg.com/media/ABC123.png",
+        1000,
+        "https://pbs.twimg.com/media/ABC123?format=png&name=medium"
+    ),
+    (
+        "https://pbs.twimg.com/media/ABC123.jpg",
+        4000,
+        "https://pbs.twimg.com/media/ABC123?format=jpg&name=large"
+    ),
+    (
+        "https://pbs.twimg.com/media/ABC123?format=webp&name=orig",
+        300,
+        "https://pbs.twimg.com/media/ABC123?format=webp&name=small"
+    ),
+    (
+        "https://pbs.twimg.com/media/ABC123?name=orig&format=png",
+        300,
+        "https://pbs.twimg.com/media/ABC123?format=png&name=small"
+    ),
+    (
+        "https://pbs.twimg.com/media/ABC123",
+        300,
+        "https://pbs.twimg.com/media/ABC123?format=jpg&name=small"
+    ),
+    (
+        "https://pbs.twimg.com/ext_tw_video_thumb/1/pu/img/XYZ.jpg",
+        300,
+        "https://pbs.twimg.com/ext_tw_video_thumb/1/pu/img/XYZ?format=jpg&name=small"
+    ),
+])
+def test_twimg_named_rendition(url, size, expected):
+    assert get_twimg_url(url, size) == expected
+
+
+@pytest.mark.parametrize("url", [
+    "https://video.twimg.com/ext_tw_video/1/pu/vid/720x1280/a.mp4",
+    "https://example.org/media/ABC123.jpg",
+    "https://pbs.twimg.com/profile_images/1/a_normal.jpg",
+])
+def test_twimg_other_urls_unchanged(url):
+    assert get_twimg_url(url, 300) == url
+
+
+@pytest.mark.parametrize("url", [None, ""])
+def test_twimg_missing_url_unchanged(url):
+    assert get_twimg_url(url, 300) == url
+
+
+def test_twitter_parser_video_without_thumbnail(utils):
+    data = {"media": {"all": [
+        {"type": "video", "width": 1280, "height": 720, "url": "https://video.twimg.com/v.mp4",
+         "thumbnail_url": None},
+        {"type": "gif", "width": 480, "height": 270, "url": "https://video.twimg.com/g.mp4"},
+    ]}}
+    videos, photos = Twitter(None, utils)._parse_media(data)
+    assert [video.thumbnail_url for video in videos] == [None, None]
+    assert photos == []
+
+
+def test_twitter_parser_uses_size_of_thumbnail(utils):
+    data = {"media": {"all": [
+        {"type": "photo", "width": 4096, "height": 2048,
+         "url": "https://pbs.twimg.com/media/A.jpg"},
+        {"type": "video", "width": 1280, "height": 720, "url": "https://video.twimg.com/v.mp4",
+         "thumbnail_url": "https://pbs.twimg.com/ext_tw_video_thumb/1/pu/img/B.jpg"},
+    ]}}
+    videos, photos = Twitter(None, utils)._parse_media(data)
+    assert photos[0].thumbnail_url == "https://pbs.twimg.com/media/A?format=jpg&name=small"
+    assert photos[0].url == "https://pbs.twimg.com/media/A.jpg"
+    assert videos[0].thumbnail_url == (
+        "https://pbs.twimg.com/ext_tw_video_thumb/1/pu/img/B?format=jpg&name=small"
+    )
+
+
+# Reddit
+def _reddit_resolution(width: int, height: int) -> dict:
+    return {
+        "url": f"https://preview.redd.it/a.jpg?width={width}&amp;s=x",
+        "width": width,
+        "height": height,
+    }
+
+
+def test_reddit_resolutions(utils):
+    data = {
+        "post_hint": "image",
+        "url": "https://i.redd.it/a.jpg",
+        "preview": {"images": [{"resolutions": [
+            _reddit_resolution(108, 72),
+            _reddit_resolution(216, 144),
+            _reddit_resolution(320, 213),
+            _reddit_resolution(640, 426),
+        ]}]},
+    }
+    photos = Reddit(None, utils)._parse_photos(data)
+    assert len(photos) == 1
+    assert photos[0].thumbnail_url == "https://preview.redd.it/a.jpg?width=320&s=x"
+    assert (photos[0].width, photos[0].height) == (320, 213)
+    assert photos[0].url == "https://i.redd.it/a.jpg"
+
+
+def test_reddit_resolutions_all_smaller(utils):
+    data = {
+        "post_hint": "image",
+        "url": "https://i.redd.it/a.jpg",
+        "preview": {"images": [{"resolutions": [_reddit_resolution(108, 72)]}]},
+    }
+    photos = Reddit(None, utils)._parse_photos(data)
+    assert photos[0].thumbnail_url == "https://preview.redd.it/a.jpg?width=108&s=x"
+
+
+def _gallery(metadata: dict) -> dict:
+    return {
+        "gallery_data": {"items": [{"media_id": media_id} for media_id in metadata]},
+        "media_metadata": metadata,
+    }
+
+
+def _gallery_preview(width: int, height: int) -> dict:
+    return {"x": width, "y": height, "u": f"https://preview.redd.it/g.jpg?width={width}&amp;s=y"}
+
+
+def test_reddit_gallery(utils):
+    data = _gallery({
+        "one": {"m": "image/jpg", "p": [_gallery_preview(108, 81), _gallery_preview(216, 162)]},
+        "two": {"m": "image/png", "p": [_gallery_preview(96, 96)]},
+    })
+    photos = Reddit(None, utils)._parse_photos(data)
+    assert [photo.url for photo in photos] == [
+        "https://i.redd.it/one.jpg",
+        "https://i.redd.it/two.png",
+    ]
+    assert photos[0].thumbnail_url == "https://preview.redd.it/g.jpg?width=216&s=y"
+    # All renditions are smaller than the thumbnail, the largest one is used
+    assert photos[1].thumbnail_url == "https://preview.redd.it/g.jpg?width=96&s=y"
+
+
+def test_reddit_gallery_skips_items_without_renditions(utils):
+    data = _gallery({
+        "one": {"m": "image/jpg", "p": []},
+        "two": {"m": "image/jpg", "p": [_gallery_preview(216, 162)]},
+    })
+    photos = Reddit(None, utils)._parse_photos(data)
+    assert [photo.url for photo in photos] == ["https://i.redd.it/two.jpg"]
+
+
+# Mastodon
+def _mastodon_image(small: tuple[int, int] | None, original: tuple[int, int]) -> dict:
+    meta = {"original": {"width": original[0], "height": original[1]}}
+    if small:
+        meta["small"] = {"width": small[0], "height": small[1]}
+    return {
+        "type": "image",
+        "url": "https://files.example/original/a.png",
+        "preview_url": "https://files.example/small/a.png",
+        "meta": meta,
+    }
+
+
+def test_mastodon_small_preview_is_enough(utils):
+    data = {"media_attachments": [_mastodon_image((400, 300), (1600, 1200))]}
+    photos = Mastodon(None, utils)._parse_photos(data)
+    assert photos[0].thumbnail_url == "https://files.example/small/a.png"
+    assert (photos[0].width, photos[0].height) == (400, 300)
+    assert photos[0].url == "https://files.example/original/a.png"
+
+
+def test_mastodon_small_preview_too_small(utils):
+    utils.config["thumbnail_large"] = 800
+    data = {"media_attachments": [_mastodon_image((400, 300), (1600, 1200))]}
+    photos = Mastodon(None, utils)._parse_photos(data)
+    assert photos[0].thumbnail_url == "https://files.example/original/a.png"
+    assert (photos[0].width, photos[0].height) == (1600, 1200)
+
+
+def test_mastodon_missing_small_metadata(utils):
+    data = {"media_attachments": [_mastodon_image(None, (1600, 1200))]}
+    photos = Mastodon(None, utils)._parse_photos(data)
+    assert photos[0].thumbnail_url == "https://files.example/original/a.png"
+
+
+def test_mastodon_uses_small_thumbnail_size_for_many_images(utils):
+    data = {"media_attachments": [
+        _mastodon_image((200, 150), (1600, 1200)),
+        _mastodon_image((100, 75), (1600, 1200)),
+    ]}
+    photos = Mastodon(None, utils)._parse_photos(data)
+    assert [photo.thumbnail_url for photo in photos] == [
+        "https://files.example/small/a.png",
+        "https://files.example/original/a.png",
+    ]
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from ruamel.yaml import YAML
+
+from mautrfx_embed.mautrfx_embed import MautrFxEmbedBot
+
+BASE_CONFIG = Path(__file__).resolve().parent.parent / "base-config.yaml"
+
+
+def make_bot() -> MautrFxEmbedBot:
+    bot = MautrFxEmbedBot.__new__(MautrFxEmbedBot)
+    bot.config = YAML(typ="safe").load(BASE_CONFIG.read_text())
+    bot._build_render_key()
+    return bot
+
+
+def test_every_render_option_changes_key():
+    bot = make_bot()
+    for key in MautrFxEmbedBot.RENDER_CONFIG:
+        old_key = bot.render_key
+        old_value = bot.config[key]
+        bot.config[key] = ["changed"] if old_value != ["changed"] else None
+        bot._build_render_key()
+        assert bot.render_key != old_key, key
+        bot.config[key] = old_value
+        bot._build_render_key()
+        assert bot.render_key == old_key, key
+
+
+def test_other_options_keep_key():
+    bot = make_bot()
+    old_key = bot.render_key
+    bot.config["message_cache_ttl"] = 1
+    bot.config["thumbnail_workers"] = 4
+    bot._build_render_key()
+    assert bot.render_key == old_key
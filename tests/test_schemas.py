@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+import msgspec
+import pytest
+
+from mautrfx_embed.parsers.bsky import Bsky
+from mautrfx_embed.parsers.lemmy import Lemmy
+from mautrfx_embed.parsers.mastodon import Mastodon
+from mautrfx_embed.parsers.piefed import Piefed
+from mautrfx_embed.parsers.reddit import Reddit
+from mautrfx_embed.parsers.twitter import Twitter
+from mautrfx_embed.resources.schemas import DECODERS, TwitterResponse
+
+FIXTURES = sorted((Path(__file__).parent.parent / "benchmarks" / "fixtures").glob("*.json"))
+
+
+def parse(service: str, utils, data):
+    if service == "mastodon":
+        return Mastodon(None, utils)._parse_mastodon_preview(data, "mastodon.social", {})
+    parser = {
+        "twitter": Twitter,
+        "bsky": Bsky,
+        "reddit": Reddit,
+        "lemmy": Lemmy,
+        "piefed": Piefed,
+    }[service](None, utils)
+    return getattr(parser, f"_parse_{service}_preview")(data)
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=[path.stem for path in FIXTURES])
+def test_struct_parses_like_dict(utils, path: Path):
+    service = path.stem.split("_")[0]
+    body = path.read_bytes()
+    struct = DECODERS[service].decode(body)
+    assert isinstance(struct, msgspec.Struct)
+    assert parse(service, utils, struct) == parse(service, utils, json.loads(body))
+
+
+def test_fixtures_cover_all_decoders():
+    assert {path.stem.split("_")[0] for path in FIXTURES} == set(DECODERS)
+
+
+def test_struct_reads_like_dict():
+    data = DECODERS["twitter"].decode(b'{"code": 200, "tweet": {"quote": null}}')
+    assert data["code"] == 200
+    assert data["tweet"]["quote"] is None
+    assert data["tweet"].get("poll") is None
+    assert data["tweet"].get("possibly_sensitive", False) is False
+    with pytest.raises(KeyError):
+        data["tweet"]["author"]
+    # Keys the schema doesn't declare fail loudly instead of looking missing
+    with pytest.raises(KeyError):
+        data.get("message")
+
+
+def test_struct_json_keys():
+    data = DECODERS["bsky"].decode(
+        b'{"thread": {"post": {"replyCount": 1, "embed": {"$type": "app.bsky.embed.video#view"}}}}'
+    )
+    assert data["thread"]["post"]["replyCount"] == 1
+    assert data["thread"]["post"]["embed"]["$type"] == "app.bsky.embed.video#view"
+
+
+def test_unexpected_type_fails_decoding():
+    # Utilities._fetch_preview() falls back to plain JSON then
+    with pytest.raises(msgspec.DecodeError):
+        msgspec.json.decode(b'{"code": "200"}', type=TwitterResponse)
@@ -0,0 +1,36 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from mautrfx_embed.mautrfx_embed import MautrFxEmbedBot
+from mautrfx_embed.resources.cache import TTLCache
+from mautrfx_embed.resources.utils import Utilities
+
+
+def make_cache() -> TTLCache:
+    return TTLCache(ttl=60, max_entries=10, max_bytes=1000)
+
+
+@pytest.mark.asyncio
+async def test_log_stats_reports_cache_counters(utils: Utilities, caplog):
+    utils.api_cache = make_cache()
+    utils.source_cache = make_cache()
+    utils.negative_cache = make_cache()
+    bot = MautrFxEmbedBot.__new__(MautrFxEmbedBot)
+    bot.log = logging.getLogger("stats")
+    bot.utils = utils
+    bot.message_cache = make_cache()
+    utils.thumbnails = SimpleNamespace(queue_depth=1, max_queue_depth=3)
+
+    async def fetch() -> tuple[str, int]:
+        return "value", 5
+
+    await utils.api_cache.get_or_fetch("a", fetch)
+    await utils.api_cache.get_or_fetch("a", fetch)
+    with caplog.at_level(logging.INFO, "stats"):
+        bot.log_stats()
+    assert "API cache: 1 hits, 1 misses, 0 coalesced, 1 entries, 5 bytes" in caplog.messages
+    assert "Message cache: 0 hits, 0 misses, 0 coalesced, 0 entries, 0 bytes" in caplog.messages
+    assert "Thumbnail jobs: 1 in queue, 3 at most" in caplog.messages
+    assert len(caplog.messages) == 5
@@ -0,0 +1,49 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from mautrfx_embed.resources.utils import Utilities
+
+
+@pytest.fixture
+def thumbs(utils: Utilities) -> Utilities:
+    utils.thumbnail_format = "jpeg"
+    utils.thumbnails = SimpleNamespace(fast_blur=False)
+    return utils
+
+
+def test_fast_blur_has_own_key(thumbs: Utilities):
+    thumbs.thumbnails.fast_blur = True
+    assert thumbs._get_variant("nsfw_pic", 0, True) == "nsfw_pic.fast.jpeg.0"
+    assert thumbs._get_variant("mosaic_nsfw", 0, True) == "mosaic_nsfw.fast.jpeg.0"
+    # Blur mode doesn't change thumbnails that aren't blurred
+    assert thumbs._get_variant("plain", 0, False) == "plain.sharp.jpeg.0"
+
+
+def test_blur_flag_is_part_of_key(thumbs: Utilities):
+    thumbs.thumbnail_format = "webp"
+    sharp = thumbs._get_variant("play", 0, False)
+    blurred = thumbs._get_variant("play", 0, True)
+    assert sharp == "play.sharp.webp.0"
+    assert blurred == "play.gaussian.webp.0"
+
+
+def test_format_and_budget_are_part_of_key(thumbs: Utilities):
+    assert thumbs._get_variant("plain", 20000, False) == "plain.sharp.jpeg.20000"
+    thumbs.thumbnail_format = "avif"
+    assert thumbs._get_variant("plain", 0, False) == "plain.sharp.avif.0"
+
+
+def test_config_update_changes_key(thumbs: Utilities):
+    thumbs.bot = SimpleNamespace(log=logging.getLogger("test"))
+    thumbs.config.update(thumbnail_format="WEBP", thumbnail_blur="fast")
+    thumbs.load_thumbnail_config()
+    assert thumbs.thumbnail_format == "webp"
+    assert thumbs.thumbnails.fast_blur
+    assert thumbs._get_variant("nsfw_pic", 0, True) == "nsfw_pic.fast.webp.0"
+    thumbs.config.update(thumbnail_format="bmp", thumbnail_blur="gaussian")
+    thumbs.load_thumbnail_config()
+    assert thumbs.thumbnail_format == "jpeg"
+    assert not thumbs.thumbnails.fast_blur
+    assert thumbs._get_variant("nsfw_pic", 0, True) == "nsfw_pic.gaussian.jpeg.0"
@@ -0,0 +1,97 @@
+import asyncio
+import io
+import logging
+import os
+from concurrent.futures import BrokenExecutor
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from mautrfx_embed.resources import thumbnails
+
+BLOBS = Path(__file__).resolve().parent.parent / "mautrfx_embed" / "blobs"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def overlays() -> None:
+    thumbnails.load_overlays({"play": (BLOBS / "play.png").read_bytes()})
+
+
+def image(width: int, height: int) -> bytes:
+    data = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 100, 50)).save(data, format="PNG")
+    return data.getvalue()
+
+
+@pytest.mark.parametrize(("size", "expected"), [(200, 100), (100, 100), (99, 96), (57, 56), (5, 8)])
+def test_overlay_snaps_to_prescaled_size(size: int, expected: int):
+    assert thumbnails.get_overlay("play", size).width == expected
+
+
+def test_non_square_thumbnails_reuse_prescaled_overlays():
+    count = len(thumbnails._scaled_overlays)
+    for width, height in ((300, 169), (120, 90), (90, 120), (300, 37), (121, 77)):
+        data, *_ = thumbnails.make_thumbnail(image(width, height), 300, "play", False)
+        assert Image.open(io.BytesIO(data)).size == (width, height)
+    assert len(thumbnails._scaled_overlays) == count
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_blur_keeps_size(fast: bool):
+    img = Image.open(io.BytesIO(image(300, 169)))
+    assert thumbnails.blur_image(img, fast).size == (300, 169)
+
+
+def crash() -> None:
+    os._exit(1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded")
+async def test_crashed_pool_is_replaced():
+    files = {"play": (BLOBS / "play.png").read_bytes()}
+    engine = thumbnails.ThumbnailEngine(asyncio.get_running_loop(), logging.getLogger(), files, 1)
+    try:
+        pools = [engine.executor]
+        for _ in range(thumbnails.MAX_POOL_RESTARTS):
+            with pytest.raises(BrokenExecutor):
+                await engine._run(crash)
+            assert engine.executor not in (None, pools[-1])
+            pools.append(engine.executor)
+            assert await engine._run(os.getpid) != os.getpid()
+        # Pool that keeps crashing is dropped in favor of the thread pool
+        with pytest.raises(BrokenExecutor):
+            await engine._run(crash)
+        assert engine.executor is None
+        assert await engine._run(os.getpid) == os.getpid()
+    finally:
+        engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_is_tracked():
+    files = {"play": (BLOBS / "play.png").read_bytes()}
+    engine = thumbnails.ThumbnailEngine(asyncio.get_running_loop(), logging.getLogger(), files, 0)
+    await asyncio.gather(*(engine._run(os.getpid) for _ in range(3)))
+    assert engine.queue_depth == 0
+    assert engine.max_queue_depth == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded")
+async def test_set_workers_switches_executor():
+    files = {"play": (BLOBS / "play.png").read_bytes()}
+    engine = thumbnails.ThumbnailEngine(asyncio.get_running_loop(), logging.getLogger(), files, 0)
+    try:
+        assert await engine._run(os.getpid) == os.getpid()
+        engine.set_workers(2)
+        pool = engine.executor
+        assert await engine._run(os.getpid) != os.getpid()
+        engine.set_workers(2)
+        assert engine.executor is pool
+        engine.set_workers(0)
+        assert engine.executor is None
+        assert await engine._run(os.getpid) == os.getpid()
+    finally:
+        engine.shutdown()
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from mautrfx_embed.resources.upload_scheduler import UploadScheduler
+
+
+@pytest.mark.asyncio
+async def test_configure_changes_concurrency():
+    scheduler = UploadScheduler(rate=0, burst=10, max_retries=0, concurrency=1)
+    running = 0
+    peak = 0
+
+    async def upload() -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    await asyncio.gather(*(scheduler.run(upload) for _ in range(4)))
+    assert peak == 1
+    scheduler.configure(rate=0, burst=10, max_retries=0, concurrency=3)
+    await asyncio.gather(*(scheduler.run(upload) for _ in range(6)))
+    assert peak == 3
+
+
+def test_configure_caps_tokens_at_new_burst():
+    scheduler = UploadScheduler(rate=5, burst=10, max_retries=3, concurrency=4)
+    scheduler.configure(rate=1, burst=2, max_retries=1, concurrency=4)
+    assert scheduler._tokens == 2
+    assert (scheduler.rate, scheduler.burst, scheduler.max_retries) == (1, 2, 1)